@@ -0,0 +1,229 @@
+"""Журнал запросов в JSON без записи в файл из потока запроса.
+
+AccessLogMiddleware пишет запись в логгер core.accesslog. Обработчик
+AccessLogHandler только кладёт её в ограниченную очередь; форматирует и
+пишет в файл фоновый поток пачками, с ротацией по размеру. Если очередь
+полна, запись отбрасывается и учитывается в счётчике — запрос не ждёт.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+STOP = object()
+
+
+class AccessLogMiddleware:
+    """Одна запись на запрос: view, пользователь, статус, время, размер.
+
+    Стоит после MetricsMiddleware, чтобы взять у него число запросов к
+    БД. Пользователь берётся, только если его уже загрузили.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, '_cached_user', None)
+        access = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'user_id': getattr(user, 'pk', None),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'bytes': None if response.streaming else len(response.content),
+            'queries': metrics.current_query_count(),
+        }
+        logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={'access': access}
+        )
+        return response
+
+
+class JsonFormatter(logging.Formatter):
+    """Строка JSON: время и поля access записи или текст сообщения."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.utcfromtimestamp(record.created).isoformat(
+                timespec='milliseconds'
+            ) + 'Z',
+        }
+        data.update(
+            getattr(record, 'access', None)
+            or {'level': record.levelname, 'message': record.getMessage()}
+        )
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BatchWriter(threading.Thread):
+    """Фоновый поток: пишет записи из очереди пачками с ротацией."""
+
+    def __init__(self, handler):
+        super().__init__(name='access-log-writer', daemon=True)
+        self.handler = handler
+        self.stream = None
+        self.reported_drops = 0
+
+    def run(self):
+        handler = self.handler
+        while True:
+            batch = [handler.queue.get()]
+            deadline = time.monotonic() + handler.flush_interval
+            while batch[-1] is not STOP and len(batch) < handler.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(handler.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is STOP
+            self.write([record for record in batch if record is not STOP])
+            for _ in batch:
+                handler.queue.task_done()
+            if stop:
+                if self.stream is not None:
+                    self.stream.close()
+                return
+
+    def write(self, records):
+        formatter = self.handler.formatter or JsonFormatter()
+        lines = [formatter.format(record) + '\n' for record in records]
+        dropped = self.handler.dropped - self.reported_drops
+        if dropped:
+            self.reported_drops += dropped
+            lines.append(json.dumps({'dropped': dropped}) + '\n')
+        data = ''.join(lines).encode()
+        if not data:
+            return
+        try:
+            self.open()
+            if self.should_rollover(len(data)):
+                self.rollover()
+            self.stream.write(data)
+            self.stream.flush()
+        except OSError:
+            logging.getLogger(__name__ + '.writer').exception(
+                'Не удалось записать журнал запросов'
+            )
+
+    def open(self):
+        if self.stream is None:
+            directory = os.path.dirname(self.handler.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.stream = open(self.handler.filename, 'ab')
+
+    def should_rollover(self, size):
+        """Нужна ли ротация перед записью size байт.
+
+        Если файл уже переименовал другой процесс, поток просто
+        открывает новый файл.
+        """
+        if self.handler.max_bytes <= 0:
+            return False
+        try:
+            current = os.stat(self.handler.filename)
+        except FileNotFoundError:
+            current = None
+        if current is None or (
+            current.st_ino != os.fstat(self.stream.fileno()).st_ino
+        ):
+            self.stream.close()
+            self.stream = None
+            self.open()
+        return self.stream.tell() + size > self.handler.max_bytes
+
+    def rollover(self):
+        self.stream.close()
+        self.stream = None
+        filename = self.handler.filename
+        for number in range(self.handler.backup_count - 1, 0, -1):
+            source = f'{filename}.{number}'
+            if os.path.exists(source):
+                os.replace(source, f'{filename}.{number + 1}')
+        if self.handler.backup_count:
+            os.replace(filename, f'{filename}.1')
+        else:
+            os.remove(filename)
+        self.open()
+
+
+class AccessLogHandler(QueueHandler):
+    """Обработчик логов, который никогда не ждёт файла.
+
+    Записи кладутся в очередь на queue_size элементов без форматирования.
+    Поток записи стартует при первой записи в каждом процессе, так что
+    переживает fork воркеров.
+    """
+
+    def __init__(
+        self, filename, max_bytes=0, backup_count=0, queue_size=10000,
+        batch_size=500, flush_interval=1.0
+    ):
+        super().__init__(queue.Queue(queue_size))
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.writer = None
+        self._pid = None
+
+    def prepare(self, record):
+        return record
+
+    def start_writer(self):
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self.queue = queue.Queue(self.queue_size)
+            self.writer = BatchWriter(self)
+            self.writer.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self.start_writer()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc('yatube_access_log_dropped_total', {})
+
+    def flush(self, timeout=5):
+        """Дожидается записи всего, что уже в очереди."""
+        if self.writer is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        if self.writer is not None and self._pid == os.getpid():
+            try:
+                self.queue.put(STOP, timeout=1)
+            except queue.Full:
+                pass
+            self.writer.join(timeout=5)
+            self.writer = None
+            self._pid = None
+        super().close()
@@ -0,0 +1,141 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseNotAllowed
+from django.shortcuts import redirect
+from django.urls import path
+
+from core.models import QueryStat
+from core.querystats import merge_query_stats, reset_query_stats
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, которому выбранный объект передают готовым.
+
+    Обычный виджет ищет подпись выбранного значения отдельным запросом,
+    и в списке с list_editable это запрос на каждую строку.
+    """
+
+    selected_object = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = self.selected_object
+        if selected is None or {str(v) for v in value} != {str(selected.pk)}:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name,
+            selected.pk,
+            self.choices.field.label_from_instance(selected),
+            True,
+            len(options)
+        ))
+        return [(None, options, 0)]
+
+
+class PreloadedChangelistForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if not isinstance(widget, PreloadedAutocompleteSelect):
+                continue
+            model_field = self.instance._meta.get_field(name)
+            if model_field.is_cached(self.instance):
+                widget.selected_object = model_field.get_cached_value(
+                    self.instance
+                )
+
+
+class ScalableChangelistMixin:
+    """Автодополнение в list_editable без запроса на каждую строку.
+
+    Связанные объекты должны быть в list_select_related.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (
+            'widget' not in kwargs
+            and db_field.name in self.get_autocomplete_fields(request)
+        ):
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field,
+                self.admin_site,
+                using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PreloadedChangelistForm)
+        return super().get_changelist_form(request, **kwargs)
+
+
+class QueryStatAdmin(admin.ModelAdmin):
+    """Сводка запросов по отпечаткам.
+
+    При открытии списка таблица пересобирается из файлов процессов.
+    """
+    list_display = (
+        'short_sql', 'view', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'rows',
+    )
+    list_filter = ('view',)
+    search_fields = ('sql',)
+    readonly_fields = (
+        'fingerprint', 'view', 'sql', 'calls', 'total_time', 'max_time',
+        'rows', 'updated',
+    )
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    short_sql.short_description = 'SQL'
+
+    def total_ms(self, obj):
+        return round(obj.total_time * 1000, 1)
+
+    total_ms.short_description = 'Всего, мс'
+    total_ms.admin_order_field = 'total_time'
+
+    def mean_ms(self, obj):
+        return round(obj.mean_time * 1000, 2)
+
+    mean_ms.short_description = 'Среднее, мс'
+
+    def max_ms(self, obj):
+        return round(obj.max_time * 1000, 1)
+
+    max_ms.short_description = 'Максимум, мс'
+    max_ms.admin_order_field = 'max_time'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'reset/',
+                self.admin_site.admin_view(self.reset_view),
+                name='core_querystat_reset'
+            ),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        merge_query_stats()
+        return super().changelist_view(request, extra_context)
+
+    def reset_view(self, request):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        if not self.has_delete_permission(request):
+            raise PermissionDenied
+        reset_query_stats()
+        return redirect('admin:core_querystat_changelist')
+
+
+admin.site.register(QueryStat, QueryStatAdmin)
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from core import checks  # noqa: F401
+        from core import metrics, querystats, slowqueries
+
+        metrics.connect_model_signals()
+        connection_created.connect(metrics.install, dispatch_uid='query_count')
+        connection_created.connect(
+            slowqueries.install, dispatch_uid='slow_query_log'
+        )
+        connection_created.connect(
+            querystats.install, dispatch_uid='query_stats'
+        )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+
+@register(Tags.caches, deploy=True)
+def check_ratelimit_cache(app_configs, **kwargs):
+    """Счётчики ограничителя частоты должны быть общими для процессов.
+
+    В LocMemCache каждый воркер считает только свои запросы, и лимит
+    фактически умножается на число процессов. Для разработки с одним
+    сервером это не важно, поэтому проверка выполняется только в
+    check --deploy.
+    """
+    if not settings.RATELIMIT_ENABLED:
+        return []
+    backend = import_string(
+        settings.CACHES[settings.RATELIMIT_CACHE_ALIAS]['BACKEND']
+    )
+    if issubclass(backend, (LocMemCache, DummyCache)):
+        return [Warning(
+            f'Ограничитель частоты считает запросы в кэше '
+            f'{settings.RATELIMIT_CACHE_ALIAS}, который не общий для '
+            f'процессов.',
+            hint=(
+                'Укажите в RATELIMIT_CACHE_ALIAS общий кэш (memcached, '
+                'redis).'
+            ),
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,44 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def brotli_compressor(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+COMPRESSORS = {'gzip': gzip_compressor}
+if brotli is not None:
+    COMPRESSORS['br'] = brotli_compressor
+
+
+def compress_string(data, encoding, level):
+    compress, _, finish = COMPRESSORS[encoding](level)
+    return compress(data) + finish()
+
+
+def compress_sequence(sequence, encoding, level):
+    """Сжимает поток по частям, не накапливая его в памяти.
+
+    После каждой части делается flush, чтобы клиент получал страницу
+    по мере генерации, а не после её окончания.
+    """
+    compress, flush, finish = COMPRESSORS[encoding](level)
+    for item in sequence:
+        data = compress(item) + flush()
+        if data:
+            yield data
+    yield finish()
@@ -0,0 +1,91 @@
+"""Замер времени импорта модулей при старте процесса.
+
+Модуль не зависит от Django: его ставят в wsgi.py до импорта фреймворка.
+"""
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+
+class TimedLoader:
+    """Обёртка загрузчика, засекающая выполнение кода модуля."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Модуль и его спецификация видят настоящий загрузчик: от него
+        # зависят importlib.resources, pkgutil и перезагрузка модулей.
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer.start(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.stop(module.__name__)
+
+
+class ImportTimer(MetaPathFinder):
+    """Собирает время импорта каждого модуля.
+
+    total — время вместе с вложенными импортами, self — без них.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._stack = []
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if hasattr(spec.loader, 'exec_module'):
+                spec.loader = TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def start(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self, name):
+        _, started, nested = self._stack.pop()
+        total = time.perf_counter() - started
+        self.timings[name] = (total, total - nested)
+        if self._stack:
+            self._stack[-1][2] += total
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    @property
+    def total(self):
+        """Всё время, ушедшее на импорты."""
+        return sum(own for _, own in self.timings.values())
+
+    def by_package(self):
+        """Собственное время модулей, сложенное по пакетам верхнего уровня."""
+        packages = {}
+        for name, (_, own) in self.timings.items():
+            package = name.partition('.')[0]
+            packages[package] = packages.get(package, 0.0) + own
+        return sorted(packages.items(), key=lambda item: -item[1])
+
+    def slowest(self, limit=20):
+        """Модули с наибольшим собственным временем импорта."""
+        return sorted(
+            self.timings.items(), key=lambda item: -item[1][1]
+        )[:limit]
@@ -0,0 +1,51 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date, linebreaks_filter
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+from markupsafe import Markup
+
+from core.paginator import page_window
+from core.templatetags.user_filters import addclass
+from posts.templatetags.post_images import responsive_image
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def cache(timeout, fragment_name, *vary_on, caller):
+    """Аналог {% cache %} для {% call cache(...) %}...{% endcall %}.
+
+    Ключи те же, что у тега Django, так что оба движка делят кэш
+    фрагментов.
+    """
+    try:
+        fragment_cache = caches['template_fragments']
+    except InvalidCacheBackendError:
+        fragment_cache = caches['default']
+    key = make_template_fragment_key(fragment_name, vary_on)
+    value = fragment_cache.get(key)
+    if value is None:
+        value = str(caller())
+        fragment_cache.set(key, value, timeout)
+    return Markup(value)
+
+
+def environment(**options):
+    """Окружение Jinja2 с фильтрами и функциями шаблонов Django."""
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'cache': cache,
+        'page_window': page_window,
+        'responsive_image': responsive_image,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'linebreaks': linebreaks_filter,
+    })
+    return env
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core.compression import COMPRESSORS, compress_string
+
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'br': (1, 4, 6, 11),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время сжатия и экономию байт для страниц ленты '
+        'на разных уровнях gzip и brotli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls',
+            nargs='*',
+            default=['/'],
+            help='Страницы для замера.',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, urls, repeat, **options):
+        client = Client()
+        for url in urls:
+            content = client.get(url).content
+            self.stdout.write(f'{url}: {len(content)} байт без сжатия')
+            for encoding, levels in LEVELS.items():
+                if encoding not in COMPRESSORS:
+                    self.stderr.write(f'{encoding} недоступен, пропускаем')
+                    continue
+                for level in levels:
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        compressed = compress_string(content, encoding, level)
+                    elapsed = (time.perf_counter() - start) / repeat
+                    self.stdout.write(
+                        f'  {encoding:>4} {level:>2}: '
+                        f'{len(compressed):>7} байт '
+                        f'({len(compressed) / len(content):6.1%}), '
+                        f'{elapsed * 1000:7.3f} мс'
+                    )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import QueryStat
+from core.querystats import merge_query_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит статистику запросов всех процессов и печатает отпечатки '
+        'с наибольшим суммарным временем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--view',
+            default='',
+            help='Только view с этим префиксом, например posts:.',
+        )
+
+    def handle(self, *args, limit, view, **options):
+        merge_query_stats()
+        stats = QueryStat.objects.filter(view__startswith=view)[:limit]
+        for stat in stats:
+            self.stdout.write(
+                f'{stat.total_time * 1000:10.1f} мс '
+                f'{stat.calls:>8} выз. '
+                f'{stat.mean_time * 1000:8.2f} мс/выз. '
+                f'{stat.rows:>8} стр. '
+                f'{stat.view or "-"}'
+            )
+            self.stdout.write(f'    {stat.sql}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.ratelimit import throttled_counts
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько запросов отклонено каждым лимитом.'
+
+    def handle(self, *args, **options):
+        for name, count in sorted(throttled_counts().items()):
+            self.stdout.write(f'{name}: {count}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import format_report, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает процесс так же, как воркер перед приёмом запросов, '
+        'и печатает время каждого шага.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(format_report(warm_up()))
@@ -0,0 +1,432 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Каждый процесс пишет свои счётчики в собственный файл в METRICS_DIR,
+отображённый в память: запись — это сложение числа по известному
+смещению, без системных вызовов. /metrics читает файлы всех процессов и
+складывает значения, поэтому картина общая для всех воркеров. Все
+метрики в файлах — счётчики, гистограмма хранится счётчиками корзин.
+Каталог очищают при выкладке, иначе счёт продолжится со старых значений.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+
+HEADER = struct.Struct('I')
+VALUE = struct.Struct('d')
+HEADER_SIZE = 8
+INITIAL_SIZE = 64 * 1024
+MISSING = object()
+
+METRICS = {
+    'yatube_http_requests_total': (
+        'counter', 'Ответы по view и коду статуса.'
+    ),
+    'yatube_http_request_duration_seconds': (
+        'histogram', 'Время ответа по view.'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'Запросы к базе данных по view.'
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения из кэша по view и результату.'
+    ),
+    'yatube_model_writes_total': (
+        'counter', 'Создание, изменение и удаление объектов по моделям.'
+    ),
+    'yatube_access_log_dropped_total': (
+        'counter', 'Записи журнала запросов, отброшенные при полной очереди.'
+    ),
+    'yatube_ratelimit_throttled_total': (
+        'counter', 'Отклонённые ограничителем частоты запросы.'
+    ),
+}
+
+_local = threading.local()
+_stores = {}
+_keys = {}
+_stores_lock = threading.Lock()
+
+
+def padded(size):
+    return (size + 7) // 8 * 8
+
+
+def read_entries(data, used):
+    """Записи файла метрик: (ключ, значение, смещение значения)."""
+    position = HEADER_SIZE
+    while position < used:
+        (length,) = HEADER.unpack_from(data, position)
+        key = bytes(data[position + 4:position + 4 + length]).decode()
+        position += padded(4 + length)
+        (value,) = VALUE.unpack_from(data, position)
+        yield key, value, position
+        position += VALUE.size
+
+
+class MmapStore:
+    """Счётчики одного процесса в файле, отображённом в память.
+
+    Формат: в заголовке занятый размер, дальше записи из длины ключа,
+    ключа в UTF-8 с выравниванием на 8 байт и значения double. Занятый
+    размер обновляется последним, так что читатель из другого процесса
+    не увидит недописанную запись.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < INITIAL_SIZE:
+            self._file.truncate(INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        (self._used,) = HEADER.unpack_from(self._map, 0)
+        if not self._used:
+            self._used = HEADER_SIZE
+            HEADER.pack_into(self._map, 0, self._used)
+        self._positions = {
+            key: position
+            for key, _, position in read_entries(self._map, self._used)
+        }
+
+    def _grow(self, size):
+        capacity = len(self._map)
+        while capacity < size:
+            capacity *= 2
+        self._map.close()
+        self._file.truncate(capacity)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _add_entry(self, key):
+        encoded = key.encode()
+        entry_size = padded(4 + len(encoded))
+        position = self._used
+        if position + entry_size + VALUE.size > len(self._map):
+            self._grow(position + entry_size + VALUE.size)
+        HEADER.pack_into(self._map, position, len(encoded))
+        self._map[position + 4:position + 4 + len(encoded)] = encoded
+        VALUE.pack_into(self._map, position + entry_size, 0.0)
+        self._used = position + entry_size + VALUE.size
+        HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position + entry_size
+        return position + entry_size
+
+    def inc(self, key, amount=1):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_entry(key)
+            (value,) = VALUE.unpack_from(self._map, position)
+            VALUE.pack_into(self._map, position, value + amount)
+
+    def max(self, key, value):
+        """Записывает value, если оно больше сохранённого."""
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_entry(key)
+            (current,) = VALUE.unpack_from(self._map, position)
+            if value > current:
+                VALUE.pack_into(self._map, position, value)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_file(path):
+    with open(path, 'rb') as metrics_file:
+        data = metrics_file.read()
+    if len(data) < HEADER_SIZE:
+        return []
+    (used,) = HEADER.unpack_from(data, 0)
+    return [(key, value) for key, value, _ in read_entries(data, used)]
+
+
+def get_store(directory=None):
+    """Файл текущего процесса в directory; после fork открывается новый.
+
+    По умолчанию — каталог METRICS_DIR.
+    """
+    directory = directory or settings.METRICS_DIR
+    key = (directory, os.getpid())
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                os.makedirs(directory, exist_ok=True)
+                store = _stores[key] = MmapStore(
+                    os.path.join(directory, f'{os.getpid()}.db')
+                )
+    return store
+
+
+def forget_store(directory):
+    """Забывает файл процесса, например после удаления каталога.
+
+    Файл не закрывается: в него может писать другой поток, отображение
+    освободится вместе с последней ссылкой.
+    """
+    _stores.pop((directory, os.getpid()), None)
+
+
+def read_directory(directory):
+    """Записи файлов всех процессов: (имя, метки, значение)."""
+    if not os.path.isdir(directory):
+        return
+    for file_name in os.listdir(directory):
+        if not file_name.endswith('.db'):
+            continue
+        for key, value in read_file(os.path.join(directory, file_name)):
+            name, labels = json.loads(key)
+            yield name, tuple(map(tuple, labels)), value
+
+
+def metric_key(name, labels):
+    labels = tuple(sorted(labels.items()))
+    key = _keys.get((name, labels))
+    if key is None:
+        key = _keys[name, labels] = json.dumps(
+            [name, labels], ensure_ascii=False
+        )
+    return key
+
+
+def inc(name, labels, amount=1):
+    get_store().inc(metric_key(name, labels), amount)
+
+
+def observe(name, labels, value):
+    """Добавляет наблюдение в гистограмму name.
+
+    В файле увеличивается одна корзина, накопленные значения считаются
+    при выдаче.
+    """
+    bucket = next(
+        (str(le) for le in settings.METRICS_BUCKETS if value <= le), '+Inf'
+    )
+    inc(f'{name}_bucket', {**labels, 'le': bucket})
+    inc(f'{name}_sum', labels, value)
+    inc(f'{name}_count', labels)
+
+
+def collect():
+    """Значения всех процессов: {(имя, метки): значение}."""
+    totals = defaultdict(float)
+    for name, labels, value in read_directory(settings.METRICS_DIR):
+        totals[name, labels] += value
+    return totals
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def format_sample(name, labels, value):
+    if labels:
+        pairs = ','.join(f'{key}="{escape(val)}"' for key, val in labels)
+        name = f'{name}{{{pairs}}}'
+    if float(value).is_integer():
+        value = int(value)
+    return f'{name} {value!r}'
+
+
+def histogram_lines(name, samples):
+    buckets = [str(le) for le in settings.METRICS_BUCKETS] + ['+Inf']
+    series = defaultdict(dict)
+    for (sample_name, labels), value in samples.items():
+        if sample_name == f'{name}_bucket':
+            labels = dict(labels)
+            le = labels.pop('le')
+            series[tuple(sorted(labels.items()))][le] = value
+    for labels in sorted(series):
+        cumulative = 0
+        for le in buckets:
+            cumulative += series[labels].get(le, 0)
+            yield format_sample(
+                f'{name}_bucket', labels + (('le', le),), cumulative
+            )
+        for suffix in ('_sum', '_count'):
+            yield format_sample(
+                name + suffix, labels, samples.get((name + suffix, labels), 0)
+            )
+
+
+def process_gauges():
+    """Метрики, которые считаются в момент выдачи.
+
+    Импорт внутри: модуль загружается бэкендом кэша, иногда раньше
+    моделей.
+    """
+    from jobs.queue import queue_stats
+
+    stats = queue_stats()
+    oldest_age = stats.pop('oldest_age')
+    yield 'yatube_jobs', 'gauge', 'Задачи в очереди по состояниям.', [
+        ((('status', status),), count) for status, count in stats.items()
+    ]
+    yield (
+        'yatube_jobs_oldest_age_seconds',
+        'gauge',
+        'Возраст самой старой готовой задачи.',
+        [((), oldest_age)],
+    )
+
+
+def exposition():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    samples = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            lines.extend(histogram_lines(name, samples))
+            continue
+        lines.extend(
+            format_sample(name, labels, value)
+            for (sample_name, labels), value in sorted(samples.items())
+            if sample_name == name
+        )
+    for name, kind, help_text, values in process_gauges():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(
+            format_sample(name, labels, value) for labels, value in values
+        )
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Время ответа, статус, число запросов к БД и чтений кэша по view.
+
+    Стоит первым в MIDDLEWARE. Запросы к БД и обращения к кэшу
+    копятся в памяти потока и пишутся в файл один раз за запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.counts = counts = {'queries': 0, 'hit': 0, 'miss': 0}
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.counts = None
+        elapsed = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        inc(
+            'yatube_http_requests_total',
+            {'view': view, 'status': str(response.status_code)}
+        )
+        observe(
+            'yatube_http_request_duration_seconds', {'view': view}, elapsed
+        )
+        if counts['queries']:
+            inc('yatube_db_queries_total', {'view': view}, counts['queries'])
+        for result in ('hit', 'miss'):
+            if counts[result]:
+                inc(
+                    'yatube_cache_requests_total',
+                    {'view': view, 'result': result},
+                    counts[result]
+                )
+        return response
+
+
+def current_query_count():
+    """Число запросов к БД в текущем запросе или None вне запроса."""
+    counts = getattr(_local, 'counts', None)
+    return counts['queries'] if counts is not None else None
+
+
+def count_query(execute, sql, params, many, context):
+    counts = getattr(_local, 'counts', None)
+    if counts is not None:
+        counts['queries'] += 1
+    return execute(sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    """Ставит обёртку на соединение; подключается к connection_created.
+
+    Как и обёртки slowqueries и querystats, стоит постоянно: вне
+    запроса она ничего не считает.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def record_cache_read(result, reads=1):
+    counts = getattr(_local, 'counts', None)
+    if counts is not None:
+        counts[result] += reads
+    else:
+        inc(
+            'yatube_cache_requests_total',
+            {'view': 'none', 'result': result},
+            reads
+        )
+
+
+class MeteredCacheMixin:
+    """Считает попадания и промахи чтений кэша.
+
+    get_many базового класса читает ключи через get, поэтому отдельно
+    не считается.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        if value is MISSING:
+            record_cache_read('miss')
+            return default
+        record_cache_read('hit')
+        return value
+
+
+class MeteredLocMemCache(MeteredCacheMixin, LocMemCache):
+    pass
+
+
+def record_save(sender, created, **kwargs):
+    inc('yatube_model_writes_total', {
+        'model': sender._meta.label_lower,
+        'action': 'create' if created else 'update',
+    })
+
+
+def record_delete(sender, **kwargs):
+    inc('yatube_model_writes_total', {
+        'model': sender._meta.label_lower,
+        'action': 'delete',
+    })
+
+
+def connect_model_signals():
+    """Подключает счётчик записей к моделям из METRICS_MODELS.
+
+    Массовые bulk_create и update сигналов не шлют и не считаются.
+    """
+    for label in settings.METRICS_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(
+            record_save, sender=model, dispatch_uid=f'metrics_save_{label}'
+        )
+        post_delete.connect(
+            record_delete, sender=model, dispatch_uid=f'metrics_delete_{label}'
+        )
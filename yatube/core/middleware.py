@@ -0,0 +1,128 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from core.compression import COMPRESSORS, compress_sequence, compress_string
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=60'
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        if encoding:
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Если клиент принимает br или gzip и рядом лежит сжатая копия,
+    отдаёт её. Файлы с хешем в имени кэшируются клиентом навсегда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and settings.STATIC_ROOT
+            and request.path_info.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(
+                request, request.path_info[len(settings.STATIC_URL):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        encodings = accepted_encodings(request)
+        encoding = None
+        for candidate, suffix in STATIC_ENCODINGS:
+            if candidate in encodings and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if is_hashed and is_hashed(name)
+            else REVALIDATE_CACHE_CONTROL
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает HTML и JSON ответы brotli или gzip.
+
+    Сжимаются только ответы с типом из COMPRESSION_CONTENT_TYPES и
+    длиннее COMPRESSION_MIN_SIZE; потоковые ответы сжимаются по частям.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = accepted_encodings(request)
+        encoding = next((
+            encoding for encoding in settings.COMPRESSION_LEVELS
+            if encoding in encodings and encoding in COMPRESSORS
+        ), None)
+        if encoding is None:
+            return response
+        level = settings.COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding, level
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress_string(response.content, encoding, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
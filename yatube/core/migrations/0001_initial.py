@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32, unique=True, verbose_name='Отпечаток')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='View')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('calls', models.BigIntegerField(default=0, verbose_name='Вызовов')),
+                ('total_time', models.FloatField(default=0, verbose_name='Всего, с')),
+                ('max_time', models.FloatField(default=0, verbose_name='Максимум, с')),
+                ('rows', models.BigIntegerField(default=0, verbose_name='Строк')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Статистика запроса',
+                'verbose_name_plural': 'Статистика запросов',
+                'ordering': ('-total_time',),
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True, verbose_name='Ключ')),
+                ('tat', models.FloatField(verbose_name='Время следующего запроса')),
+            ],
+            options={
+                'verbose_name': 'Бакет ограничителя',
+                'verbose_name_plural': 'Бакеты ограничителя',
+            },
+        ),
+    ]
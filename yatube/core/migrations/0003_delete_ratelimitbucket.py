@@ -0,0 +1,16 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='RateLimitBucket',
+        ),
+    ]
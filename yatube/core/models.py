@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class QueryStat(models.Model):
+    """Сводка запросов одного отпечатка SQL в одном view.
+
+    Таблицу перезаписывает core.querystats.merge_query_stats.
+    """
+    fingerprint = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='Отпечаток'
+    )
+    view = models.CharField(max_length=200, blank=True, verbose_name='View')
+    sql = models.TextField(verbose_name='SQL')
+    calls = models.BigIntegerField(default=0, verbose_name='Вызовов')
+    total_time = models.FloatField(default=0, verbose_name='Всего, с')
+    max_time = models.FloatField(default=0, verbose_name='Максимум, с')
+    rows = models.BigIntegerField(default=0, verbose_name='Строк')
+    updated = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        ordering = ('-total_time',)
+        verbose_name = 'Статистика запроса'
+        verbose_name_plural = 'Статистика запросов'
+
+    def __str__(self):
+        return self.sql[:100]
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0
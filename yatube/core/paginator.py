@@ -0,0 +1,95 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+COUNT_GENERATION_KEY = 'paginator:count_generation'
+ARCHIVE_COUNT_GENERATION_KEY = 'paginator:archive_count_generation'
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который для полного списка не делает COUNT(*).
+
+    Без фильтров число строк оценивается по максимальному первичному
+    ключу: это один поиск по индексу. Удалённые строки завышают оценку,
+    поэтому последние страницы могут оказаться пустыми.
+    """
+
+    @cached_property
+    def count(self):
+        query_set = self.object_list
+        if query_set.query.where:
+            return super().count
+        return query_set.aggregate(estimate=Max('pk'))['estimate'] or 0
+
+
+def invalidate_counts(generation_key=COUNT_GENERATION_KEY):
+    """Сбрасывает все запомненные количества строк одного поколения."""
+    try:
+        cache.incr(generation_key)
+    except ValueError:
+        cache.set(generation_key, 1, None)
+
+
+def cached_count(
+    query_set, timeout=None, generation_key=COUNT_GENERATION_KEY
+):
+    """COUNT(*) запроса, запомненный в кэше по тексту SQL.
+
+    Значение живёт timeout секунд (по умолчанию PAGINATOR_COUNT_TIMEOUT)
+    или до вызова invalidate_counts() с тем же generation_key.
+    """
+    try:
+        sql = str(query_set.query)
+    except EmptyResultSet:
+        return 0
+    generation = cache.get(generation_key, 0)
+    key = 'paginator:count:{}:{}:{}'.format(
+        generation_key, generation, md5(sql.encode()).hexdigest()
+    )
+    count = cache.get(key)
+    if count is None:
+        count = query_set.count()
+        cache.set(
+            key,
+            count,
+            settings.PAGINATOR_COUNT_TIMEOUT if timeout is None else timeout
+        )
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который не пересчитывает строки для каждого читателя."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return cached_count(self.object_list)
+        return super().count
+
+
+def page_window(page, neighbors=None):
+    """Номера страниц вокруг текущей, первая и последняя.
+
+    Пропуски обозначены None: [1, None, 4, 5, 6, 7, 8, None, 50].
+    Пропуск в одну страницу заменяется самой страницей.
+    """
+    if neighbors is None:
+        neighbors = settings.PAGINATOR_NEIGHBORS
+    last = page.paginator.num_pages
+    start = max(page.number - neighbors, 1)
+    end = min(page.number + neighbors, last)
+    if start <= 3:
+        start = 1
+    if end >= last - 2:
+        end = last
+    window = list(range(start, end + 1))
+    if start > 1:
+        window = [1, None, *window]
+    if end < last:
+        window = [*window, None, last]
+    return window
@@ -0,0 +1,183 @@
+"""Статистика запросов по отпечаткам, как pg_stat_statements.
+
+SQL нормализуется в отпечаток: значения и литералы заменяются на ?,
+списки IN и VALUES сворачиваются. Для каждого отпечатка и view процесс
+копит число вызовов, суммарное и максимальное время и число строк в
+своём файле в QUERY_STATS_DIR (формат файлов метрик). merge_query_stats
+складывает файлы всех процессов в таблицу QueryStat для админки,
+reset_query_stats обнуляет статистику.
+"""
+import hashlib
+import os
+import re
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+from core import metrics
+from core.models import QueryStat
+from core.slowqueries import current_view, redact
+
+IN_LIST_RE = re.compile(r'\(\?(?:\s*,\s*\?)+\)')
+VALUES_LIST_RE = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+_checked = {'at': 0.0}
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """Отпечаток SQL: без значений, со свёрнутыми списками."""
+    sql = WHITESPACE_RE.sub(' ', redact(sql)).strip()
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return VALUES_LIST_RE.sub('(...)', sql)
+
+
+def fingerprint(view, sql):
+    return hashlib.md5(f'{view}\n{sql}'.encode()).hexdigest()
+
+
+def get_store():
+    """Файл статистики процесса.
+
+    Раз в QUERY_STATS_CHECK_INTERVAL секунд проверяется, не удалили ли
+    его при сбросе; тогда открывается новый.
+    """
+    directory = settings.QUERY_STATS_DIR
+    now = time.monotonic()
+    if now - _checked['at'] >= settings.QUERY_STATS_CHECK_INTERVAL:
+        _checked['at'] = now
+        store = metrics.get_store(directory)
+        if not os.path.exists(store.path):
+            metrics.forget_store(directory)
+    return metrics.get_store(directory)
+
+
+class RowCountingCursor:
+    """Курсор БД, считающий выбранные строки последнего запроса."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.labels = None
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.add_rows(1)
+            yield row
+
+    def add_rows(self, count):
+        if count and self.labels is not None:
+            get_store().inc(metrics.metric_key('rows', self.labels), count)
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.add_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self.cursor.fetchmany(*args, **kwargs)
+        self.add_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.add_rows(len(rows))
+        return rows
+
+
+def record_queries(execute, sql, params, many, context):
+    """Обёртка выполнения запросов, копящая статистику отпечатков.
+
+    Строки SELECT считаются по мере чтения из курсора, для изменений
+    берётся rowcount.
+    """
+    if not settings.QUERY_STATS_ENABLED:
+        return execute(sql, params, many, context)
+    wrapper = context['cursor']
+    if not isinstance(wrapper.cursor, RowCountingCursor):
+        wrapper.cursor = RowCountingCursor(wrapper.cursor)
+    cursor = wrapper.cursor
+    labels = {'view': current_view() or '', 'sql': normalize(sql)}
+    cursor.labels = None
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        store = get_store()
+        store.inc(metrics.metric_key('calls', labels))
+        store.inc(metrics.metric_key('seconds', labels), elapsed)
+        store.max(metrics.metric_key('max_seconds', labels), elapsed)
+        if labels['sql'].startswith('SELECT'):
+            cursor.labels = labels
+        elif cursor.rowcount > 0:
+            store.inc(metrics.metric_key('rows', labels), cursor.rowcount)
+
+
+def install(sender, connection, **kwargs):
+    """Ставит обёртку на соединение; подключается к connection_created."""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def collect_stats():
+    """Статистика всех процессов по (view, отпечаток)."""
+    stats = {}
+    for name, labels, value in metrics.read_directory(
+        settings.QUERY_STATS_DIR
+    ):
+        labels = dict(labels)
+        key = (labels['view'], labels['sql'])
+        entry = stats.setdefault(key, {
+            'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0
+        })
+        if name == 'max_seconds':
+            entry[name] = max(entry[name], value)
+        else:
+            entry[name] += value
+    return stats
+
+
+def merge_query_stats():
+    """Перезаписывает QueryStat свежей сводкой по всем процессам."""
+    stats = collect_stats()
+    with transaction.atomic():
+        QueryStat.objects.all().delete()
+        QueryStat.objects.bulk_create(
+            [
+                QueryStat(
+                    fingerprint=fingerprint(view, sql),
+                    view=view,
+                    sql=sql,
+                    calls=entry['calls'],
+                    total_time=entry['seconds'],
+                    max_time=entry['max_seconds'],
+                    rows=entry['rows'],
+                )
+                for (view, sql), entry in stats.items()
+            ],
+            batch_size=500
+        )
+    return len(stats)
+
+
+def reset_query_stats():
+    """Удаляет файлы статистики всех процессов и таблицу QueryStat.
+
+    Процессы заметят удаление своего файла в течение
+    QUERY_STATS_CHECK_INTERVAL; запросы этого окна пропадут.
+    """
+    directory = settings.QUERY_STATS_DIR
+    if os.path.isdir(directory):
+        for file_name in os.listdir(directory):
+            if file_name.endswith('.db'):
+                os.remove(os.path.join(directory, file_name))
+    metrics.forget_store(directory)
+    _checked['at'] = 0.0
+    QueryStat.objects.all().delete()
@@ -0,0 +1,102 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.metrics import collect, inc
+from core.views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+THROTTLED_METRIC = 'yatube_ratelimit_throttled_total'
+LIMITS = set()
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): число запросов за период в секундах."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_key(request, key):
+    """Чей бакет: пользователя, IP или пользователя, а для гостей IP."""
+    if key != 'ip' and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(bucket, rate):
+    """Забирает токен из бакета; возвращает 0 или секунды до нового.
+
+    Скользящее окно: запросы считаются в окнах длиной в период, а
+    прошлое окно учитывается с весом оставшейся в нём доли времени.
+    Счётчик окна меняется атомарными add и incr кэша
+    RATELIMIT_CACHE_ALIAS, так что база на каждый запрос не трогается.
+    Лимит общий для процессов, только если общий сам кэш: в LocMemCache
+    каждый процесс считает свои запросы (предупреждает core.W001).
+    Отклонённый запрос свой incr откатывает и окно не занимает.
+    """
+    count, period = parse_rate(rate)
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+    key = f'{bucket}:{window}'
+    cache.add(key, 0, 2 * period)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, 2 * period)
+        current = 1
+    previous = cache.get(f'{bucket}:{window - 1}', 0)
+    weight = 1 - elapsed / period
+    if previous * weight + current <= count:
+        return 0
+    cache.decr(key)
+    current -= 1
+    if current >= count or not previous:
+        wait = period - elapsed
+    else:
+        wait = (
+            period * (previous - count + current + 1) / previous - elapsed
+        )
+    return max(math.ceil(wait), 1)
+
+
+def count_throttled(name):
+    inc(THROTTLED_METRIC, {'limit': name})
+
+
+def throttled_counts():
+    """Сколько запросов отклонено, по именам лимитов, во всех процессах."""
+    counts = dict.fromkeys(LIMITS, 0)
+    for (name, labels), value in collect().items():
+        if name == THROTTLED_METRIC:
+            counts[dict(labels)['limit']] = int(value)
+    return counts
+
+
+def ratelimit(name, rate, key='user_or_ip', methods=('POST',)):
+    """Ограничивает частоту запросов к view.
+
+    rate — '10/m': десять запросов в минуту на бакет, бакет выбирается
+    по key ('user', 'ip' или 'user_or_ip'). Запросы сверх лимита
+    получают 429 с Retry-After. Проверяются только методы из methods.
+    """
+    LIMITS.add(name)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                bucket = 'ratelimit:{}:{}'.format(
+                    name, client_key(request, key)
+                )
+                retry_after = take_token(bucket, rate)
+                if retry_after:
+                    count_throttled(name)
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,52 @@
+import logging
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from core.accesslog import AccessLogHandler
+from posts.counters import view_counter
+
+
+class TestRunner(DiscoverRunner):
+    """Прогон тестов с метриками и журналом запросов во временном каталоге.
+
+    Каталог создаётся на время прогона и удаляется после него, так что
+    тесты не пишут в RUNTIME_DIR проекта. Буфер просмотров сбрасывается
+    до удаления тестовой базы, иначе его запишет в рабочую базу atexit.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.runtime_dir = tempfile.mkdtemp(prefix='yatube-test-')
+        metrics_dir = os.path.join(self.runtime_dir, 'metrics')
+        access_log_file = os.path.join(self.runtime_dir, 'access.log')
+        self.runtime_settings = override_settings(
+            RUNTIME_DIR=self.runtime_dir,
+            METRICS_DIR=metrics_dir,
+            QUERY_STATS_DIR=os.path.join(metrics_dir, 'queries'),
+            ACCESS_LOG_FILE=access_log_file,
+        )
+        self.runtime_settings.enable()
+        self.access_log_handlers = [
+            handler for handler in logging.getLogger('core.accesslog').handlers
+            if isinstance(handler, AccessLogHandler)
+        ]
+        for handler in self.access_log_handlers:
+            handler.filename = access_log_file
+
+    def teardown_databases(self, old_config, **kwargs):
+        view_counter.flush()
+        super().teardown_databases(old_config, **kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        for handler in self.access_log_handlers:
+            handler.close()
+        self.runtime_settings.disable()
+        for handler in self.access_log_handlers:
+            handler.filename = settings.ACCESS_LOG_FILE
+        shutil.rmtree(self.runtime_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
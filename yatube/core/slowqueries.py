@@ -0,0 +1,193 @@
+"""Журнал медленных запросов к базе данных.
+
+Обёртка выполнения запросов ставится на каждое соединение и засекает
+время каждого запроса. Запрос дольше SLOW_QUERY_THRESHOLD секунд
+пишется в лог core.slowqueries вместе с view, строкой шаблона и местом
+в коде проекта, откуда он выполнен, текстом SQL без значений и планом
+запроса. Из медленных запросов в журнал попадает доля
+SLOW_QUERY_SAMPLE_RATE и не больше SLOW_QUERY_MAX_PER_MINUTE в минуту
+на процесс; пропущенные подсчитываются в следующей записи. Запросы,
+завершившиеся ошибкой, не пишутся: после ошибки в транзакции EXPLAIN
+выполнить нельзя, а ошибку и так увидит вызывающий код.
+"""
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r'(?<![\w."])-?\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s')
+# Обёртки на execute_wrappers соединения; их кадры не место вызова.
+WRAPPER_MODULES = {__name__, 'core.metrics', 'core.querystats'}
+
+_local = threading.local()
+_window_lock = threading.Lock()
+_window = {'start': 0.0, 'logged': 0, 'suppressed': 0}
+
+
+class SlowQueryMiddleware:
+    """Запоминает текущий запрос, чтобы журнал знал имя view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.request = request
+        try:
+            return self.get_response(request)
+        finally:
+            _local.request = None
+
+
+def current_view():
+    request = getattr(_local, 'request', None)
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+def redact(sql):
+    """SQL без значений: параметры и литералы заменены на ?."""
+    sql = STRING_LITERAL_RE.sub('?', sql)
+    sql = NUMBER_LITERAL_RE.sub('?', sql)
+    return PLACEHOLDER_RE.sub('?', sql)
+
+
+def project_frame(frame):
+    """Кадр кода проекта, кроме обёрток выполнения запросов."""
+    path = os.path.abspath(frame.f_code.co_filename)
+    return (
+        path.startswith(settings.BASE_DIR + os.sep)
+        and frame.f_globals.get('__name__') not in WRAPPER_MODULES
+        and 'site-packages' not in path
+    )
+
+
+def call_sites():
+    """Строка шаблона и место в коде проекта, откуда выполнен запрос.
+
+    Шаблон Django узнаётся по узлу в self кадра рендера, шаблон Jinja2 —
+    по служебной переменной его скомпилированного модуля.
+    """
+    template_site = python_site = None
+    frame = sys._getframe(1)
+    while frame and not (template_site and python_site):
+        code = frame.f_code
+        if template_site is None:
+            node = frame.f_locals.get('self')
+            jinja_template = frame.f_globals.get('__jinja_template__')
+            if isinstance(node, Node) and getattr(node, 'token', None):
+                template_site = '{}:{}'.format(
+                    node.origin.template_name, node.token.lineno
+                )
+            elif jinja_template is not None:
+                template_site = '{}:{}'.format(
+                    jinja_template.name,
+                    jinja_template.get_corresponding_lineno(frame.f_lineno)
+                )
+        if python_site is None and project_frame(frame):
+            python_site = '{}:{} in {}'.format(
+                os.path.relpath(code.co_filename, settings.BASE_DIR),
+                frame.f_lineno,
+                code.co_name
+            )
+        frame = frame.f_back
+    return template_site, python_site
+
+
+def query_plan(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = connection.ops.explain_query_prefix()
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except DatabaseError:
+        return ''
+    finally:
+        _local.explaining = False
+
+
+def should_log():
+    """Выборка и ограничение частоты записей в пределах процесса.
+
+    Возвращает число пропущенных с прошлой записи или None, если эту
+    запись надо пропустить.
+    """
+    if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+        return None
+    now = time.monotonic()
+    with _window_lock:
+        if now - _window['start'] >= 60:
+            _window.update(start=now, logged=0)
+        if _window['logged'] >= settings.SLOW_QUERY_MAX_PER_MINUTE:
+            _window['suppressed'] += 1
+            return None
+        _window['logged'] += 1
+        suppressed, _window['suppressed'] = _window['suppressed'], 0
+    return suppressed
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if threshold is None or getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = time.perf_counter() - start
+    if elapsed >= threshold:
+        suppressed = should_log()
+        if suppressed is not None:
+            try:
+                log_query(
+                    context['connection'], sql, params, many, elapsed,
+                    suppressed
+                )
+            except Exception:
+                logger.exception('Не удалось записать медленный запрос')
+    return result
+
+
+def log_query(connection, sql, params, many, elapsed, suppressed):
+    template_site, python_site = call_sites()
+    record = {
+        'duration_ms': round(elapsed * 1000, 1),
+        'view': current_view(),
+        'template': template_site,
+        'call_site': python_site,
+        'sql': redact(sql),
+        'plan': '' if many else query_plan(connection, sql, params),
+        'suppressed': suppressed,
+    }
+    logger.warning(
+        'Медленный запрос %.1f мс, view %s, шаблон %s, код %s'
+        '%s\n%s\n%s',
+        record['duration_ms'],
+        record['view'] or '-',
+        record['template'] or '-',
+        record['call_site'] or '-',
+        f' (пропущено {suppressed})' if suppressed else '',
+        record['sql'],
+        record['plan'],
+        extra={'slow_query': record},
+    )
+
+
+def install(sender, connection, **kwargs):
+    """Ставит обёртку на соединение; подключается к connection_created."""
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_queries)
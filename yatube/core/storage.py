@@ -0,0 +1,76 @@
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml', '.html',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def gzip_compress(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(
+        fileobj=buffer, mode='wb', compresslevel=9, mtime=0
+    ) as gzip_file:
+        gzip_file.write(data)
+    return buffer.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями.
+
+    При collectstatic рядом с каждым текстовым файлом кладутся .gz и,
+    если установлен brotli, .br; их отдаёт StaticFilesMiddleware.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip_compress(data))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+    def stored_name(self, name):
+        # До первого collectstatic манифеста нет: отдаём исходное имя.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    @cached_property
+    def hashed_names(self):
+        return set(self.hashed_files.values())
+
+    def is_hashed(self, name):
+        return name in self.hashed_names
@@ -0,0 +1,10 @@
+from django import template
+
+from core.paginator import page_window as build_page_window
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj):
+    return build_page_window(page_obj)
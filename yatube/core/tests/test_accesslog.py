@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.accesslog import AccessLogHandler, JsonFormatter
+
+User = get_user_model()
+
+
+class AccessLogHandlerTest(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.filename = os.path.join(directory, 'access.log')
+        self.logger = logging.getLogger('core.tests.accesslog')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def make_handler(self, **kwargs):
+        handler = AccessLogHandler(
+            self.filename, flush_interval=0.01, **kwargs
+        )
+        handler.setFormatter(JsonFormatter())
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def read(self, filename=None):
+        with open(filename or self.filename, encoding='utf-8') as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_json_lines(self):
+        """Записи пишутся в файл строками JSON с полями access."""
+        handler = self.make_handler()
+        for number in range(3):
+            self.logger.info('запрос', extra={'access': {'status': number}})
+        handler.flush()
+        lines = self.read()
+        self.assertEqual([line['status'] for line in lines], [0, 1, 2])
+        self.assertTrue(lines[0]['time'].endswith('Z'))
+
+    def test_drops_when_queue_full(self):
+        """Переполненная очередь не блокирует, отброшенные считаются."""
+        handler = self.make_handler(queue_size=1)
+        handler._pid = os.getpid()
+        for number in range(3):
+            self.logger.info('запрос', extra={'access': {'status': number}})
+        self.assertEqual(handler.dropped, 2)
+        handler._pid = None
+        handler.start_writer()
+        handler.flush()
+        first, last = self.read()
+        self.assertEqual(first['status'], 0)
+        self.assertEqual(last, {'dropped': 2})
+
+    def test_rotation(self):
+        """Файл ротируется по размеру, лишние копии удаляются."""
+        handler = self.make_handler(max_bytes=300, backup_count=2)
+        for number in range(30):
+            self.logger.info('запрос', extra={'access': {'n': number}})
+            handler.flush()
+        self.assertTrue(os.path.exists(f'{self.filename}.2'))
+        self.assertFalse(os.path.exists(f'{self.filename}.3'))
+        for name in (self.filename, f'{self.filename}.1'):
+            with self.subTest(name=name):
+                self.assertLessEqual(os.path.getsize(name), 300)
+        self.assertEqual(self.read()[-1]['n'], 29)
+
+
+class AccessLogMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+
+    def test_request_fields(self):
+        """Запись содержит view, пользователя, статус, размер и запросы."""
+        self.client.force_login(self.user)
+        with self.assertLogs('core.accesslog', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        (record,) = logs.records
+        access = record.access
+        self.assertEqual(access['view'], 'posts:index')
+        self.assertEqual(access['user_id'], self.user.pk)
+        self.assertEqual(access['status'], 200)
+        self.assertEqual(access['bytes'], len(response.content))
+        self.assertGreater(access['queries'], 0)
+        self.assertGreaterEqual(access['duration_ms'], 0)
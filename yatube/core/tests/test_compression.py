@@ -0,0 +1,57 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.compression import brotli
+from core.middleware import CompressionMiddleware
+
+PAGE = '<p>Тестовый пост</p>' * 100
+
+
+@override_settings(COMPRESSION_LEVELS={'br': 4, 'gzip': 6})
+class CompressionMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, response, encoding='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(
+            self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding)
+        )
+
+    def test_gzip_html(self):
+        """HTML сжимается gzip и помечается Vary: Accept-Encoding."""
+        response = self.get(HttpResponse(PAGE))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content).decode(), PAGE)
+
+    def test_brotli_preferred(self):
+        """При поддержке клиентом выбирается brotli."""
+        if brotli is None:
+            self.skipTest('brotli не установлен')
+        response = self.get(HttpResponse(PAGE), encoding='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content).decode(), PAGE)
+
+    def test_short_and_binary_not_compressed(self):
+        """Короткие ответы и типы вне списка не сжимаются."""
+        responses = (
+            HttpResponse('<p>коротко</p>'),
+            HttpResponse(PAGE, content_type='image/png'),
+        )
+        for response in responses:
+            with self.subTest(content_type=response['Content-Type']):
+                response = self.get(response)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_compressed_incrementally(self):
+        """Потоковый ответ сжимается по частям."""
+        chunks = [PAGE.encode()] * 3
+        response = self.get(StreamingHttpResponse(iter(chunks)))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 2)
+        self.assertEqual(
+            gzip.decompress(b''.join(parts)), b''.join(chunks)
+        )
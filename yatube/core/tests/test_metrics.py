@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core.metrics import (
+    MmapStore, collect, count_query, exposition, metric_key
+)
+from core.querystats import record_queries
+from core.slowqueries import log_slow_queries
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        metrics_settings = override_settings(METRICS_DIR=self.metrics_dir)
+        metrics_settings.enable()
+        self.addCleanup(metrics_settings.disable)
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def test_store_merges_processes(self):
+        """Значения из файлов разных процессов складываются."""
+        key = metric_key('yatube_db_queries_total', {'view': 'posts:index'})
+        first = MmapStore(f'{self.metrics_dir}/1.db')
+        second = MmapStore(f'{self.metrics_dir}/2.db')
+        first.inc(key, 2)
+        second.inc(key, 3)
+        for number in range(2000):
+            second.inc(metric_key('big', {'n': str(number)}))
+        first.close()
+        reopened = MmapStore(f'{self.metrics_dir}/1.db')
+        reopened.inc(key)
+        totals = collect()
+        self.assertEqual(
+            totals['yatube_db_queries_total', (('view', 'posts:index'),)], 6
+        )
+        self.assertEqual(totals['big', (('n', '1999'),)], 1)
+
+    def test_tests_use_temporary_runtime_dir(self):
+        """Прогон тестов не пишет метрики и журнал в каталог проекта."""
+        self.assertNotEqual(
+            settings.RUNTIME_DIR, os.path.join(settings.BASE_DIR, 'var')
+        )
+        self.assertTrue(
+            settings.ACCESS_LOG_FILE.startswith(settings.RUNTIME_DIR)
+        )
+
+    def test_endpoint_protected(self):
+        """Метрики видят персонал и владелец токена."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            403
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+            ).status_code,
+            200
+        )
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_request_metrics(self):
+        """Запрос ленты попадает в гистограмму, счётчики БД, кэша и записей."""
+        Post.objects.create(author=self.author, text='Текст')
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = exposition()
+        expected = (
+            'yatube_http_requests_total{status="200",view="posts:index"} 2',
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2',
+            'yatube_http_request_duration_seconds_count'
+            '{view="posts:index"} 2',
+            'yatube_cache_requests_total{result="hit",view="posts:index"}',
+            'yatube_cache_requests_total{result="miss",view="posts:index"}',
+            'yatube_db_queries_total{view="posts:index"}',
+            'yatube_model_writes_total{action="create",model="posts.post"} 1',
+            'yatube_jobs{status="queued"}',
+        )
+        for line in expected:
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+
+class QueryWrappersTest(TransactionTestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        metrics_settings = override_settings(METRICS_DIR=self.metrics_dir)
+        metrics_settings.enable()
+        self.addCleanup(metrics_settings.disable)
+        cache.clear()
+
+    def test_wrappers_survive_reconnect(self):
+        """Обёртки стоят по одной, даже если соединение открыл запрос.
+
+        Поток получает своё соединение, и первое подключение случается
+        уже внутри запроса.
+        """
+        wrappers = []
+
+        def requests():
+            client = Client()
+            client.get(reverse('posts:index'))
+            connection.close()
+            client.get(reverse('posts:index'))
+            wrappers.extend(connection.execute_wrappers)
+            connection.close()
+
+        thread = threading.Thread(target=requests)
+        thread.start()
+        thread.join()
+        self.assertCountEqual(
+            wrappers, [count_query, log_slow_queries, record_queries]
+        )
+        queries = collect()['yatube_db_queries_total', (
+            ('view', 'posts:index'),
+        )]
+        self.assertGreater(queries, 0)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TestCase
+
+from core.paginator import cached_count, invalidate_counts, page_window
+
+User = get_user_model()
+
+
+class PageWindowTest(TestCase):
+    def window(self, number, num_pages, neighbors=2):
+        page = Paginator(range(num_pages), 1).page(number)
+        return page_window(page, neighbors)
+
+    def test_window(self):
+        """Окно страниц: первая, последняя, соседи текущей и пропуски."""
+        cases = (
+            (1, 1, [1]),
+            (3, 5, [1, 2, 3, 4, 5]),
+            (1, 50, [1, 2, 3, None, 50]),
+            (25, 50, [1, None, 23, 24, 25, 26, 27, None, 50]),
+            (50, 50, [1, None, 48, 49, 50]),
+            (5, 50, [1, 2, 3, 4, 5, 6, 7, None, 50]),
+        )
+        for number, num_pages, expected in cases:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(self.window(number, num_pages), expected)
+
+    def test_window_size_does_not_grow(self):
+        """Число ссылок не зависит от числа страниц."""
+        self.assertEqual(
+            len(self.window(2500, 5000)), len(self.window(25, 50))
+        )
+
+
+class CachedCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='first')
+
+    def test_count_memoized(self):
+        """Количество считается один раз до сброса."""
+        users = User.objects.all()
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_count(users), 1)
+            self.assertEqual(cached_count(users), 1)
+        User.objects.create_user(username='second')
+        self.assertEqual(cached_count(users), 1)
+        invalidate_counts()
+        self.assertEqual(cached_count(users), 2)
+
+    def test_empty_query_set(self):
+        """Пустой queryset не ходит в БД."""
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count(User.objects.none()), 0)
@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import QueryStat
+from core.querystats import merge_query_stats, normalize, reset_query_stats
+from posts.models import Post
+
+User = get_user_model()
+
+
+class QueryStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            [Post(author=cls.author, text=f'Пост {i}') for i in range(3)]
+        )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        stats_settings = override_settings(QUERY_STATS_DIR=directory)
+        stats_settings.enable()
+        self.addCleanup(stats_settings.disable)
+        reset_query_stats()
+        cache.clear()
+
+    def test_normalize(self):
+        """Значения скрыты, списки свёрнуты, пробелы схлопнуты."""
+        cases = (
+            (
+                'SELECT a FROM t WHERE id IN (%s, %s, %s) AND b = %s',
+                'SELECT a FROM t WHERE id IN (...) AND b = ?',
+            ),
+            (
+                "SELECT  a\n FROM t WHERE c = 'x' LIMIT 21",
+                'SELECT a FROM t WHERE c = ? LIMIT ?',
+            ),
+            (
+                'INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)',
+                'INSERT INTO t (a, b) VALUES (...)',
+            ),
+        )
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(normalize(sql), expected)
+
+    def test_calls_rows_and_times(self):
+        """Одинаковые запросы с разными значениями — один отпечаток."""
+        for pk in range(5):
+            list(Post.objects.filter(pk__gt=pk))
+        merge_query_stats()
+        stat = QueryStat.objects.get(
+            sql__startswith='SELECT', sql__contains='"posts_post"."id" > ?'
+        )
+        self.assertEqual(stat.view, '')
+        self.assertEqual(stat.calls, 5)
+        self.assertEqual(stat.rows, 3 + 2 + 1)
+        self.assertGreaterEqual(stat.total_time, stat.max_time)
+        self.assertGreater(stat.max_time, 0)
+
+    def test_view_attribution(self):
+        """Запросы ленты записываются на её view."""
+        self.client.get(reverse('posts:index'))
+        merge_query_stats()
+        self.assertTrue(
+            QueryStat.objects.filter(view='posts:index').exists()
+        )
+
+    def test_admin_and_reset(self):
+        """Админка показывает сводку, сброс её очищает."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        Post.objects.count()
+        url = reverse('admin:core_querystat_changelist')
+        response = self.client.get(url)
+        self.assertContains(response, 'COUNT(*)')
+        self.assertEqual(
+            self.client.get(reverse('admin:core_querystat_reset')).status_code,
+            405
+        )
+        self.client.post(reverse('admin:core_querystat_reset'))
+        self.assertFalse(QueryStat.objects.exists())
+        merge_query_stats()
+        self.assertFalse(
+            QueryStat.objects.filter(sql__contains='COUNT(*)').exists()
+        )
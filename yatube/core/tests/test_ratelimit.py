@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.checks import check_ratelimit_cache
+from core.metrics import MmapStore, metric_key
+from core.ratelimit import THROTTLED_METRIC, take_token, throttled_counts
+
+User = get_user_model()
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        metrics_settings = override_settings(METRICS_DIR=self.metrics_dir)
+        metrics_settings.enable()
+        self.addCleanup(metrics_settings.disable)
+        cache.clear()
+
+    def test_bucket_refills(self):
+        """Окно пропускает rate запросов, прошлое окно гаснет со временем."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.assertEqual(take_token('bucket', '3/m'), 0)
+            self.assertEqual(take_token('bucket', '3/m'), 20)
+        with mock.patch('core.ratelimit.time.time', return_value=1020.0):
+            self.assertEqual(take_token('bucket', '3/m'), 20)
+        with mock.patch('core.ratelimit.time.time', return_value=1040.0):
+            self.assertEqual(take_token('bucket', '3/m'), 0)
+            self.assertEqual(take_token('bucket', '3/m'), 20)
+
+    def test_bucket_skips_database(self):
+        """Счётчики живут в кэше: запрос под лимитом не пишет в базу."""
+        with self.assertNumQueries(0):
+            take_token('bucket', '3/m')
+
+    def test_shared_cache_required_in_production(self):
+        """check --deploy требует для лимитов общий кэш."""
+        warnings = check_ratelimit_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['core.W001'])
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        }}):
+            self.assertEqual(check_ratelimit_cache(None), [])
+
+    def test_stats_sum_all_processes(self):
+        """ratelimit_stats складывает отказы из файлов всех процессов."""
+        other = MmapStore(f'{self.metrics_dir}/other.db')
+        other.inc(metric_key(THROTTLED_METRIC, {'limit': 'login'}), 2)
+        other.close()
+        out = StringIO()
+        call_command('ratelimit_stats', stdout=out)
+        self.assertIn('login: 2', out.getvalue())
+
+    def test_follow_throttled_per_user(self):
+        """Лимит считается по пользователю и отвечает 429 с Retry-After."""
+        author = User.objects.create_user(username='author')
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        url = reverse('posts:profile_follow', args=[author.username])
+        for _ in range(60):
+            self.assertEqual(client.get(url).status_code, 302)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(throttled_counts()['follow'], 1)
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(other.get(url).status_code, 302)
+
+    def test_login_throttled_per_ip(self):
+        """Вход ограничен по IP, GET формы не ограничен."""
+        url = reverse('users:login')
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(10):
+            self.assertEqual(self.client.post(url, data).status_code, 200)
+        self.assertEqual(self.client.post(url, data).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, data, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
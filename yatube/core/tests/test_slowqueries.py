@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import slowqueries
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0)
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        slowqueries._window.update(start=0.0, logged=0, suppressed=0)
+
+    def records(self, logs):
+        return [record.slow_query for record in logs.records]
+
+    def test_redacted_sql_and_plan(self):
+        """В журнале нет значений параметров, но есть план запроса."""
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            Post.objects.filter(text='секрет', pk__gt=42).exists()
+        (record,) = self.records(logs)
+        self.assertNotIn('секрет', record['sql'])
+        self.assertNotIn('42', record['sql'])
+        self.assertIn('"posts_post"."text" = ?', record['sql'])
+        self.assertIn('posts_post', record['plan'])
+        self.assertEqual(
+            record['call_site'].split(':')[0],
+            'core/tests/test_slowqueries.py'
+        )
+
+    def test_view_and_template_attribution(self):
+        """Запросы страницы поста подписаны именем view и строкой шаблона."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine):
+                with self.settings(FEED_TEMPLATE_ENGINE=engine):
+                    with self.assertLogs('core.slowqueries') as logs:
+                        self.client.get(url)
+                records = self.records(logs)
+                self.assertEqual(
+                    {record['view'] for record in records},
+                    {'posts:post_detail'}
+                )
+                self.assertIn(
+                    'posts/post_detail.html',
+                    {
+                        (record['template'] or '').split(':')[0]
+                        for record in records
+                    }
+                )
+
+    def test_failed_query_not_logged(self):
+        """Запрос с ошибкой не пишется, ошибка доходит до вызывающего."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.slowqueries', 'WARNING'):
+                with self.assertRaises(DatabaseError):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT * FROM missing_table')
+
+    def test_logging_error_keeps_result(self):
+        """Сбой записи в журнал не ломает сам запрос."""
+        with mock.patch(
+            'core.slowqueries.call_sites', side_effect=RuntimeError
+        ):
+            with self.assertLogs('core.slowqueries', 'ERROR'):
+                self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(SLOW_QUERY_MAX_PER_MINUTE=2)
+    def test_rate_limit(self):
+        """Сверх лимита записи пропускаются и подсчитываются."""
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            for _ in range(5):
+                Post.objects.count()
+        self.assertEqual(len(logs.records), 2)
+        slowqueries._window['start'] = 0.0
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            Post.objects.count()
+        self.assertEqual(self.records(logs)[0]['suppressed'], 3)
+
+    @override_settings(SLOW_QUERY_SAMPLE_RATE=0)
+    def test_sampling(self):
+        """При нулевой доле выборки журнал пуст."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('core.slowqueries', 'WARNING'):
+                Post.objects.count()
+
+    def test_redact(self):
+        """Литералы в тексте SQL тоже скрываются."""
+        self.assertEqual(
+            slowqueries.redact(
+                "SELECT \"t1\".\"a\" FROM t1 WHERE b = 'x''y' AND c > 10 "
+                "AND d = %s"
+            ),
+            'SELECT "t1"."a" FROM t1 WHERE b = ? AND c > ? AND d = ?'
+        )
@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css_url = staticfiles_storage.url('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def test_hashed_name_in_templates(self):
+        """Шаблоны ссылаются на статику с хешем в имени."""
+        response = self.client.get('/about/tech/')
+        self.assertIn(self.css_url, response.content.decode())
+        self.assertNotEqual(self.css_url, '/static/css/bootstrap.min.css')
+
+    def test_precompressed_file_served(self):
+        """Отдаётся сжатая копия, которую принимает клиент."""
+        for encoding in ('br', 'gzip'):
+            with self.subTest(encoding=encoding):
+                response = self.client.get(
+                    self.css_url, HTTP_ACCEPT_ENCODING=encoding
+                )
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('immutable', response['Cache-Control'])
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_uncompressed_without_accept_encoding(self):
+        """Без Accept-Encoding файл отдаётся как есть."""
+        response = self.client.get(self.css_url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Type'], 'text/css')
@@ -0,0 +1,60 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.importtime import ImportTimer, TimedLoader
+from core.warmup import (
+    compile_templates, format_report, prime_caches, resolve_urls, warm_up
+)
+from posts.models import Post
+
+User = get_user_model()
+
+
+class WarmUpTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_steps(self):
+        """Шаблоны обоих движков собираются, пути разрешаются."""
+        self.assertGreater(compile_templates(), 0)
+        self.assertGreater(resolve_urls(), 0)
+
+    def test_prime_caches(self):
+        """После прогрева главная отдаётся из кэша без запросов к постам."""
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Прогретый пост')
+        prime_caches(pages=1)
+        post.delete()
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Прогретый пост'
+        )
+
+    def test_failed_step_does_not_stop_warm_up(self):
+        """Упавший шаг отмечается в отчёте, остальные выполняются."""
+        with self.settings(WARMUP_FEED_PAGES='много'):
+            with self.assertLogs('core.warmup', 'ERROR'):
+                report = warm_up()
+        results = {name: result for name, result, _ in report}
+        self.assertIsNone(results['caches'])
+        self.assertGreater(results['templates'], 0)
+        self.assertIn('ошибка', format_report(report))
+
+
+class ImportTimerTest(TestCase):
+    def test_records_imports(self):
+        """Время импорта записывается по модулю и пакету."""
+        sys.modules.pop('colorsys', None)
+        timer = ImportTimer().install()
+        try:
+            import colorsys
+        finally:
+            timer.uninstall()
+        self.assertIn('colorsys', timer.timings)
+        self.assertIn('colorsys', dict(timer.by_package()))
+        self.assertNotIsInstance(colorsys.__loader__, TimedLoader)
+        self.assertEqual(colorsys.__spec__.loader, colorsys.__loader__)
+        self.assertNotIn(timer, sys.meta_path)
@@ -1,4 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import exposition
 
 
 def page_not_found(request, exception):
@@ -15,3 +21,32 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request,
+        'core/429.html',
+        {'retry_after': retry_after},
+        status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return True
+    return request.user.is_staff
+
+
+def metrics(request):
+    """Метрики для Prometheus: по токену METRICS_TOKEN или персоналу."""
+    if not metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        exposition(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
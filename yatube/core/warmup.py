@@ -0,0 +1,190 @@
+"""Прогрев процесса до того, как он начнёт принимать запросы.
+
+Первые запросы нового воркера платят за заполнение резолвера URL,
+компиляцию шаблонов, импорт sorl и PIL и пустой кэш. warm_up делает эту
+работу заранее и пишет в лог отчёт о времени старта.
+"""
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.test import RequestFactory
+from django.urls import (
+    Resolver404, URLResolver, get_resolver, resolve, reverse
+)
+from django.urls.resolvers import RegexPattern, RoutePattern
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+CONVERTER_SAMPLES = {
+    'int': '1',
+    'path': 'x',
+    'slug': 'x',
+    'str': 'x',
+    'uuid': '00000000-0000-0000-0000-000000000000',
+}
+ROUTE_PARAMETER_RE = re.compile(r'<(?:(?P<converter>\w+):)?\w+>')
+REGEX_SPECIAL_RE = re.compile(r'[()\[\]{}?*+|\\.]')
+
+
+def template_names(directory, skip=()):
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(
+            name for name in dirs
+            if os.path.join(root, name) not in skip
+        )
+        for name in sorted(files):
+            if name.endswith(TEMPLATE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), directory)
+
+
+def compile_templates():
+    """Компилирует все шаблоны каждого движка.
+
+    Каталоги, принадлежащие другому движку, пропускаются: шаблоны Jinja2
+    лежат внутри templates/ и не разбираются движком Django. Возвращает
+    число скомпилированных шаблонов.
+    """
+    compiled = 0
+    all_engines = engines.all()
+    for engine in all_engines:
+        skip = {
+            directory
+            for other in all_engines if other is not engine
+            for directory in other.template_dirs
+        }
+        for directory in engine.template_dirs:
+            for name in template_names(directory, skip):
+                try:
+                    engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                    logger.debug('Шаблон %s не собран: %s', name, error)
+                else:
+                    compiled += 1
+    return compiled
+
+
+def sample_part(pattern):
+    """Пример пути для шаблона URL или None, если его не подобрать."""
+    if isinstance(pattern, RoutePattern):
+        return ROUTE_PARAMETER_RE.sub(
+            lambda match: CONVERTER_SAMPLES.get(
+                match.group('converter') or 'str', 'x'
+            ),
+            str(pattern)
+        )
+    if isinstance(pattern, RegexPattern):
+        regex = str(pattern).lstrip('^').rstrip('$')
+        if not REGEX_SPECIAL_RE.search(regex):
+            return regex
+    return None
+
+
+def sample_paths(patterns, prefix=''):
+    for url_pattern in patterns:
+        part = sample_part(url_pattern.pattern)
+        if part is None:
+            continue
+        if isinstance(url_pattern, URLResolver):
+            yield from sample_paths(url_pattern.url_patterns, prefix + part)
+        else:
+            yield '/' + prefix + part
+
+
+def resolve_urls():
+    """Заполняет резолвер и прогоняет через него каждый шаблон URL.
+
+    Возвращает число путей, которые удалось разрешить.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+    resolved = 0
+    for path in sample_paths(resolver.url_patterns):
+        try:
+            resolve(path)
+        except Resolver404:
+            continue
+        resolved += 1
+    return resolved
+
+
+def import_image_stack():
+    """Импортирует sorl и плагины PIL, создаёт движок миниатюр."""
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    Image.init()
+    default.engine
+    default.kvstore
+    default.backend
+    return len(Image.OPEN)
+
+
+def prime_caches(pages=None):
+    """Рендерит первые страницы главной ленты для анонима.
+
+    Заполняются кэш фрагментов, кэш количеств пагинатора и загрузчики
+    шаблонов. Возвращает число отрендеренных страниц.
+    """
+    pages = pages or settings.WARMUP_FEED_PAGES
+    factory = RequestFactory()
+    url = reverse('posts:index')
+    for number in range(1, pages + 1):
+        request = factory.get(url, {'page': number} if number > 1 else {})
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(url)
+        request.resolver_match.func(request)
+    return pages
+
+
+STEPS = (
+    ('templates', compile_templates),
+    ('urls', resolve_urls),
+    ('images', import_image_stack),
+    ('caches', prime_caches),
+)
+
+
+def warm_up(import_timer=None):
+    """Выполняет все шаги прогрева и пишет отчёт о старте в лог.
+
+    Упавший шаг не мешает остальным и не останавливает запуск воркера.
+    Возвращает список (шаг, результат, секунды).
+    """
+    report = []
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            result = step()
+        except Exception:
+            logger.exception('Шаг прогрева %s упал', name)
+            result = None
+        report.append((name, result, time.perf_counter() - start))
+    logger.info(format_report(report, import_timer))
+    return report
+
+
+def format_report(report, import_timer=None, limit=None):
+    limit = limit or settings.WARMUP_REPORT_MODULES
+    lines = ['Старт воркера:']
+    if import_timer is not None:
+        lines.append(f'  импорты: {import_timer.total * 1000:.1f} мс')
+        for package, elapsed in import_timer.by_package()[:limit]:
+            lines.append(f'    {package:<30} {elapsed * 1000:8.1f} мс')
+        lines.append('  самые медленные модули (собственное / с вложенными):')
+        for module, (total, own) in import_timer.slowest(limit):
+            lines.append(
+                f'    {module:<40} {own * 1000:8.1f} {total * 1000:8.1f} мс'
+            )
+    lines.append('  прогрев:')
+    for name, result, elapsed in report:
+        status = 'ошибка' if result is None else result
+        lines.append(f'    {name:<10} {elapsed * 1000:8.1f} мс ({status})')
+    return '\n'.join(lines)
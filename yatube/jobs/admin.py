@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+def retry_jobs(modeladmin, request, query_set):
+    updated = query_set.exclude(status=Job.RUNNING).update(
+        status=Job.QUEUED,
+        attempts=0,
+        run_at=timezone.now(),
+        finished=None
+    )
+    modeladmin.message_user(request, f'Снова в очереди: {updated}.')
+
+
+retry_jobs.short_description = 'Перезапустить'
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'locked_by',
+        'finished',
+    )
+    list_filter = ('status', 'name',)
+    search_fields = ('name', 'idempotency_key',)
+    readonly_fields = ('locked_by', 'locked_at', 'created', 'finished',)
+    actions = (retry_jobs,)
+
+
+admin.site.register(Job, JobAdmin)
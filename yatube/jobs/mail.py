@@ -0,0 +1,86 @@
+import base64
+import email
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from jobs.queue import enqueue
+
+
+def serialize_message(message):
+    """Письмо в виде, который можно сохранить в JSON параметров задачи."""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            attachments.append(
+                {'mime': base64.b64encode(attachment.as_bytes()).decode()}
+            )
+            continue
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            (filename, base64.b64encode(content).decode(), mimetype)
+        )
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }
+
+
+def mime_from_bytes(data):
+    """MIMEBase из сохранённого вложения: заголовки и тело как были."""
+    parsed = email.message_from_bytes(data)
+    part = MIMEBase(
+        parsed.get_content_maintype(), parsed.get_content_subtype()
+    )
+    for header in set(part.keys()):
+        del part[header]
+    for header, value in parsed.items():
+        part[header] = value
+    part.set_payload(parsed.get_payload())
+    return part
+
+
+def deserialize_message(data):
+    data = dict(data)
+    attachments = data.pop('attachments')
+    message = EmailMultiAlternatives(**data)
+    for attachment in attachments:
+        if isinstance(attachment, dict):
+            message.attach(
+                mime_from_bytes(base64.b64decode(attachment['mime']))
+            )
+        else:
+            filename, content, mimetype = attachment
+            message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Не отправляет письма сам, а ставит их в очередь задач.
+
+    Отправляет воркер через бэкенд JOBS_EMAIL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            enqueue('jobs.send_email', {
+                'message': serialize_message(message),
+            })
+        return len(email_messages)
+
+
+def send_now(message):
+    connection = get_connection(settings.JOBS_EMAIL_BACKEND)
+    return connection.send_messages([deserialize_message(message)])
@@ -0,0 +1,80 @@
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.queue import (
+    claim, execute, heartbeat, queue_stats, requeue_stale, schedule_periodic
+)
+
+
+def run_job(job):
+    close_old_connections()
+    try:
+        return execute(job)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди фоновых задач: выполняет задачи в пуле потоков и '
+        'ставит периодические задачи. Воркеров можно запустить несколько, '
+        'в том числе на разных машинах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Показать глубину очереди и выйти.',
+        )
+
+    def handle(self, *args, concurrency, poll_interval, once, stats,
+               **options):
+        if stats:
+            for key, value in queue_stats().items():
+                self.stdout.write(f'{key}: {value}')
+            return
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Воркер {worker}, потоков: {concurrency}')
+        running = {}
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(concurrency) as pool:
+            while True:
+                schedule_periodic()
+                requeue_stale()
+                running = {
+                    future: pk for future, pk in running.items()
+                    if not future.done()
+                }
+                if (
+                    time.monotonic() - last_heartbeat
+                    >= settings.JOBS_HEARTBEAT_INTERVAL
+                ):
+                    heartbeat(worker, list(running.values()))
+                    last_heartbeat = time.monotonic()
+                jobs = claim(worker, concurrency - len(running))
+                for job in jobs:
+                    running[pool.submit(run_job, job)] = job.pk
+                    self.stdout.write(f'  {job}: попытка {job.attempts}')
+                if once and not jobs and not running:
+                    return
+                if not jobs:
+                    time.sleep(poll_interval)
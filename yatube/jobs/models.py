@@ -0,0 +1,73 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Параметры')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить не раньше'
+    )
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        blank=True,
+        null=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    locked_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Взята в работу'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки'
+    )
+    finished = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата завершения'
+    )
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
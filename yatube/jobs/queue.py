@@ -0,0 +1,209 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+_scheduled_slots = {}
+
+
+class UnknownTask(Exception):
+    """В очереди задача, которой нет в реестре."""
+
+
+def task(name, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу с именем name.
+
+    Функции задач лежат в модулях tasks.py приложений и принимают
+    параметры задачи именованными аргументами.
+    """
+    def decorator(func):
+        TASKS[name] = func
+        func.task_name = name
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, run_at=None, max_attempts=None):
+    """Ставит задачу в очередь и возвращает её Job.
+
+    Если задача с ключом идемпотентности key уже есть, новая не
+    создаётся: возвращается существующая.
+    """
+    if name not in TASKS:
+        raise UnknownTask(name)
+    job = Job(
+        name=name,
+        payload=json.dumps(payload or {}, cls=DjangoJSONEncoder),
+        idempotency_key=key,
+        run_at=run_at or timezone.now(),
+        max_attempts=(
+            max_attempts
+            or TASKS[name].max_attempts
+            or settings.JOBS_MAX_ATTEMPTS
+        ),
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        if key is None:
+            raise
+        return Job.objects.get(idempotency_key=key)
+    return job
+
+
+def claim(worker, limit):
+    """Забирает до limit готовых задач.
+
+    Каждая задача переводится в работу условным UPDATE по статусу, так
+    что одну задачу не возьмут два воркера.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED,
+        run_at__lte=now
+    ).order_by('run_at').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(candidates):
+        updated = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at'))
+
+
+def heartbeat(worker, job_ids):
+    """Продлевает аренду задач, которые воркер ещё выполняет.
+
+    locked_at — время последнего продления. Воркер продлевает аренду
+    каждые JOBS_HEARTBEAT_INTERVAL секунд, так что задача, идущая
+    дольше JOBS_LOCK_TIMEOUT, не считается брошенной.
+    """
+    if not job_ids:
+        return 0
+    return Job.objects.filter(
+        pk__in=job_ids,
+        status=Job.RUNNING,
+        locked_by=worker
+    ).update(locked_at=timezone.now())
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров.
+
+    Брошенной считается задача, аренду которой не продлевали
+    JOBS_LOCK_TIMEOUT секунд. Задача, исчерпавшая попытки, в очередь не
+    возвращается, а помечается ошибкой: иначе задача, которая роняет
+    воркер, повторялась бы бесконечно. Возвращает число возвращённых.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        finished=now,
+        locked_by='',
+        locked_at=None,
+        last_error='Воркер не завершил задачу, попытки исчерпаны.',
+    )
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, locked_by='', locked_at=None
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return timedelta(seconds=min(
+        settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_BACKOFF_MAX
+    ))
+
+
+def execute(job):
+    """Выполняет взятую задачу и записывает результат.
+
+    Результат пишется, только если задача всё ещё за этим воркером:
+    если аренду сочли брошенной и задачу отдали другому, его запись не
+    затирается.
+    """
+    try:
+        func = TASKS.get(job.name)
+        if func is None:
+            raise UnknownTask(job.name)
+        func(**json.loads(job.payload))
+    except Exception as error:
+        logger.exception('Задача %s упала', job)
+        done = {'last_error': traceback.format_exc()}
+        if job.attempts < job.max_attempts and not isinstance(
+            error, UnknownTask
+        ):
+            done.update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + retry_delay(job.attempts),
+                locked_by='',
+                locked_at=None,
+            )
+        else:
+            done.update(status=Job.FAILED, finished=timezone.now())
+    else:
+        done = {
+            'status': Job.DONE,
+            'finished': timezone.now(),
+            'last_error': '',
+        }
+    Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by
+    ).update(**done)
+    for field, value in done.items():
+        setattr(job, field, value)
+    return job
+
+
+def schedule_periodic(now=None):
+    """Ставит периодические задачи из JOBS_PERIODIC.
+
+    Ключ идемпотентности — имя и номер интервала, поэтому каждая
+    задача попадает в очередь один раз за интервал, сколько бы воркеров
+    ни работало.
+    """
+    now = now or timezone.now()
+    for name, interval in settings.JOBS_PERIODIC:
+        slot = int(now.timestamp()) // interval
+        if _scheduled_slots.get(name) == slot:
+            continue
+        enqueue(name, key=f'periodic:{name}:{slot}')
+        _scheduled_slots[name] = slot
+
+
+def queue_stats():
+    """Глубина очереди: число задач по состояниям и возраст старейшей."""
+    stats = dict(Job.objects.order_by().values_list('status').annotate(
+        count=Count('pk')
+    ))
+    stats = {status: stats.get(status, 0) for status, _ in Job.STATUS_CHOICES}
+    oldest = Job.objects.filter(
+        status=Job.QUEUED,
+        run_at__lte=timezone.now()
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    stats['oldest_age'] = (
+        (timezone.now() - oldest).total_seconds() if oldest else 0
+    )
+    return stats
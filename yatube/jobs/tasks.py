@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.mail import send_now
+from jobs.models import Job
+from jobs.queue import task
+
+
+@task('jobs.send_email')
+def send_email(message):
+    send_now(message)
+
+
+@task('jobs.purge_finished')
+def purge_finished():
+    """Удаляет выполненные задачи старше JOBS_KEEP_FINISHED_DAYS."""
+    Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(
+            days=settings.JOBS_KEEP_FINISHED_DAYS
+        )
+    ).delete()
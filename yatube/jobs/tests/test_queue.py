@@ -0,0 +1,177 @@
+import json
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import queue
+from jobs.mail import deserialize_message, serialize_message
+from jobs.models import Job
+from jobs.queue import (
+    claim, enqueue, execute, heartbeat, queue_stats, requeue_stale,
+    schedule_periodic, task
+)
+
+User = get_user_model()
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.broken', max_attempts=2)
+def broken():
+    raise ValueError('сломано')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        queue._scheduled_slots.clear()
+
+    def run_ready(self):
+        return [execute(job) for job in claim('test', 10)]
+
+    def test_job_executed(self):
+        """Задача выполняется с параметрами из очереди."""
+        enqueue('tests.record', {'value': 42})
+        job, = self.run_ready()
+        self.assertEqual(calls, [42])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.DONE)
+        self.assertEqual(self.run_ready(), [])
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом ставится один раз."""
+        first = enqueue('tests.record', {'value': 1}, key='one')
+        second = enqueue('tests.record', {'value': 2}, key='one')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_scheduled_job_waits(self):
+        """Отложенная задача не берётся раньше срока."""
+        enqueue(
+            'tests.record',
+            {'value': 1},
+            run_at=timezone.now() + timedelta(hours=1)
+        )
+        self.assertEqual(self.run_ready(), [])
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется с задержкой, потом помечается ошибкой."""
+        job = enqueue('tests.broken')
+        job, = self.run_ready()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('сломано', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        job, = self.run_ready()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(Job.objects.get(pk=job.pk).attempts, 2)
+
+    def test_claim_is_exclusive(self):
+        """Одну задачу не забирают два воркера."""
+        enqueue('tests.record', {'value': 1})
+        self.assertEqual(len(claim('first', 10)), 1)
+        self.assertEqual(claim('second', 10), [])
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_stale_jobs_requeued_until_attempts_run_out(self):
+        """Брошенная задача возвращается в очередь, пока есть попытки."""
+        job = enqueue('tests.broken')
+        for expected in (Job.QUEUED, Job.FAILED):
+            claim('dead', 10)
+            Job.objects.filter(pk=job.pk).update(
+                locked_at=timezone.now() - timedelta(minutes=2)
+            )
+            requeue_stale()
+            job.refresh_from_db()
+            self.assertEqual(job.status, expected)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(claim('test', 10), [])
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_heartbeat_keeps_long_job(self):
+        """Продлённая аренда не даёт отдать задачу второму воркеру."""
+        enqueue('tests.record', {'value': 1})
+        job, = claim('first', 10)
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=2)
+        )
+        self.assertEqual(heartbeat('second', [job.pk]), 0)
+        self.assertEqual(heartbeat('first', [job.pk]), 1)
+        self.assertEqual(requeue_stale(), 0)
+        self.assertEqual(claim('second', 10), [])
+
+    def test_late_result_does_not_overwrite_new_owner(self):
+        """Результат воркера, у которого забрали задачу, не пишется."""
+        enqueue('tests.record', {'value': 1})
+        job, = claim('first', 10)
+        Job.objects.filter(pk=job.pk).update(locked_by='second')
+        execute(job)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+    @override_settings(JOBS_PERIODIC=(('tests.record', 60),))
+    def test_periodic_once_per_interval(self):
+        """Периодическая задача ставится раз в интервал."""
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        schedule_periodic(now)
+        queue._scheduled_slots.clear()
+        schedule_periodic(now + timedelta(seconds=30))
+        self.assertEqual(Job.objects.count(), 1)
+        schedule_periodic(now + timedelta(seconds=60))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_queue_stats(self):
+        """Метрики показывают глубину очереди."""
+        enqueue('tests.record', {'value': 1})
+        enqueue('tests.broken')
+        stats = queue_stats()
+        self.assertEqual(stats[Job.QUEUED], 2)
+        self.assertEqual(stats[Job.DONE], 0)
+
+    @override_settings(
+        EMAIL_BACKEND='jobs.mail.QueuedEmailBackend',
+        JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    )
+    def test_password_reset_email_queued(self):
+        """Письмо сброса пароля уходит через очередь."""
+        User.objects.create_user(
+            username='one', email='one@example.com', password='secret-pass'
+        )
+        self.client.post(
+            reverse('users:password_reset'),
+            {'email': 'one@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.filter(name='jobs.send_email').count(), 1)
+        self.run_ready()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['one@example.com'])
+
+    def test_message_with_both_attachment_kinds_survives_queue(self):
+        """Вложения-кортежи и MIMEBase переживают сохранение в задачу."""
+        message = mail.EmailMessage('Тема', 'Текст', to=['one@example.com'])
+        message.attach('notes.txt', 'Заметки', 'text/plain')
+        part = MIMEText('<p>Привет</p>', 'html')
+        part.add_header('Content-Disposition', 'attachment', filename='a.html')
+        message.attach(part)
+        restored = deserialize_message(
+            json.loads(json.dumps(serialize_message(message)))
+        )
+        self.assertEqual(
+            restored.attachments[0][:2], ('notes.txt', 'Заметки')
+        )
+        self.assertEqual(restored.attachments[1].get_filename(), 'a.html')
+        self.assertEqual(
+            restored.attachments[1].get_payload(decode=True).decode(),
+            '<p>Привет</p>'
+        )
+        self.assertIn('a.html', restored.message().as_string())
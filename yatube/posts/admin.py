@@ -1,30 +1,75 @@
 from django.contrib import admin
 
-from posts.models import Comment, Follow, Group, Post
+from core.admin import ScalableChangelistMixin
+from core.paginator import EstimatedCountPaginator
+from posts.deletion import schedule_deletion
+from posts.models import Comment, DeletionTask, Follow, Group, Post
 
 
-class PostAdmin(admin.ModelAdmin):
+def chunked_delete_action(target_type):
+    def chunked_delete(modeladmin, request, query_set):
+        for pk in query_set.values_list('pk', flat=True):
+            schedule_deletion(target_type, pk)
+        modeladmin.message_user(
+            request,
+            'Удаление запланировано: строки по частям удалит фоновая '
+            'задача posts.run_deletions.'
+        )
+
+    chunked_delete.short_description = 'Удалить по частям в фоне'
+    return chunked_delete
+
+
+class PostAdmin(ScalableChangelistMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_select_related = ('author', 'group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    autocomplete_fields = ('author', 'group',)
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (chunked_delete_action(DeletionTask.POST),)
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug',)
+    search_fields = ('title', 'slug',)
+    actions = (chunked_delete_action(DeletionTask.GROUP),)
+
+
+class CommentAdmin(ScalableChangelistMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'post',)
+    list_select_related = ('author', 'post__author',)
     search_fields = ('text',)
     list_filter = ('created',)
     list_editable = ('author', 'post',)
+    autocomplete_fields = ('author', 'post',)
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
+class DeletionTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'target_type', 'target_id', 'deleted_rows', 'created',
+        'finished',
+    )
+    list_filter = ('target_type', 'finished',)
+
+
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author',)
+    list_select_related = ('user', 'author',)
+    autocomplete_fields = ('user', 'author',)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(DeletionTask, DeletionTaskAdmin)
 admin.site.site_header = 'Управление сайтом Yatube'
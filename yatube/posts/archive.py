@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.paginator import (
+    ARCHIVE_COUNT_GENERATION_KEY, cached_count, invalidate_counts
+)
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+
+def archive_horizon():
+    """Граница архива: посты старше неё переносятся в архивные таблицы."""
+    return timezone.now() - timedelta(days=settings.POSTS_ARCHIVE_AFTER_DAYS)
+
+
+def copy_to(model, instance):
+    """Копия строки в архивной модели: поля с одинаковыми именами."""
+    return model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    })
+
+
+def archive_posts(horizon=None, batch_size=None):
+    """Переносит посты старше horizon вместе с комментариями в архив.
+
+    Каждая пачка переносится в своей транзакции: вставка в архив и
+    удаление из горячих таблиц видны читателям одновременно. Генератор
+    отдаёт число перенесённых постов в каждой пачке; прерванный перенос
+    продолжится при следующем запуске.
+    """
+    horizon = horizon or archive_horizon()
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    while True:
+        posts = list(
+            Post.objects.filter(pub_date__lt=horizon).order_by('pk')[
+                :batch_size
+            ]
+        )
+        if not posts:
+            return
+        with transaction.atomic():
+            ArchivedPost.objects.bulk_create(
+                copy_to(ArchivedPost, post) for post in posts
+            )
+            ArchivedComment.objects.bulk_create(
+                copy_to(ArchivedComment, comment)
+                for comment in Comment.objects.filter(post__in=posts)
+            )
+            Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+        invalidate_counts(ARCHIVE_COUNT_GENERATION_KEY)
+        yield len(posts)
+
+
+class HotColdFeed:
+    """Лента для Paginator: сначала горячая таблица, за ней архив.
+
+    Оба набора отсортированы по убыванию даты, а в архиве лежат только
+    посты старше любого горячего, поэтому склейка сохраняет порядок.
+    К архиву страница обращается, только если горячих строк на неё не
+    хватило. Граница между таблицами берётся из самого среза горячей
+    части, а не из кэша: запомненное количество в другом процессе может
+    отставать, и страницы у границы повторяли бы или теряли посты.
+    Общее количество для Paginator берётся из кэша (cached_count), у
+    архива — из отдельного, редко сбрасываемого.
+    """
+    ordered = True
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+
+    @property
+    def hot_count(self):
+        return cached_count(self.hot)
+
+    @property
+    def cold_count(self):
+        """Число архивных строк, почти не меняющееся.
+
+        Архив пополняется раз в сутки, поэтому количество хранится
+        ARCHIVE_COUNT_TIMEOUT секунд и сбрасывается только переносом в
+        архив и удалением архивных постов, а не каждой новой записью.
+        """
+        return cached_count(
+            self.cold,
+            settings.ARCHIVE_COUNT_TIMEOUT,
+            ARCHIVE_COUNT_GENERATION_KEY
+        )
+
+    def count(self):
+        return self.hot_count + self.cold_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        items = list(self.hot[start:stop])
+        if len(items) >= stop - start:
+            return items
+        hot_count = start + len(items) if items else self.hot.count()
+        return items + list(
+            self.cold[max(start - hot_count, 0):stop - hot_count]
+        )
@@ -0,0 +1,82 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from posts.models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+# SQLite ограничивает число параметров в одном запросе.
+UPDATE_BATCH_SIZE = 500
+
+
+class ViewCounter:
+    """Буфер просмотров постов с отложенной записью в БД.
+
+    Просмотры копятся в памяти процесса и сбрасываются пачкой UPDATE,
+    когда набралось POST_VIEWS_FLUSH_THRESHOLD просмотров или прошло
+    POST_VIEWS_FLUSH_INTERVAL секунд с прошлого сброса, и при выходе
+    процесса. Если запись не удалась, просмотры остаются в буфере до
+    следующего сброса. При падении процесса теряется не больше одного
+    буфера. Просмотры поста, ушедшего в архив до сброса, пишутся в
+    архивную строку: id у неё тот же.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._total = 0
+        self._last_flush = time.monotonic()
+
+    def incr(self, post_id):
+        with self._lock:
+            self._pending[post_id] += 1
+            self._total += 1
+            due = (
+                self._total >= settings.POST_VIEWS_FLUSH_THRESHOLD
+                or time.monotonic() - self._last_flush
+                >= settings.POST_VIEWS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = Counter()
+            self._total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        by_increment = defaultdict(list)
+        for post_id, count in pending.items():
+            by_increment[count].append(post_id)
+        try:
+            with transaction.atomic():
+                for count, post_ids in by_increment.items():
+                    for start in range(0, len(post_ids), UPDATE_BATCH_SIZE):
+                        batch = post_ids[start:start + UPDATE_BATCH_SIZE]
+                        updated = Post.objects.filter(pk__in=batch).update(
+                            views=F('views') + count
+                        )
+                        if updated < len(batch):
+                            ArchivedPost.objects.filter(
+                                pk__in=batch
+                            ).update(views=F('views') + count)
+        except DatabaseError:
+            logger.exception('Не удалось записать просмотры постов')
+            with self._lock:
+                self._pending.update(pending)
+                self._total += sum(pending.values())
+            return 0
+        return sum(pending.values())
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.flush)
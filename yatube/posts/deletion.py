@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.paginator import ARCHIVE_COUNT_GENERATION_KEY, invalidate_counts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, DeletionTask, FeedMarker, Follow,
+    Group, Mention, Post, PostNotification, Reaction, User
+)
+from users.models import NotificationSettings
+
+
+def schedule_deletion(target_type, target_id):
+    """Ставит объект в очередь на удаление.
+
+    Пользователь сразу становится неактивным и пропадает из лент, даже
+    если сами строки будут удаляться ещё долго; запомненные количества
+    постов в лентах сбрасываются.
+    """
+    if target_type == DeletionTask.USER:
+        user = User.objects.get(pk=target_id)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        invalidate_counts()
+        invalidate_counts(ARCHIVE_COUNT_GENERATION_KEY)
+    task, _ = DeletionTask.objects.get_or_create(
+        target_type=target_type,
+        target_id=target_id,
+        finished=None
+    )
+    return task
+
+
+def process_in_batches(query_set, batch_size, **update):
+    """Удаляет (или обновляет на update) строки пачками.
+
+    Каждая пачка идёт в своей транзакции, так что блокировка записи
+    держится недолго. Генератор отдаёт число строк в каждой пачке.
+    Прерванную обработку можно просто запустить снова: она продолжит
+    с оставшихся строк.
+    """
+    while True:
+        ids = list(query_set.order_by().values_list('pk', flat=True)[
+            :batch_size
+        ])
+        if not ids:
+            return
+        batch = query_set.model.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            count = batch.update(**update) if update else batch.delete()[0]
+        yield count
+
+
+def deletion_steps(task):
+    """Шаги удаления: набор строк и, для отвязки, новые значения полей.
+
+    Последний шаг удаляет сам объект; к этому моменту на него не должно
+    остаться ссылок, иначе каскад удалит их одним запросом без пачек.
+    """
+    target_id = task.target_id
+    if task.target_type == DeletionTask.USER:
+        return (
+            (Comment.objects.filter(author_id=target_id), {}),
+            (Comment.objects.filter(post__author_id=target_id), {}),
+            (ArchivedComment.objects.filter(author_id=target_id), {}),
+            (ArchivedComment.objects.filter(post__author_id=target_id), {}),
+            (Reaction.objects.filter(user_id=target_id), {}),
+            (Follow.objects.filter(user_id=target_id), {}),
+            (Follow.objects.filter(author_id=target_id), {}),
+            (PostNotification.objects.filter(recipient_id=target_id), {}),
+            (Mention.objects.filter(user_id=target_id), {}),
+            (FeedMarker.objects.filter(user_id=target_id), {}),
+            (NotificationSettings.objects.filter(user_id=target_id), {}),
+            (LogEntry.objects.filter(user_id=target_id), {}),
+            (User.groups.through.objects.filter(user_id=target_id), {}),
+            (
+                User.user_permissions.through.objects.filter(
+                    user_id=target_id
+                ),
+                {}
+            ),
+            (Post.objects.filter(author_id=target_id), {}),
+            (ArchivedPost.objects.filter(author_id=target_id), {}),
+            (User.objects.filter(pk=target_id), {}),
+        )
+    if task.target_type == DeletionTask.GROUP:
+        return (
+            (Post.objects.filter(group_id=target_id), {'group': None}),
+            (
+                ArchivedPost.objects.filter(group_id=target_id),
+                {'group': None}
+            ),
+            (Group.objects.filter(pk=target_id), {}),
+        )
+    return (
+        (Comment.objects.filter(post_id=target_id), {}),
+        (Reaction.objects.filter(post_id=target_id), {}),
+        (Post.objects.filter(pk=target_id), {}),
+        (ArchivedComment.objects.filter(post_id=target_id), {}),
+        (ArchivedPost.objects.filter(pk=target_id), {}),
+    )
+
+
+def claim_deletion(task):
+    """Берёт задачу удаления в работу на DELETION_LEASE_TIMEOUT секунд.
+
+    Аренда ставится условным UPDATE, так что одну задачу не выполняют
+    сразу два воркера, даже если очередь повторно выдала задание
+    posts.run_deletions, пока первое ещё работает. Возвращает False,
+    если задачу уже выполняет кто-то другой или она завершена.
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.DELETION_LEASE_TIMEOUT)
+    claimed = DeletionTask.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        pk=task.pk,
+        finished=None,
+    ).update(locked_until=locked_until)
+    if claimed:
+        task.locked_until = locked_until
+    return bool(claimed)
+
+
+def run_deletion(task, batch_size=None, progress=None):
+    """Выполняет задачу удаления, взятую claim_deletion.
+
+    Каждая пачка продлевает аренду, так что долгое удаление не
+    перехватят. Файлы картинок удалённых постов убирает периодическая
+    задача posts.sweep_images.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    lease = timedelta(seconds=settings.DELETION_LEASE_TIMEOUT)
+    for query_set, update in deletion_steps(task):
+        for count in process_in_batches(query_set, batch_size, **update):
+            task.deleted_rows += count
+            task.locked_until = timezone.now() + lease
+            task.save(update_fields=['deleted_rows', 'locked_until'])
+            if progress is not None:
+                progress(task)
+    task.finished = timezone.now()
+    task.locked_until = None
+    task.save(update_fields=['finished', 'locked_until'])
+    return task
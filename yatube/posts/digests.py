@@ -0,0 +1,159 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Post, PostNotification, User
+from posts.tags import posts_by_ids
+from users.models import NotificationSettings
+
+DIGEST_SUBJECT = 'Новые посты авторов, на которых вы подписаны'
+
+
+def notify_followers(post_id, batch_size=None):
+    """Записывает новый пост в очередь дайджеста каждого подписчика.
+
+    Подписчики обходятся пачками по user_id; повторный запуск ничего
+    не дублирует.
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return
+    followers = Follow.objects.filter(author_id=author_id).exclude(
+        user__notification_settings__digest_enabled=False
+    ).order_by('user_id').values_list('user_id', flat=True)
+    last_id = 0
+    while True:
+        user_ids = list(followers.filter(user_id__gt=last_id)[:batch_size])
+        if not user_ids:
+            return
+        PostNotification.objects.bulk_create(
+            [
+                PostNotification(recipient_id=user_id, post_id=post_id)
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True
+        )
+        last_id = user_ids[-1]
+
+
+def absolute_url(path):
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def digest_message(user, posts, more):
+    token = user.notification_settings.unsubscribe_token
+    unsubscribe_url = absolute_url(
+        reverse('users:unsubscribe', args=[token])
+    )
+    context = {
+        'user': user,
+        'posts': [
+            (post, absolute_url(reverse('posts:post_detail', args=[post.pk])))
+            for post in posts
+        ],
+        'more': more,
+        'unsubscribe_url': unsubscribe_url,
+        'settings_url': absolute_url(reverse('users:notifications')),
+    }
+    message = EmailMultiAlternatives(
+        subject=DIGEST_SUBJECT,
+        body=render_to_string('posts/email/digest.txt', context),
+        to=[user.email],
+        headers={
+            'List-Unsubscribe': f'<{unsubscribe_url}>',
+            'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+        },
+    )
+    message.attach_alternative(
+        render_to_string('posts/email/digest.html', context),
+        'text/html'
+    )
+    return message
+
+
+def is_due(notification_settings, now):
+    last = notification_settings.last_digest_at
+    return last is None or (
+        (now - last).total_seconds() >= notification_settings.interval
+    )
+
+
+def send_digest_batch(recipient_ids, now, connection):
+    """Одно письмо на получателя за все накопленные посты."""
+    NotificationSettings.objects.bulk_create(
+        [NotificationSettings(user_id=pk) for pk in recipient_ids],
+        ignore_conflicts=True
+    )
+    users = User.objects.filter(pk__in=recipient_ids).select_related(
+        'notification_settings'
+    )
+    due = {
+        user.pk: user for user in users
+        if user.notification_settings.digest_enabled
+        and is_due(user.notification_settings, now)
+    }
+    disabled = [
+        user.pk for user in users
+        if not user.notification_settings.digest_enabled
+    ]
+    PostNotification.objects.filter(recipient_id__in=disabled).delete()
+    notifications = list(PostNotification.objects.filter(
+        recipient_id__in=due
+    ).order_by('-post_id').values_list('pk', 'recipient_id', 'post_id'))
+    post_ids = defaultdict(list)
+    for _, recipient_id, post_id in notifications:
+        post_ids[recipient_id].append(post_id)
+    posts = {
+        post.pk: post
+        for post in posts_by_ids(
+            sorted({n[2] for n in notifications}), full_text=True
+        )
+    }
+    limit = settings.DIGEST_MAX_POSTS
+    messages = []
+    for user_id, user in due.items():
+        user_posts = [posts[pk] for pk in post_ids[user_id] if pk in posts]
+        if user.email and user_posts:
+            messages.append(digest_message(
+                user, user_posts[:limit], len(user_posts) - limit
+            ))
+    connection.send_messages(messages)
+    PostNotification.objects.filter(
+        pk__in=[pk for pk, _, _ in notifications]
+    ).delete()
+    NotificationSettings.objects.filter(user_id__in=due).update(
+        last_digest_at=now
+    )
+    return len(messages)
+
+
+def send_digests(batch_size=None):
+    """Рассылает дайджесты всем, у кого подошёл срок.
+
+    Получатели читаются из очереди уведомлений пачками по id, на пачку
+    открывается одно соединение с почтовым бэкендом. Возвращает число
+    отправленных писем.
+    """
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    now = timezone.now()
+    recipients = PostNotification.objects.order_by(
+        'recipient_id'
+    ).values_list('recipient_id', flat=True).distinct()
+    sent = 0
+    last_id = 0
+    while True:
+        recipient_ids = list(
+            recipients.filter(recipient_id__gt=last_id)[:batch_size]
+        )
+        if not recipient_ids:
+            return sent
+        with get_connection(settings.JOBS_EMAIL_BACKEND) as connection:
+            sent += send_digest_batch(recipient_ids, now, connection)
+        last_id = recipient_ids[-1]
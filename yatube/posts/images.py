@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import ArchivedPost, Post
+from posts.storage import post_image_storage
+
+ASPECT_WIDTH, ASPECT_HEIGHT = 960, 339
+SIZES = '(max-width: 992px) 100vw, 960px'
+# Модели, ссылающиеся на файлы post_image_storage.
+IMAGE_MODELS = (Post, ArchivedPost)
+MIME_TYPES = {
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+
+
+def variant_size(width):
+    return width, round(width * ASPECT_HEIGHT / ASPECT_WIDTH)
+
+
+def image_variants(image, image_format):
+    """Миниатюры картинки во всех ширинах POST_IMAGE_WIDTHS."""
+    variants = []
+    for width in settings.POST_IMAGE_WIDTHS:
+        variants.append((width, get_thumbnail(
+            image,
+            '{}x{}'.format(*variant_size(width)),
+            crop='center',
+            upscale=True,
+            format=image_format,
+        )))
+    return variants
+
+
+def srcset(variants):
+    return ', '.join(f'{im.url} {width}w' for width, im in variants)
+
+
+def generate_variants(name):
+    """Создаёт все варианты картинки; вызывается в процессах backfill.
+
+    Источник строится с хранилищем картинок постов: оно входит в ключ
+    миниатюры sorl, и только так ключи совпадут с теми, что шаблоны
+    получают из FieldFile.
+    """
+    source = ImageFile(name, post_image_storage)
+    try:
+        for image_format in settings.POST_IMAGE_FORMATS:
+            image_variants(source, image_format)
+    except Exception as error:
+        return name, error
+    return name, None
+
+
+def referenced_images(names):
+    """Имена из names, на которые ссылается пост или архивный пост."""
+    referenced = set()
+    for model in IMAGE_MODELS:
+        referenced.update(model.objects.filter(image__in=names).values_list(
+            'image', flat=True
+        ))
+    return referenced
+
+
+def sweep_images(grace=None, batch_size=500):
+    """Удаляет файлы картинок постов, на которые никто не ссылается.
+
+    Трогаются только хешированные файлы, не менявшиеся grace секунд
+    (IMAGE_SWEEP_GRACE): сохранение обновляет время изменения и у уже
+    существующего файла, так что загрузка, пост которой ещё не
+    сохранён, свой файл не потеряет. Возвращает число удалённых файлов.
+    """
+    grace = settings.IMAGE_SWEEP_GRACE if grace is None else grace
+    storage = post_image_storage
+    upload_to = Post._meta.get_field('image').upload_to
+    cutoff = time.time() - grace
+    candidates = [
+        name for name in storage.hashed_names(upload_to)
+        if (storage.modified_at(name) or cutoff) < cutoff
+    ]
+    deleted = 0
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        referenced = referenced_images(batch)
+        for name in batch:
+            modified = storage.modified_at(name)
+            if name in referenced or modified is None or modified >= cutoff:
+                continue
+            storage.delete(name)
+            deleted += 1
+    return deleted
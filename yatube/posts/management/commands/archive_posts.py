@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_horizon, archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше POSTS_ARCHIVE_AFTER_DAYS дней вместе с '
+        'комментариями в архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, batch_size=None, **options):
+        horizon = archive_horizon()
+        self.stdout.write(f'Переносим посты старше {horizon:%d-%m-%Y}...')
+        total = 0
+        for count in archive_posts(horizon, batch_size):
+            total += count
+            self.stdout.write(f'  перенесено постов: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, перенесено постов: {total}.'
+        ))
@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.images import generate_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт адаптивные варианты для всех картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов.',
+        )
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(settings.MEDIA_ROOT, '.image_variants_done'),
+            help='Файл с уже обработанными картинками для продолжения.',
+        )
+
+    def handle(self, *args, workers, state_file, **options):
+        done = set()
+        if os.path.exists(state_file):
+            with open(state_file, encoding='utf-8') as state:
+                done = {line.rstrip('\n') for line in state}
+        names = [
+            name for name in Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).distinct().order_by('image').iterator()
+            if name not in done
+        ]
+        total = len(names)
+        self.stdout.write(
+            f'Готово ранее: {len(done)}, осталось: {total}.'
+        )
+        failed = 0
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        os.makedirs(os.path.dirname(state_file), exist_ok=True)
+        with open(state_file, 'a', encoding='utf-8') as state, \
+                ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            results = pool.map(generate_variants, names, chunksize=8)
+            for number, (name, error) in enumerate(results, start=1):
+                if error is None:
+                    state.write(f'{name}\n')
+                    state.flush()
+                else:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                self.stdout.write(f'[{number}/{total}] {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {total - failed}, с ошибками: {failed}.'
+        ))
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template.loader import get_template
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from posts.models import Post
+from posts.views import POSTS_PER_PAGE
+
+ENGINES = ('django', 'jinja2')
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендера страницы ленты шаблонами Django и '
+        'Jinja2. Кэш фрагментов на время замера отключён.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, repeat, **options):
+        posts = list(
+            Post.objects.visible().select_related('author', 'group')[
+                :POSTS_PER_PAGE
+            ]
+        )
+        if not posts:
+            raise CommandError('Нет постов для замера.')
+        page_obj = Paginator(posts * 10, POSTS_PER_PAGE).page(1)
+        post = posts[0]
+        feeds = [
+            ('posts/index.html', reverse('posts:index'), {}),
+            (
+                'posts/profile.html',
+                reverse('posts:profile', args=[post.author.username]),
+                {'author': post.author, 'following': False},
+            ),
+        ]
+        if post.group:
+            feeds.append((
+                'posts/group_list.html',
+                reverse('posts:group_list', args=[post.group.slug]),
+                {'group': post.group},
+            ))
+        with override_settings(CACHES=DUMMY_CACHES):
+            for template_name, url, context in feeds:
+                request = RequestFactory().get(url)
+                request.user = AnonymousUser()
+                request.resolver_match = resolve(url)
+                context = {**context, 'page_obj': page_obj}
+                self.stdout.write(template_name)
+                for engine in ENGINES:
+                    template = get_template(template_name, using=engine)
+                    template.render(context, request)
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        template.render(context, request)
+                    elapsed = (time.perf_counter() - start) / repeat
+                    self.stdout.write(
+                        f'  {engine:>6}: {elapsed * 1000:7.3f} мс на страницу'
+                    )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import claim_deletion, run_deletion, schedule_deletion
+from posts.models import DeletionTask
+
+
+class Command(BaseCommand):
+    help = (
+        'Пошагово удаляет пользователя, группу или пост вместе со всеми '
+        'зависимыми строками. Без аргументов продолжает начатые удаления.'
+    )
+
+    def add_arguments(self, parser):
+        for target_type, label in DeletionTask.TARGET_CHOICES:
+            parser.add_argument(
+                f'--{target_type}',
+                type=int,
+                action='append',
+                default=[],
+                help=f'{label}: идентификатор для удаления.',
+            )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, batch_size=None, **options):
+        for target_type, _ in DeletionTask.TARGET_CHOICES:
+            for target_id in options[target_type]:
+                schedule_deletion(target_type, target_id)
+        for task in DeletionTask.objects.filter(finished=None):
+            if not claim_deletion(task):
+                self.stdout.write(f'{task}: уже выполняется, пропускаем.')
+                continue
+            self.stdout.write(f'{task}: удаляем...')
+            run_deletion(task, batch_size, progress=self.report)
+            self.stdout.write(self.style.SUCCESS(
+                f'{task}: удалено строк {task.deleted_rows}.'
+            ))
+
+    def report(self, task):
+        self.stdout.write(f'  {task}: удалено строк {task.deleted_rows}')
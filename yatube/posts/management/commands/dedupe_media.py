@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import IMAGE_MODELS
+from posts.storage import post_image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов и архивных постов под имена из хеша '
+        'содержимого и удаляет дубликаты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет сделано.',
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        storage = post_image_storage
+        names = set()
+        for model in IMAGE_MODELS:
+            names.update(model.objects.exclude(image='').values_list(
+                'image', flat=True
+            ))
+        moved = duplicates = freed = 0
+        for name in sorted(names):
+            if storage.is_hashed_name(name):
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f'Нет файла: {name}')
+                continue
+            with storage.open(name) as content:
+                hashed = storage.hashed_name(name, content)
+                if storage.exists(hashed):
+                    duplicates += 1
+                    freed += storage.size(name)
+                else:
+                    moved += 1
+                if not dry_run:
+                    hashed = storage.save(name, content)
+            self.stdout.write(f'{name} -> {hashed}')
+            if not dry_run:
+                for model in IMAGE_MODELS:
+                    model.objects.filter(image=name).update(image=hashed)
+                storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено: {moved}, дубликатов удалено: {duplicates}, '
+            f'освобождено байт: {freed}. Старые миниатюры можно удалить '
+            f'командой thumbnail cleanup.'
+        ))
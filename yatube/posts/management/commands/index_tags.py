@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.tags import index_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает #теги и @упоминания уже сохранённых постов. Посты '
+        'читаются потоком по первичному ключу, пачками; повторный запуск '
+        'ничего не дублирует.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        for model in (Post, ArchivedPost):
+            query_set = model.objects.only(
+                'text', 'pub_date'
+            ).order_by('pk')
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(query_set.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                index_posts(batch)
+                last_pk = batch[-1].pk
+                total += len(batch)
+                self.stdout.write(
+                    f'  {model._meta.verbose_name_plural}: {total}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: разобрано {total}.'
+            ))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import rendering
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Post, mentioned_usernames
+)
+
+# Поля HTML каждой модели; ссылки на теги и упоминания есть только в
+# постах.
+RENDERED_FIELDS = {
+    Post: ('text_html', 'excerpt_html'),
+    ArchivedPost: ('text_html', 'excerpt_html'),
+    Comment: ('text_html',),
+    ArchivedComment: ('text_html',),
+}
+
+
+def render_fields(instance, fields, usernames):
+    """Заполняет поля HTML fields по тексту instance."""
+    instance.text_html = rendering.render_text(instance.text, usernames)
+    if 'excerpt_html' in fields:
+        instance.excerpt_html = rendering.render_excerpt(
+            instance.text, usernames
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет HTML текста постов и комментариев, сохранённых до '
+        'появления этих полей. Повторный запуск продолжает с места '
+        'остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перерисовать все строки, а не только пустые.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        for model, fields in RENDERED_FIELDS.items():
+            query_set = model.objects.only('text').order_by('pk')
+            if not options['all']:
+                query_set = query_set.filter(text_html='')
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(query_set.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                usernames = None
+                if 'excerpt_html' in fields:
+                    usernames = mentioned_usernames(
+                        *(instance.text for instance in batch)
+                    )
+                for instance in batch:
+                    render_fields(instance, fields, usernames)
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, fields)
+                last_pk = batch[-1].pk
+                total += len(batch)
+                self.stdout.write(
+                    f'  {model._meta.verbose_name_plural}: {total}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обновлено {total}.'
+            ))
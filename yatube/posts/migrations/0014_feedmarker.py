@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_post_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedMarker',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen_post_id', models.PositiveIntegerField(default=0, verbose_name='Последний просмотренный пост')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='feed_marker', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Отметка ленты подписок',
+                'verbose_name_plural': 'Отметки ленты подписок',
+            },
+        ),
+    ]
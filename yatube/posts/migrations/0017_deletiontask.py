@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа'), ('post', 'Пост')], max_length=10, verbose_name='Что удаляем')),
+                ('target_id', models.PositiveIntegerField(verbose_name='Идентификатор')),
+                ('deleted_rows', models.PositiveIntegerField(default=0, verbose_name='Удалено строк')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'verbose_name': 'Задача удаления',
+                'verbose_name_plural': 'Задачи удаления',
+                'ordering': ('created',),
+            },
+        ),
+    ]
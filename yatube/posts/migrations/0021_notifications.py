@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0020_tags_mentions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.PositiveIntegerField(verbose_name='Пост')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление о посте',
+                'verbose_name_plural': 'Уведомления о постах',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postnotification',
+            constraint=models.UniqueConstraint(fields=('recipient', 'post_id'), name='unique_post_notification'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+ROOT_KEY_MAX = 10 ** 10 - 1
+
+
+def fill_root_paths(apps, schema_editor):
+    """Существующие комментарии становятся корнями веток."""
+    for model_name in ('Comment', 'ArchivedComment'):
+        model = apps.get_model('posts', model_name)
+        comments = []
+        for comment in model.objects.only('pk').iterator():
+            comment.path = str(ROOT_KEY_MAX - comment.pk).zfill(10)
+            comments.append(comment)
+            if len(comments) == 500:
+                model.objects.bulk_update(comments, ['path'])
+                comments = []
+        model.objects.bulk_update(comments, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_notifications'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='archivedcomment',
+            options={'ordering': ('path',), 'verbose_name': 'Архивный комментарий', 'verbose_name_plural': 'Архивные комментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'default_related_name': 'comments', 'ordering': ('path',), 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Комментарии'},
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.ArchivedComment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='path',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ответов'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ответов'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'path'], name='archived_comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='archived_comment_root_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='comment_root_idx'),
+        ),
+        migrations.RunPython(fill_root_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0022_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.PositiveIntegerField(verbose_name='Пост')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('love', '❤️'), ('laugh', '😂'), ('sad', '😢')], max_length=10, verbose_name='Реакция')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+            ],
+            options={
+                'verbose_name': 'Реакция',
+                'verbose_name_plural': 'Реакции',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReactionCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.PositiveIntegerField(verbose_name='Пост')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('love', '❤️'), ('laugh', '😂'), ('sad', '😢')], max_length=10, verbose_name='Реакция')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Шард')),
+                ('count', models.IntegerField(default=0, verbose_name='Изменение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик реакций',
+                'verbose_name_plural': 'Счётчики реакций',
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='reaction_counts',
+            field=models.TextField(default='{}', verbose_name='Реакции по видам'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='score',
+            field=models.PositiveIntegerField(default=0, verbose_name='Реакций'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reaction_counts',
+            field=models.TextField(default='{}', editable=False, verbose_name='Реакции по видам'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Реакций'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-score', '-pub_date'], name='post_group_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-score', '-pub_date'], name='post_author_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reactioncounter',
+            constraint=models.UniqueConstraint(fields=('post_id', 'kind', 'shard'), name='unique_reaction_counter_shard'),
+        ),
+        migrations.AddField(
+            model_name='reaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='reaction',
+            index=models.Index(fields=['post_id'], name='reaction_post_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('user', 'post_id', 'kind'), name='unique_user_post_reaction'),
+        ),
+    ]
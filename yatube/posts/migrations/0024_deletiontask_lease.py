@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_reactions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletiontask',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Выполняется до'),
+        ),
+    ]
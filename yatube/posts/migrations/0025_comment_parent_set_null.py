@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_deletiontask_lease'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replies', to='posts.ArchivedComment', verbose_name='Ответ на'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+    ]
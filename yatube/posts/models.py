@@ -1,9 +1,47 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+from posts import rendering
+from posts.storage import post_image_storage
 
 User = get_user_model()
 
 
+class VersionConflict(Exception):
+    """Пост изменили после того, как его прочитал редактирующий."""
+
+
+def mentioned_usernames(*texts):
+    """Существующие пользователи, упомянутые в текстах."""
+    names = set().union(*map(rendering.parse_mentions, texts))
+    if not names:
+        return set()
+    return set(User.objects.filter(
+        username__in=names
+    ).values_list('username', flat=True))
+
+
+REACTION_CHOICES = (
+    ('like', '👍'),
+    ('love', '❤️'),
+    ('laugh', '😂'),
+    ('sad', '😢'),
+)
+
+
+def reaction_summary(reaction_counts):
+    """Тройки (вид, значок, число) для всех видов реакций поста."""
+    counts = json.loads(reaction_counts or '{}')
+    return [
+        (kind, label, counts.get(kind, 0))
+        for kind, label in REACTION_CHOICES
+    ]
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название')
     slug = models.SlugField(unique=True, verbose_name='Идентификатор')
@@ -21,9 +59,33 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Посты, которые показываются в лентах: автор не удаляется."""
+        return self.filter(author__is_active=True)
+
+    def for_feed(self):
+        """Без полного текста: лентам хватает excerpt_html."""
+        return self.defer('text', 'text_html')
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
-    pub_date = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML'
+    )
+    excerpt_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста в HTML'
+    )
+    pub_date = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,15 +100,58 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True,
+        db_index=True,
         verbose_name='Картинка'
     )
+    views = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Версия'
+    )
+    score = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Реакций'
+    )
+    reaction_counts = models.TextField(
+        default='{}',
+        editable=False,
+        verbose_name='Реакции по видам'
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    is_archived = False
+
+    # Меняются только UPDATE в базе: просмотры, версия и реакции.
+    MAINTAINED_FIELDS = ('views', 'version', 'score', 'reaction_counts')
 
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'posts'
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('group', '-score', '-pub_date'),
+                name='post_group_score_idx'
+            ),
+            models.Index(
+                fields=('author', '-score', '-pub_date'),
+                name='post_author_score_idx'
+            ),
+        )
 
     def __str__(self):
         return '{:.15} Автор: {}, дата: {:%d-%m-%Y %H:%M}.'.format(
@@ -55,8 +160,113 @@ class Post(models.Model):
             self.pub_date
         )
 
+    @property
+    def cache_key(self):
+        """Ключ для кэшей, зависящих от содержимого поста."""
+        return f'post:{self.pk}:{self.version}'
+
+    @property
+    def reactions(self):
+        return reaction_summary(self.reaction_counts)
+
+    def render_text(self, update_fields=None):
+        """Пересчитывает HTML текста, если текст сохраняется.
+
+        Возвращает update_fields вместе с полями HTML.
+        """
+        if update_fields is not None and 'text' not in update_fields:
+            return update_fields
+        usernames = mentioned_usernames(self.text)
+        self.text_html = rendering.render_text(self.text, usernames)
+        self.excerpt_html = rendering.render_excerpt(self.text, usernames)
+        if update_fields is None:
+            return None
+        return [*update_fields, 'text_html', 'excerpt_html']
+
+    def save(self, *args, **kwargs):
+        """Сохраняет пост, не затирая счётчики из MAINTAINED_FIELDS.
+
+        Полное сохранение существующего поста (например, из админки)
+        пишет все поля, кроме счётчиков, а версию повышает UPDATE в базе:
+        объект мог быть прочитан до того, как их изменили.
+        """
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding or update_fields is not None:
+            kwargs['update_fields'] = self.render_text(update_fields)
+            super().save(*args, **kwargs)
+            return
+        deferred = self.get_deferred_fields()
+        kwargs['update_fields'] = self.render_text([
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname not in deferred
+            and field.name not in self.MAINTAINED_FIELDS
+        ])
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            posts = Post.objects.filter(pk=self.pk)
+            posts.update(version=F('version') + 1)
+            self.version = posts.values_list('version', flat=True).get()
+
+    def save_versioned(self, expected_version, update_fields):
+        """Сохраняет только update_fields, если версия в БД совпадает.
+
+        Версия повышается условным UPDATE: из двух одновременных правок
+        одной версии пройдёт первая, вторая получит VersionConflict.
+        """
+        with transaction.atomic():
+            updated = Post.objects.filter(
+                pk=self.pk,
+                version=expected_version
+            ).update(version=expected_version + 1)
+            if not updated:
+                raise VersionConflict
+            self.version = expected_version + 1
+            super().save(update_fields=self.render_text(
+                [*update_fields, 'updated_at']
+            ))
+
+
+PATH_SEGMENT_WIDTH = 10
+ROOT_KEY_MAX = 10 ** PATH_SEGMENT_WIDTH - 1
+
+
+def path_segment(pk, root=False):
+    """Сегмент пути комментария фиксированной ширины.
+
+    У корня ключ обратный id, поэтому сортировка по пути ставит новые
+    ветки первыми, а ответы внутри ветки идут по порядку.
+    """
+    key = ROOT_KEY_MAX - pk if root else pk
+    return str(key).zfill(PATH_SEGMENT_WIDTH)
+
+
+def path_ancestors(path):
+    """id предков комментария по его пути, от корня."""
+    segments = [
+        int(path[start:start + PATH_SEGMENT_WIDTH])
+        for start in range(0, len(path), PATH_SEGMENT_WIDTH)
+    ][:-1]
+    if segments:
+        segments[0] = ROOT_KEY_MAX - segments[0]
+    return segments
+
+
+def subtree_end(path):
+    """Верхняя граница диапазона путей поддерева path."""
+    return path + '~'
+
 
 class Comment(models.Model):
+    """Комментарий или ответ на комментарий.
+
+    Ветка хранится материализованным путём: путь ответа — путь родителя
+    и сегмент его id. Поддерево — диапазон путей от path до
+    subtree_end(path), страница веток читается одним запросом по
+    индексу (post, path). reply_count — число всех ответов в поддереве.
+    Удаление комментария не удаляет ответы: у них обнуляется parent, а
+    путь остаётся прежним, и на месте удалённого показывается пометка.
+    """
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -67,19 +277,239 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Автор комментария'
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Путь в ветке'
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Глубина'
+    )
+    reply_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Ответов'
+    )
     text = models.TextField(
         verbose_name='Текст комментария'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML'
+    )
     created = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата комментария'
     )
 
     class Meta:
-        ordering = ('-created',)
+        ordering = ('path',)
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'path'),
+                name='comment_thread_idx'
+            ),
+            models.Index(
+                fields=('post', 'depth', 'path'),
+                name='comment_root_idx'
+            ),
+        )
+
+    def __str__(self):
+        return '{:.15} Автор: {}, дата: {:%d-%m-%Y %H:%M}.'.format(
+            self.text,
+            self.author.username,
+            self.created
+        )
+
+    @property
+    def parent_removed(self):
+        """Ответ, родительский комментарий которого удалён."""
+        return self.parent_id is None and len(self.path) > PATH_SEGMENT_WIDTH
+
+    def reply_to(self, parent):
+        """Делает комментарий ответом на parent.
+
+        Ответ глубже COMMENT_MAX_DEPTH становится соседом parent. Уровень
+        считается по длине пути: после удаления предков parent у ответов
+        пуст, а depth ответов удалённого корня сбрасывается, путь же
+        остаётся прежним. path до сохранения — путь будущего родителя.
+        """
+        path = parent.path
+        if len(path) // PATH_SEGMENT_WIDTH > settings.COMMENT_MAX_DEPTH:
+            path = path[:-PATH_SEGMENT_WIDTH]
+            self.parent = parent.parent
+            self.depth = parent.depth
+        else:
+            self.parent = parent
+            self.depth = parent.depth + 1
+        self.path = path
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.text_html = rendering.render_text(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'text_html']
+        if self.pk is not None:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = (
+                self.path + path_segment(self.pk)
+                if self.path
+                else path_segment(self.pk, root=True)
+            )
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            Comment.objects.filter(
+                pk__in=path_ancestors(self.path)
+            ).update(reply_count=F('reply_count') + 1)
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из posts_post командой archive_posts.
+
+    Идентификатор сохраняется: AUTOINCREMENT в posts_post не выдаёт
+    номера удалённых строк повторно, так что id поста однозначен по обеим
+    таблицам.
+    """
+    id = models.PositiveIntegerField(primary_key=True, verbose_name='ID')
+    text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField(blank=True, verbose_name='Текст в HTML')
+    excerpt_html = models.TextField(
+        blank=True,
+        verbose_name='Начало текста в HTML'
+    )
+    pub_date = models.DateTimeField(db_index=True, verbose_name='Дата')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        upload_to='posts/',
+        storage=post_image_storage,
+        blank=True,
+        db_index=True,
+        verbose_name='Картинка'
+    )
+    views = models.PositiveIntegerField(default=0, verbose_name='Просмотры')
+    updated_at = models.DateTimeField(verbose_name='Дата изменения')
+    version = models.PositiveIntegerField(default=1, verbose_name='Версия')
+    score = models.PositiveIntegerField(default=0, verbose_name='Реакций')
+    reaction_counts = models.TextField(
+        default='{}',
+        verbose_name='Реакции по видам'
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return '{:.15} Автор: {}, дата: {:%d-%m-%Y %H:%M}.'.format(
+            self.text,
+            self.author.username,
+            self.pub_date
+        )
+
+    @property
+    def cache_key(self):
+        """Тот же ключ, что и у поста до переноса: содержимое не менялось."""
+        return f'post:{self.pk}:{self.version}'
+
+    @property
+    def reactions(self):
+        return reaction_summary(self.reaction_counts)
+
+
+class ArchivedComment(models.Model):
+    id = models.PositiveIntegerField(primary_key=True, verbose_name='ID')
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Комментируемый пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор комментария'
+    )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Путь в ветке'
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Глубина'
+    )
+    reply_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ответов'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    text_html = models.TextField(blank=True, verbose_name='Текст в HTML')
+    created = models.DateTimeField(
+        db_index=True,
+        verbose_name='Дата комментария'
+    )
+
+    class Meta:
+        ordering = ('path',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'path'),
+                name='archived_comment_thread_idx'
+            ),
+            models.Index(
+                fields=('post', 'depth', 'path'),
+                name='archived_comment_root_idx'
+            ),
+        )
 
     def __str__(self):
         return '{:.15} Автор: {}, дата: {:%d-%m-%Y %H:%M}.'.format(
@@ -88,6 +518,175 @@ class Comment(models.Model):
             self.created
         )
 
+    parent_removed = Comment.parent_removed
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Тег'
+    )
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Тег поста.
+
+    post_id — id поста в горячей или архивной таблице, поэтому без
+    внешнего ключа; pub_date скопирована из поста для ленты тега по
+    индексу (tag, pub_date, post_id).
+    """
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег'
+    )
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    pub_date = models.DateTimeField(verbose_name='Дата поста')
+
+    class Meta:
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post_id', 'tag'],
+                name='unique_post_tag',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post_id'],
+                name='post_tag_feed_idx',
+            ),
+        ]
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте; устроено как PostTag."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь'
+    )
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    pub_date = models.DateTimeField(verbose_name='Дата поста')
+
+    class Meta:
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post_id', 'user'],
+                name='unique_post_mention',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post_id'],
+                name='mention_feed_idx',
+            ),
+        ]
+
+
+class PostNotification(models.Model):
+    """Новый пост автора, на которого подписан recipient, ещё не
+    попавший в письмо-дайджест."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_notifications',
+        verbose_name='Получатель'
+    )
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата'
+    )
+
+    class Meta:
+        verbose_name = 'Уведомление о посте'
+        verbose_name_plural = 'Уведомления о постах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'post_id'],
+                name='unique_post_notification',
+            ),
+        ]
+
+
+class Reaction(models.Model):
+    """Реакция пользователя на пост; post_id — как у PostTag.
+
+    Строки только вставляются и удаляются, счётчики поста меняются через
+    ReactionCounter, поэтому одновременные реакции на один пост не ждут
+    друг друга на одной строке.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь'
+    )
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    kind = models.CharField(
+        max_length=10,
+        choices=REACTION_CHOICES,
+        verbose_name='Реакция'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата'
+    )
+
+    class Meta:
+        verbose_name = 'Реакция'
+        verbose_name_plural = 'Реакции'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post_id', 'kind'],
+                name='unique_user_post_reaction',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['post_id'], name='reaction_post_idx'),
+        ]
+
+
+class ReactionCounter(models.Model):
+    """Несведённое изменение числа реакций вида kind на пост.
+
+    Каждая реакция меняет случайный из REACTION_COUNTER_SHARDS шардов,
+    задача posts.merge_reactions переносит суммы в Post.reaction_counts
+    и Post.score.
+    """
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    kind = models.CharField(
+        max_length=10,
+        choices=REACTION_CHOICES,
+        verbose_name='Реакция'
+    )
+    shard = models.PositiveSmallIntegerField(verbose_name='Шард')
+    count = models.IntegerField(default=0, verbose_name='Изменение')
+
+    class Meta:
+        verbose_name = 'Счётчик реакций'
+        verbose_name_plural = 'Счётчики реакций'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post_id', 'kind', 'shard'],
+                name='unique_reaction_counter_shard',
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -116,3 +715,64 @@ class Follow(models.Model):
                 name='check_not_equal_author_user',
             ),
         ]
+
+
+class FeedMarker(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_marker',
+        verbose_name='Пользователь'
+    )
+    last_seen_post_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний просмотренный пост'
+    )
+
+    class Meta:
+        verbose_name = 'Отметка ленты подписок'
+        verbose_name_plural = 'Отметки ленты подписок'
+
+
+class DeletionTask(models.Model):
+    USER = 'user'
+    GROUP = 'group'
+    POST = 'post'
+    TARGET_CHOICES = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+        (POST, 'Пост'),
+    )
+    target_type = models.CharField(
+        max_length=10,
+        choices=TARGET_CHOICES,
+        verbose_name='Что удаляем'
+    )
+    target_id = models.PositiveIntegerField(verbose_name='Идентификатор')
+    deleted_rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено строк'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки'
+    )
+    finished = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата завершения'
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Выполняется до'
+    )
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self):
+        return f'{self.get_target_type_display()} #{self.target_id}'
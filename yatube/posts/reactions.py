@@ -0,0 +1,127 @@
+"""Реакции на посты с шардированными счётчиками.
+
+Реакция — строка Reaction, уникальная по (пользователь, пост, вид).
+Изменение числа реакций пишется не в строку поста, а в случайный из
+REACTION_COUNTER_SHARDS шардов ReactionCounter: у горячего поста
+одновременные реакции обновляют разные строки. merge_reactions
+периодически сводит шарды в Post.reaction_counts и Post.score.
+"""
+import json
+import random
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from posts.models import ArchivedPost, Post, Reaction, ReactionCounter
+
+# SQLite ограничивает число параметров в одном запросе.
+UPDATE_BATCH_SIZE = 500
+
+
+def toggle_reaction(user, post_id, kind):
+    """Ставит реакцию или снимает уже поставленную.
+
+    Счётчик меняет обработчик сигналов Reaction. Возвращает True, если
+    реакция теперь стоит.
+    """
+    with transaction.atomic():
+        deleted, _ = Reaction.objects.filter(
+            user=user, post_id=post_id, kind=kind
+        ).delete()
+        if deleted:
+            return False
+        try:
+            with transaction.atomic():
+                Reaction.objects.create(user=user, post_id=post_id, kind=kind)
+        except IntegrityError:
+            pass
+    return True
+
+
+def add_to_counter(post_id, kind, delta):
+    """Прибавляет delta к случайному шарду счётчика."""
+    shard = {
+        'post_id': post_id,
+        'kind': kind,
+        'shard': random.randrange(settings.REACTION_COUNTER_SHARDS),
+    }
+    counter = ReactionCounter.objects.filter(**shard)
+    if counter.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(count=delta, **shard)
+    except IntegrityError:
+        counter.update(count=F('count') + delta)
+
+
+def apply_counts(model, totals):
+    """Добавляет изменения totals {post_id: Counter} к постам model."""
+    posts = list(
+        model.objects.filter(pk__in=totals).only(
+            'pk', 'score', 'reaction_counts'
+        )
+    )
+    for post in posts:
+        counts = json.loads(post.reaction_counts or '{}')
+        for kind, delta in totals[post.pk].items():
+            counts[kind] = counts.get(kind, 0) + delta
+        counts = {kind: count for kind, count in counts.items() if count > 0}
+        post.reaction_counts = json.dumps(counts, sort_keys=True)
+        post.score = sum(counts.values())
+    model.objects.bulk_update(
+        posts, ['score', 'reaction_counts'], batch_size=UPDATE_BATCH_SIZE
+    )
+
+
+def merge_reactions(batch_size=None):
+    """Сводит ненулевые шарды в счётчики постов.
+
+    Каждая пачка сводится в своей транзакции: из шардов вычитается
+    прочитанное, а не обнуляется, так что реакции, пришедшие во время
+    сведения, не теряются. Шарды удалённых постов просто обнуляются.
+    Возвращает число сведённых шардов.
+    """
+    batch_size = batch_size or settings.REACTION_MERGE_BATCH_SIZE
+    merged = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ReactionCounter.objects.exclude(count=0).order_by(
+                    'pk'
+                ).values_list('pk', 'post_id', 'kind', 'count')[:batch_size]
+            )
+            by_count = defaultdict(list)
+            totals = defaultdict(Counter)
+            for pk, post_id, kind, count in rows:
+                by_count[count].append(pk)
+                totals[post_id][kind] += count
+            for count, pks in by_count.items():
+                ReactionCounter.objects.filter(pk__in=pks).update(
+                    count=F('count') - count
+                )
+            for model in (Post, ArchivedPost):
+                apply_counts(model, totals)
+            ReactionCounter.objects.filter(count=0).delete()
+        merged += len(rows)
+        if len(rows) < batch_size:
+            return merged
+
+
+def forget_reactions(post_ids):
+    """Удаляет реакции и шарды удалённых постов."""
+    Reaction.objects.filter(post_id__in=post_ids).delete()
+    ReactionCounter.objects.filter(post_id__in=post_ids).delete()
+
+
+def user_reactions(user, post):
+    """Виды реакций пользователя на пост."""
+    if not user.is_authenticated:
+        return set()
+    return set(
+        Reaction.objects.filter(user=user, post_id=post.pk).values_list(
+            'kind', flat=True
+        )
+    )
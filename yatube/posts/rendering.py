@@ -0,0 +1,62 @@
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import linebreaks
+
+TAG_RE = re.compile(r'(?<![\w&#])#(\w{1,50})')
+MENTION_RE = re.compile(r'(?<![\w@])@(\w[\w.+-]{0,148}\w|\w)')
+
+
+def parse_tags(text):
+    """Нормализованные имена #тегов в тексте."""
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def parse_mentions(text):
+    """Имена пользователей, упомянутых через @."""
+    return set(MENTION_RE.findall(text))
+
+
+def linkify(html, usernames):
+    """Ссылки на ленты тегов и на профили упомянутых пользователей.
+
+    Работает по уже экранированному HTML: имена тегов и пользователей не
+    содержат символов, которые меняет экранирование. Ссылкой становится
+    только упоминание существующего пользователя из usernames.
+    """
+    html = TAG_RE.sub(
+        lambda match: '<a href="{}">#{}</a>'.format(
+            reverse('posts:tag_feed', args=[match[1].lower()]),
+            match[1]
+        ),
+        html
+    )
+    if not usernames:
+        return html
+    return MENTION_RE.sub(
+        lambda match: '<a href="{}">@{}</a>'.format(
+            reverse('posts:profile', args=[match[1]]),
+            match[1]
+        ) if match[1] in usernames else match[0],
+        html
+    )
+
+
+def render_text(text, usernames=None):
+    """HTML текста: то же, что фильтр linebreaks в шаблоне.
+
+    Если передан usernames, теги и упоминания становятся ссылками.
+    """
+    html = linebreaks(text, autoescape=True)
+    if usernames is None:
+        return html
+    return linkify(html, usernames)
+
+
+def render_excerpt(text, usernames=None):
+    """HTML начала текста для лент."""
+    length = settings.POST_EXCERPT_LENGTH
+    if len(text) > length:
+        text = text[:length - 1].rstrip() + '…'
+    return render_text(text, usernames)
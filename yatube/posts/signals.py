@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.paginator import ARCHIVE_COUNT_GENERATION_KEY, invalidate_counts
+from jobs.queue import enqueue
+from posts.models import (
+    PATH_SEGMENT_WIDTH, ArchivedComment, ArchivedPost, Comment, Follow, Post,
+    Reaction, path_ancestors, subtree_end
+)
+from posts.reactions import add_to_counter, forget_reactions
+from posts.tags import forget_posts, sync_tags
+from posts.unread import forget_latest_post_id
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, update_fields, **kwargs):
+    if instance.pk is None or (
+        update_fields is not None and 'image' not in update_fields
+    ):
+        return
+    instance._replaced_image = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, update_fields, **kwargs):
+    """Пересчитывает теги и упоминания, если сохраняется текст.
+
+    Индекс не отстаёт от текста, откуда бы пост ни правили: из формы,
+    админки или кода.
+    """
+    if created or update_fields is None or 'text' in update_fields:
+        sync_tags(instance)
+    if created:
+        forget_latest_post_id()
+        invalidate_counts()
+        transaction.on_commit(lambda: enqueue(
+            'posts.notify_followers',
+            {'post_id': instance.pk},
+            key=f'notify:{instance.pk}'
+        ))
+    replaced = vars(instance).pop('_replaced_image', None)
+    image = instance.image.name
+    if image and (created or replaced not in (None, image)):
+        transaction.on_commit(lambda: enqueue(
+            'posts.generate_image_variants',
+            {'name': image},
+            key=f'variants:{image}'
+        ))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_counts()
+    if sender is ArchivedPost:
+        invalidate_counts(ARCHIVE_COUNT_GENERATION_KEY)
+    archived = sender is Post and ArchivedPost.objects.filter(
+        pk=instance.pk
+    ).exists()
+    if not archived:
+        forget_posts([instance.pk])
+        forget_reactions([instance.pk])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, **kwargs):
+    invalidate_counts()
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ArchivedComment)
+def comment_deleted(sender, instance, **kwargs):
+    """Уменьшает reply_count предков удалённого ответа.
+
+    Ответы удалённого комментария остаются на месте. Прямые ответы
+    удалённого корня сами становятся корнями, чтобы их ветки оставались
+    на странице веток.
+    """
+    if instance.depth:
+        sender.objects.filter(
+            pk__in=path_ancestors(instance.path)
+        ).update(reply_count=F('reply_count') - 1)
+        return
+    child_path_length = len(instance.path) + PATH_SEGMENT_WIDTH
+    orphans = sender.objects.filter(
+        post_id=instance.post_id,
+        parent=None,
+        path__gt=instance.path,
+        path__lt=subtree_end(instance.path),
+    ).values_list('pk', 'path')
+    sender.objects.filter(pk__in=[
+        pk for pk, path in orphans if len(path) == child_path_length
+    ]).update(depth=0)
+
+
+@receiver(post_save, sender=Reaction)
+def reaction_added(sender, instance, created, **kwargs):
+    if created:
+        add_to_counter(instance.post_id, instance.kind, 1)
+
+
+@receiver(post_delete, sender=Reaction)
+def reaction_removed(sender, instance, **kwargs):
+    add_to_counter(instance.post_id, instance.kind, -1)
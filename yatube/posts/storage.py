@@ -0,0 +1,115 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME_RE = re.compile(
+    r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$'
+)
+
+
+def content_hash(content):
+    sha = hashlib.sha256()
+    for chunk in content.chunks():
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу содержимого.
+
+    posts/kitten.jpg сохраняется как posts/ab/cd/abcd....jpg. Повторная
+    загрузка того же файла не пишет на диск ничего и возвращает имя уже
+    сохранённого объекта, так что все такие посты ссылаются на один файл
+    и одни и те же миниатюры. Файлы без ссылок удаляет не сохранение
+    поста, а периодическая задача posts.sweep_images.
+    """
+
+    def hashed_name(self, name, content):
+        digest = content_hash(content)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def is_hashed_name(self, name):
+        return bool(HASHED_NAME_RE.search(name))
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.touch(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def touch(self, name):
+        """Обновляет время изменения файла, если он есть.
+
+        Так уборка файлов без ссылок не удалит файл, пост которого ещё
+        не сохранён.
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get_available_name(self, name, max_length=None):
+        """Хешированное имя не меняется: такой файл уже тот же самый."""
+        if self.is_hashed_name(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        """Пишет файл во временный и ставит его под имя через os.link.
+
+        Одновременная загрузка того же содержимого получает то же имя, а
+        не name_xxxx, и никто не видит недописанный файл.
+        """
+        if not self.is_hashed_name(name):
+            return super()._save(name, content)
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    temp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                self.touch(name)
+        finally:
+            os.remove(temp_path)
+        return name
+
+    def hashed_names(self, directory=''):
+        """Имена всех файлов с хешированными именами в directory."""
+        root = self.path(directory)
+        for path, _, files in os.walk(root):
+            for filename in files:
+                name = os.path.relpath(
+                    os.path.join(path, filename), self.location
+                ).replace(os.sep, '/')
+                if self.is_hashed_name(name):
+                    yield name
+
+    def modified_at(self, name):
+        """Время изменения файла в секундах или None, если его нет."""
+        try:
+            return os.stat(self.path(name)).st_mtime
+        except FileNotFoundError:
+            return None
+
+
+post_image_storage = ContentAddressedStorage()
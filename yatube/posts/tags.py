@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Q
+
+from posts.models import ArchivedPost, Mention, Post, PostTag, Tag, User
+from posts.rendering import parse_mentions, parse_tags
+
+
+def index_posts(posts):
+    """Записывает теги и упоминания пачки постов.
+
+    Уже записанные строки не трогает, поэтому пачку можно обработать
+    повторно. На пачку уходит фиксированное число запросов.
+    """
+    tag_names = {post.pk: parse_tags(post.text) for post in posts}
+    usernames = {post.pk: parse_mentions(post.text) for post in posts}
+    all_tags = set().union(*tag_names.values())
+    if all_tags:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in all_tags],
+            ignore_conflicts=True
+        )
+    tags = dict(
+        Tag.objects.filter(name__in=all_tags).values_list('name', 'pk')
+    )
+    users = dict(User.objects.filter(
+        username__in=set().union(*usernames.values())
+    ).values_list('username', 'pk'))
+    PostTag.objects.bulk_create(
+        [
+            PostTag(
+                tag_id=tags[name], post_id=post.pk, pub_date=post.pub_date
+            )
+            for post in posts
+            for name in tag_names[post.pk]
+        ],
+        ignore_conflicts=True
+    )
+    Mention.objects.bulk_create(
+        [
+            Mention(
+                user_id=users[name], post_id=post.pk, pub_date=post.pub_date
+            )
+            for post in posts
+            for name in usernames[post.pk]
+            if name in users
+        ],
+        ignore_conflicts=True
+    )
+
+
+def forget_posts(post_ids):
+    PostTag.objects.filter(post_id__in=post_ids).delete()
+    Mention.objects.filter(post_id__in=post_ids).delete()
+
+
+def sync_tags(post):
+    """Приводит теги и упоминания поста в соответствие с его текстом."""
+    with transaction.atomic():
+        forget_posts([post.pk])
+        index_posts([post])
+
+
+def keyset_page(rows, before=None, per_page=10):
+    """Страница id постов по убыванию (pub_date, post_id).
+
+    rows — строки PostTag или Mention одной ленты. Курсор before — id
+    последнего поста предыдущей страницы, страница читается по индексу
+    ленты без OFFSET. Возвращает id постов и признак следующей страницы.
+    """
+    if before:
+        anchor = rows.filter(post_id=before).values_list(
+            'pub_date', flat=True
+        ).first()
+        if anchor is not None:
+            rows = rows.filter(
+                Q(pub_date__lt=anchor) | Q(pub_date=anchor, post_id__lt=before)
+            )
+    post_ids = list(rows.order_by('-pub_date', '-post_id').values_list(
+        'post_id', flat=True
+    )[:per_page + 1])
+    return post_ids[:per_page], len(post_ids) > per_page
+
+
+def posts_by_ids(post_ids, full_text=False):
+    """Посты по id из горячей и архивной таблиц в порядке post_ids.
+
+    Полный текст загружается, только если нужен (full_text).
+    """
+    found = {}
+    for model in (Post, ArchivedPost):
+        missing = [pk for pk in post_ids if pk not in found]
+        if not missing:
+            break
+        posts = model.objects.visible().select_related('author', 'group')
+        if not full_text:
+            posts = posts.for_feed()
+        found.update(
+            (post.pk, post) for post in posts.filter(pk__in=missing)
+        )
+    return [found[pk] for pk in post_ids if pk in found]
@@ -0,0 +1,45 @@
+from jobs.queue import task
+from posts import archive, digests, images, reactions
+from posts.deletion import claim_deletion, run_deletion
+from posts.models import DeletionTask
+
+
+@task('posts.generate_image_variants')
+def generate_image_variants(name):
+    """Готовит миниатюры новой картинки до первого показа."""
+    _, error = images.generate_variants(name)
+    if error is not None:
+        raise error
+
+
+@task('posts.sweep_images', max_attempts=1)
+def sweep_images():
+    images.sweep_images()
+
+
+@task('posts.run_deletions', max_attempts=1)
+def run_deletions():
+    for deletion_task in DeletionTask.objects.filter(finished=None):
+        if claim_deletion(deletion_task):
+            run_deletion(deletion_task)
+
+
+@task('posts.archive_posts', max_attempts=1)
+def archive_posts():
+    for _ in archive.archive_posts():
+        pass
+
+
+@task('posts.notify_followers')
+def notify_followers(post_id):
+    digests.notify_followers(post_id)
+
+
+@task('posts.send_digests', max_attempts=1)
+def send_digests():
+    digests.send_digests()
+
+
+@task('posts.merge_reactions', max_attempts=1)
+def merge_reactions():
+    reactions.merge_reactions()
@@ -0,0 +1,43 @@
+import logging
+
+from django import template
+from django.conf import settings
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from posts.images import (
+    MIME_TYPES, SIZES, image_variants, srcset, variant_size
+)
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+
+@register.inclusion_tag('posts/includes/responsive_image.html')
+def responsive_image(image):
+    """<picture> с вариантами картинки поста для srcset."""
+    if not image:
+        return {}
+    try:
+        *modern, fallback = settings.POST_IMAGE_FORMATS
+        sources = [
+            {
+                'type': MIME_TYPES[image_format],
+                'srcset': srcset(image_variants(image, image_format)),
+            }
+            for image_format in modern
+        ]
+        fallback_variants = image_variants(image, fallback)
+    except Exception:
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Не удалось подготовить варианты %s', image)
+        return {}
+    width, height = variant_size(fallback_variants[-1][0])
+    return {
+        'sources': sources,
+        'src': fallback_variants[-1][1].url,
+        'srcset': srcset(fallback_variants),
+        'sizes': SIZES,
+        'width': width,
+        'height': height,
+    }
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(PostAdminTest.admin)
+
+    def create_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create_user(username=f'author-{i}')
+            post = Post.objects.create(
+                text=f'Пост {i}', author=author, group=PostAdminTest.group
+            )
+            Comment.objects.create(
+                text=f'Коммент {i}', author=author, post=post
+            )
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return len(queries), response
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк."""
+        for model in ('post', 'comment'):
+            with self.subTest(model=model):
+                self.create_rows(2)
+                self.changelist_queries(model)
+                few, _ = self.changelist_queries(model)
+                self.create_rows(5)
+                many, _ = self.changelist_queries(model)
+                self.assertEqual(few, many)
+
+    def test_changelist_uses_autocomplete(self):
+        """Редактируемые связи выводятся виджетом автодополнения."""
+        self.create_rows(1)
+        _, response = self.changelist_queries('comment')
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_change_form_keeps_counters(self):
+        """Сохранение поста в админке не трогает просмотры и реакции."""
+        self.create_rows(1)
+        post = Post.objects.get()
+        Post.objects.filter(pk=post.pk).update(views=5, score=3)
+        response = self.client.post(
+            reverse('admin:posts_post_change', args=[post.pk]),
+            {
+                'text': 'Правка из админки',
+                'author': post.author_id,
+                'group': PostAdminTest.group.pk,
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Правка из админки')
+        self.assertEqual((post.views, post.score, post.version), (5, 3, 2))
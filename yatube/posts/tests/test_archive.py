@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import CachedCountPaginator
+from posts.archive import HotColdFeed, archive_posts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Post, User
+)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ArchiveTest.author)
+        old = timezone.now() - timedelta(days=400)
+        self.old_posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                text=f'Старый пост {i}',
+                author=ArchiveTest.author,
+                group=ArchiveTest.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old + timedelta(minutes=i)
+            )
+            Comment.objects.create(
+                text=f'Коммент {i}', author=ArchiveTest.author, post=post
+            )
+            self.old_posts.append(post)
+        self.new_posts = [
+            Post.objects.create(
+                text=f'Новый пост {i}',
+                author=ArchiveTest.author,
+                group=ArchiveTest.group
+            )
+            for i in range(5)
+        ]
+
+    def archive(self, batch_size=5):
+        return list(archive_posts(batch_size=batch_size))
+
+    def test_old_posts_moved_in_batches(self):
+        """Старые посты и их комментарии переносятся в архив пачками."""
+        self.assertEqual(self.archive(), [5, 5, 2])
+        self.assertEqual(Post.objects.count(), len(self.new_posts))
+        self.assertEqual(ArchivedPost.objects.count(), len(self.old_posts))
+        self.assertFalse(
+            Comment.objects.filter(post__in=self.old_posts).exists()
+        )
+        self.assertEqual(
+            ArchivedComment.objects.count(), len(self.old_posts)
+        )
+        archived = ArchivedPost.objects.get(pk=self.old_posts[0].pk)
+        self.assertEqual(archived.text, self.old_posts[0].text)
+        self.assertEqual(archived.group, ArchiveTest.group)
+
+    def test_feed_falls_through_to_archive(self):
+        """Лента дочитывается из архива в прежнем порядке."""
+        expected = list(Post.objects.all())
+        self.archive()
+        cases = (
+            (reverse('posts:index'), {}),
+            (reverse('posts:group_list', args=['group']), {}),
+            (reverse('posts:profile', args=['author']), {}),
+        )
+        for url, params in cases:
+            with self.subTest(url=url):
+                pages = []
+                for page in (1, 2):
+                    response = self.client.get(url, {'page': page})
+                    pages += response.context['page_obj'].object_list
+                self.assertEqual(
+                    [post.pk for post in pages],
+                    [post.pk for post in expected]
+                )
+
+    def test_first_page_reads_hot_table_only(self):
+        """Страница внутри горячей части не читает строки архива."""
+        self.archive()
+        feed = HotColdFeed(Post.objects.all(), ArchivedPost.objects.all())
+        with self.assertNumQueries(2):
+            self.assertEqual(len(feed[0:5]), 5)
+            self.assertEqual(len(feed[2:4]), 2)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(feed[3:8]), 5)
+
+    def test_boundary_ignores_stale_counts(self):
+        """Устаревшее количество горячих постов не сдвигает границу."""
+        self.archive()
+        feed = HotColdFeed(Post.objects.all(), ArchivedPost.objects.all())
+        self.assertEqual(feed.count(), 17)
+        Post.objects.bulk_create([
+            Post(text=f'Пост другого процесса {i}', author=ArchiveTest.author)
+            for i in range(2)
+        ])
+        feed = HotColdFeed(Post.objects.all(), ArchivedPost.objects.all())
+        self.assertEqual(feed.count(), 17)
+        pages = feed[0:4] + feed[4:8] + feed[8:19]
+        self.assertEqual(
+            [post.pk for post in pages],
+            [post.pk for post in Post.objects.all()]
+            + [post.pk for post in ArchivedPost.objects.all()]
+        )
+
+    def test_paginated_hot_page_skips_archive_after_writes(self):
+        """Страница из горячей части через Paginator не считает архив,
+        даже когда новый пост сбросил кэш количеств."""
+        self.archive()
+
+        def archive_queries(number):
+            feed = HotColdFeed(
+                Post.objects.all(), ArchivedPost.objects.all()
+            )
+            with CaptureQueriesContext(connection) as queries:
+                page = CachedCountPaginator(feed, 2).get_page(number)
+                list(page)
+            return [
+                query['sql'] for query in queries.captured_queries
+                if 'posts_archivedpost' in query['sql']
+            ]
+
+        archive_queries(1)
+        Post.objects.create(text='Новый', author=ArchiveTest.author)
+        self.assertEqual(archive_queries(1), [])
+        self.assertEqual(
+            CachedCountPaginator(HotColdFeed(
+                Post.objects.all(), ArchivedPost.objects.all()
+            ), 2).count,
+            Post.objects.count() + ArchivedPost.objects.count()
+        )
+        self.assertEqual(len(archive_queries(8)), 1)
+
+    def test_post_detail_resolves_archived(self):
+        """Архивный пост открывается по старому адресу, только для чтения."""
+        post = self.old_posts[0]
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, post.text)
+        self.assertContains(response, 'Коммент 0')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[post.pk])
+        )
+        self.assertNotContains(
+            response, reverse('posts:post_edit', args=[post.pk])
+        )
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.deletion import (
+    claim_deletion, deletion_steps, process_in_batches, run_deletion,
+    schedule_deletion
+)
+from posts.tasks import run_deletions
+from posts.models import (
+    Comment, DeletionTask, FeedMarker, Follow, Group, Mention, Post, Reaction,
+    User
+)
+from users.models import NotificationSettings
+
+
+class ChunkedDeletionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        reader = ChunkedDeletionTest.reader
+        Follow.objects.create(user=reader, author=self.author)
+        Follow.objects.create(user=self.author, author=reader)
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост удаляемого {i}',
+                author=self.author,
+                group=ChunkedDeletionTest.group
+            )
+            for i in range(5)
+        ]
+        for post in self.posts:
+            Comment.objects.create(
+                text='Коммент', author=ChunkedDeletionTest.reader, post=post
+            )
+
+    def test_user_hidden_immediately(self):
+        """Поставленный на удаление пользователь сразу пропадает из лент."""
+        group_url = reverse('posts:group_list', args=['group'])
+        response = Client().get(group_url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+        schedule_deletion(DeletionTask.USER, self.author.pk)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Пост удаляемого')
+        response = Client().get(group_url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
+        response = Client().get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_deleted_in_batches(self):
+        """Пользователь и все зависимые строки удаляются пачками."""
+        task = schedule_deletion(DeletionTask.USER, self.author.pk)
+        batches = []
+        run_deletion(task, batch_size=2, progress=batches.append)
+        self.assertGreater(len(batches), 3)
+        self.assertIsNotNone(task.finished)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertFalse(Comment.objects.filter(post__in=self.posts).exists())
+        self.assertFalse(Follow.objects.filter(author=self.author).exists())
+        self.assertFalse(Follow.objects.filter(user=self.author).exists())
+
+    def test_user_rows_deleted_before_user(self):
+        """К последнему шагу на пользователя не ссылается ни одна строка,
+        так что удаление самого пользователя ничего не каскадирует."""
+        author = self.author
+        mentioning = Post.objects.create(
+            text='@author', author=ChunkedDeletionTest.reader
+        )
+        Mention.objects.get_or_create(
+            user=author, post_id=mentioning.pk,
+            defaults={'pub_date': mentioning.pub_date}
+        )
+        FeedMarker.objects.create(user=author, last_seen_post_id=1)
+        NotificationSettings.objects.get_or_create(user=author)
+        Reaction.objects.create(
+            user=author, post_id=self.posts[0].pk, kind='like'
+        )
+        author.groups.create(name='Редакторы')
+        task = schedule_deletion(DeletionTask.USER, author.pk)
+        for query_set, update in deletion_steps(task)[:-1]:
+            for _ in process_in_batches(query_set, 2, **update):
+                pass
+        relations = [
+            field for field in User._meta.get_fields(include_hidden=True)
+            if field.auto_created and (field.one_to_many or field.one_to_one)
+        ]
+        for relation in relations:
+            with self.subTest(model=relation.related_model.__name__):
+                self.assertFalse(relation.related_model._base_manager.filter(
+                    **{relation.field.name: author.pk}
+                ).exists())
+
+    def test_group_posts_unlinked(self):
+        """При удалении группы посты остаются, но без группы."""
+        task = schedule_deletion(
+            DeletionTask.GROUP, ChunkedDeletionTest.group.pk
+        )
+        run_deletion(task, batch_size=2)
+        self.assertFalse(Group.objects.filter(slug='group').exists())
+        self.assertEqual(
+            Post.objects.filter(author=self.author, group=None).count(),
+            len(self.posts)
+        )
+
+    def test_deletion_claimed_once(self):
+        """Задачу, которую уже выполняют, второй запуск не трогает, пока
+        не истечёт аренда."""
+        task = schedule_deletion(DeletionTask.USER, self.author.pk)
+        self.assertTrue(claim_deletion(task))
+        self.assertFalse(claim_deletion(DeletionTask.objects.get(pk=task.pk)))
+        run_deletions()
+        self.assertTrue(Post.objects.filter(author=self.author).exists())
+        DeletionTask.objects.filter(pk=task.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        run_deletions()
+        task.refresh_from_db()
+        self.assertIsNotNone(task.finished)
+        self.assertIsNone(task.locked_until)
+        self.assertFalse(claim_deletion(task))
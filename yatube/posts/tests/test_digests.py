@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.digests import notify_followers, send_digests
+from posts.models import Follow, Post, PostNotification, User
+from users.models import NotificationSettings
+
+
+@override_settings(
+    JOBS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    DIGEST_MAX_POSTS=2
+)
+class DigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'follower{i}', email=f'follower{i}@example.com'
+            )
+            for i in range(5)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+
+    def publish(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'Новый пост {i}', author=DigestTest.author
+            )
+            notify_followers(post.pk, batch_size=2)
+
+    def test_one_digest_per_follower(self):
+        """Каждый подписчик получает одно письмо на все новые посты."""
+        self.publish(3)
+        self.assertEqual(PostNotification.objects.count(), 15)
+        self.assertEqual(send_digests(batch_size=2), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        message = mail.outbox[0]
+        self.assertIn('Новый пост 2', message.body)
+        self.assertIn('Новый пост 1', message.body)
+        self.assertNotIn('Новый пост 0', message.body)
+        self.assertIn('И ещё постов: 1', message.body)
+        self.assertIn('List-Unsubscribe', message.extra_headers)
+        self.assertFalse(PostNotification.objects.exists())
+
+    def test_plain_text_uses_post_text(self):
+        """Текстовая часть письма — обрезанный текст поста без экранов."""
+        post = Post.objects.create(
+            text='Кошки & собаки ' + 'очень ' * 100, author=DigestTest.author
+        )
+        notify_followers(post.pk)
+        send_digests()
+        body = mail.outbox[0].body
+        self.assertIn('Кошки & собаки', body)
+        self.assertNotIn('&amp;', body)
+        self.assertNotIn('очень ' * 100, body)
+
+    def test_one_click_unsubscribe(self):
+        """Отписка POST-запросом почтового клиента без CSRF-токена."""
+        follower = DigestTest.followers[0]
+        self.publish(1)
+        send_digests()
+        self.assertEqual(
+            mail.outbox[0].extra_headers['List-Unsubscribe-Post'],
+            'List-Unsubscribe=One-Click'
+        )
+        notification_settings = NotificationSettings.objects.get(
+            user=follower
+        )
+        response = Client(enforce_csrf_checks=True).post(
+            reverse(
+                'users:unsubscribe',
+                args=[notification_settings.unsubscribe_token]
+            ),
+            {'List-Unsubscribe': 'One-Click'}
+        )
+        self.assertEqual(response.status_code, 200)
+        notification_settings.refresh_from_db()
+        self.assertFalse(notification_settings.digest_enabled)
+
+    def test_digest_waits_for_interval(self):
+        """Следующее письмо приходит не раньше выбранного интервала."""
+        self.publish(1)
+        send_digests()
+        self.publish(1)
+        self.assertEqual(send_digests(), 0)
+        NotificationSettings.objects.update(
+            last_digest_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(send_digests(), 5)
+
+    def test_unsubscribe(self):
+        """Отписка по ссылке из письма выключает дайджест."""
+        follower = DigestTest.followers[0]
+        self.publish(1)
+        send_digests()
+        token = follower.notification_settings.unsubscribe_token
+        url = reverse('users:unsubscribe', args=[token])
+        self.assertIn(url, mail.outbox[0].body)
+        response = Client().get(url)
+        self.assertContains(response, 'Больше не присылать')
+        Client().post(url)
+        follower.notification_settings.refresh_from_db()
+        self.assertFalse(follower.notification_settings.digest_enabled)
+        self.publish(1)
+        self.assertFalse(
+            PostNotification.objects.filter(recipient=follower).exists()
+        )
+
+    def test_preferences(self):
+        """Пользователь выбирает частоту писем."""
+        client = Client()
+        client.force_login(DigestTest.followers[1])
+        client.post(reverse('users:notifications'), {
+            'digest_enabled': 'on',
+            'digest_frequency': NotificationSettings.HOURLY,
+        })
+        self.assertEqual(
+            NotificationSettings.objects.get(
+                user=DigestTest.followers[1]
+            ).digest_frequency,
+            NotificationSettings.HOURLY
+        )
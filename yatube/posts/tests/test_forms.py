@@ -1,17 +1,34 @@
+import os
 import shutil
 import tempfile
+import time
+from http import HTTPStatus
+from io import StringIO
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Group, Post, User
+from posts.images import generate_variants, image_variants, sweep_images
+from posts.models import ArchivedPost, Group, Post, User
+from posts.storage import post_image_storage
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+def media_files():
+    return {
+        os.path.relpath(os.path.join(path, name), TEMP_MEDIA_ROOT)
+        for path, _, names in os.walk(TEMP_MEDIA_ROOT)
+        for name in names
+    }
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
     @classmethod
@@ -42,6 +59,8 @@ class PostFormTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        # sorl хранит ключи миниатюр в кэше, который переживает тест.
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostFormTests.user)
 
@@ -59,8 +78,9 @@ class PostFormTests(TestCase):
             'image': uploaded,
         }
         PostFormTests.expected_data['text'] = form_data['text']
-        PostFormTests.expected_data['image'] = (
-            f"posts/{form_data['image'].name}"
+        PostFormTests.expected_data['image'] = post_image_storage.hashed_name(
+            f"posts/{form_data['image'].name}",
+            ContentFile(PostFormTests.small_gif)
         )
         self.authorized_client.post(
             reverse('posts:post_create'),
@@ -91,8 +111,9 @@ class PostFormTests(TestCase):
             'image': uploaded,
         }
         PostFormTests.expected_data['text'] = form_data['text']
-        PostFormTests.expected_data['image'] = (
-            f"posts/{form_data['image'].name}"
+        PostFormTests.expected_data['image'] = post_image_storage.hashed_name(
+            f"posts/{form_data['image'].name}",
+            ContentFile(PostFormTests.small_gif)
         )
         self.authorized_client.post(
             reverse(
@@ -108,6 +129,133 @@ class PostFormTests(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(getattr(post, field), value)
 
+    def test_same_image_stored_once(self):
+        """Одинаковые картинки разных постов хранятся одним файлом."""
+        for name in ('first.gif', 'second.gif'):
+            self.authorized_client.post(reverse('posts:post_create'), data={
+                'text': f'Пост с картинкой {name}',
+                'image': SimpleUploadedFile(
+                    name=name,
+                    content=PostFormTests.small_gif,
+                    content_type='image/gif'
+                ),
+            })
+        images = set(Post.objects.filter(
+            text__startswith='Пост с картинкой'
+        ).values_list('image', flat=True))
+        self.assertEqual(len(images), 1)
+        self.assertTrue(post_image_storage.exists(images.pop()))
+
+    def test_racing_saves_share_hashed_name(self):
+        """Запись того же содержимого поверх готового файла не создаёт
+        копию с суффиксом."""
+        name = post_image_storage.save(
+            'posts/race.gif', ContentFile(PostFormTests.small_gif)
+        )
+        saved = post_image_storage.save(
+            'posts/again.gif', ContentFile(PostFormTests.small_gif)
+        )
+        raced = post_image_storage._save(
+            name, ContentFile(PostFormTests.small_gif)
+        )
+        self.assertEqual({saved, raced}, {name})
+        self.assertEqual(
+            post_image_storage.listdir(os.path.dirname(name))[1],
+            [os.path.basename(name)]
+        )
+
+    def test_sweep_deletes_only_old_unreferenced_images(self):
+        """Уборка удаляет старые файлы без ссылок, а файл, загруженный
+        заново, получает новое время и остаётся."""
+        storage = post_image_storage
+        referenced = storage.save(
+            'posts/kept.gif', ContentFile(PostFormTests.small_gif)
+        )
+        Post.objects.create(
+            text='С картинкой', author=PostFormTests.user, image=referenced
+        )
+        orphan = storage.save(
+            'posts/orphan.gif', ContentFile(PostFormTests.small_gif + b'1')
+        )
+        reused = storage.save(
+            'posts/reused.gif', ContentFile(PostFormTests.small_gif + b'2')
+        )
+        old = time.time() - 2 * settings.IMAGE_SWEEP_GRACE
+        for name in (referenced, orphan, reused):
+            os.utime(storage.path(name), (old, old))
+        storage.save(
+            'posts/again.gif', ContentFile(PostFormTests.small_gif + b'2')
+        )
+        self.assertEqual(sweep_images(), 1)
+        self.assertFalse(storage.exists(orphan))
+        self.assertTrue(storage.exists(referenced))
+        self.assertTrue(storage.exists(reused))
+
+    def test_dedupe_media_covers_archived_posts(self):
+        """dedupe_media переносит картинки и постов, и архивных постов."""
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('posts/hot.gif', 'posts/cold.gif'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(PostFormTests.small_gif)
+        post = Post.objects.create(
+            text='Горячий', author=PostFormTests.user, image='posts/hot.gif'
+        )
+        archived = ArchivedPost.objects.create(
+            id=post.pk + 1000,
+            text='Архивный',
+            author=PostFormTests.user,
+            image='posts/cold.gif',
+            pub_date=post.pub_date,
+            updated_at=post.pub_date,
+        )
+        call_command('dedupe_media', stdout=StringIO())
+        post.refresh_from_db()
+        archived.refresh_from_db()
+        self.assertTrue(post_image_storage.is_hashed_name(archived.image.name))
+        self.assertEqual(archived.image.name, post.image.name)
+        self.assertFalse(post_image_storage.exists('posts/cold.gif'))
+        self.assertFalse(post_image_storage.exists('posts/hot.gif'))
+
+    def test_backfilled_variants_match_template_keys(self):
+        """Фоновая подготовка создаёт те же миниатюры, что ищет шаблон."""
+        post = Post.objects.create(
+            text='С картинкой',
+            author=PostFormTests.user,
+            image=SimpleUploadedFile(
+                name='variants.gif',
+                content=PostFormTests.small_gif,
+                content_type='image/gif'
+            )
+        )
+        self.assertEqual(generate_variants(post.image.name)[1], None)
+        backfilled = media_files()
+        for image_format in settings.POST_IMAGE_FORMATS:
+            for _, thumbnail in image_variants(post.image, image_format):
+                with self.subTest(thumbnail=thumbnail.name):
+                    self.assertIn(thumbnail.name, backfilled)
+        self.assertEqual(media_files(), backfilled)
+
+    def test_edit_post_version_conflict(self):
+        """Правка устаревшей версии поста не затирает чужие изменения."""
+        post = Post.objects.create(
+            text='Тест пост #1',
+            author=PostFormTests.user,
+        )
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        self.authorized_client.post(url, data={
+            'text': 'Первая правка',
+            'version': post.version,
+        })
+        response = self.authorized_client.post(url, data={
+            'text': 'Вторая правка',
+            'version': post.version,
+        })
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Первая правка')
+        self.assertEqual(post.version, 2)
+        self.assertEqual(response.context['version'], post.version)
+
     def test_form_labels(self):
         """Проверка названий полей формы."""
         form_labels = {
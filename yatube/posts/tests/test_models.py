@@ -1,6 +1,11 @@
-from django.test import TestCase
+from io import StringIO
 
-from posts.models import Group, Post, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -58,3 +63,74 @@ class PostModelTest(TestCase):
             field_verboses_post,
             PostModelTest.post
         )
+
+    @override_settings(POST_EXCERPT_LENGTH=20)
+    def test_text_rendered_on_save(self):
+        """HTML текста и начала текста считается при сохранении."""
+        post = Post.objects.create(
+            author=PostModelTest.user,
+            text='Первая строка <b>\n\nВторая строка, длинная'
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>Первая строка &lt;b&gt;</p>\n\n<p>Вторая строка, длинная</p>'
+        )
+        self.assertEqual(post.excerpt_html, '<p>Первая строка &lt;b&gt;…</p>')
+        post.text = 'Новый текст'
+        post.save_versioned(post.version, ['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Новый текст</p>')
+        comment = Comment.objects.create(
+            post=post, author=PostModelTest.user, text='Коммент\nвторой'
+        )
+        self.assertEqual(comment.text_html, '<p>Коммент<br>второй</p>')
+
+    def test_full_save_keeps_counters(self):
+        """Полное сохранение старого объекта не затирает счётчики."""
+        post = Post.objects.create(author=PostModelTest.user, text='Пост')
+        Post.objects.filter(pk=post.pk).update(
+            views=7, version=3, score=2, reaction_counts='{"like": 2}'
+        )
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(post.version, 4)
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.views, post.version, post.score, post.reaction_counts),
+            (7, 4, 2, '{"like": 2}')
+        )
+        self.assertEqual(post.text_html, '<p>Исправленный пост</p>')
+
+    def test_render_text_backfill(self):
+        """Команда render_text заполняет HTML у старых строк."""
+        Post.objects.bulk_create([
+            Post(author=PostModelTest.user, text=f'Старый пост {i}')
+            for i in range(5)
+        ])
+        call_command('render_text', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertEqual(
+            Post.objects.get(text='Старый пост 3').excerpt_html,
+            '<p>Старый пост 3</p>'
+        )
+
+    def test_render_text_queries_do_not_grow_with_rows(self):
+        """render_text не дочитывает поля по одной строке."""
+        def command_queries():
+            with CaptureQueriesContext(connection) as queries:
+                call_command(
+                    'render_text', '--all', batch_size=100, stdout=StringIO()
+                )
+            return len(queries)
+
+        few = command_queries()
+        Post.objects.bulk_create([
+            Post(author=PostModelTest.user, text=f'Ещё пост {i}')
+            for i in range(20)
+        ])
+        self.assertEqual(command_queries(), few)
+
+    def test_feed_defers_full_text(self):
+        """Лента не загружает полный текст поста."""
+        post = Post.objects.for_feed().get(pk=PostModelTest.post.pk)
+        self.assertEqual(post.get_deferred_fields(), {'text', 'text_html'})
@@ -0,0 +1,158 @@
+import json
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import (
+    ArchivedPost, Group, Post, Reaction, ReactionCounter, User
+)
+from posts.reactions import merge_reactions
+
+
+class ReactionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание'
+        )
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=ReactionsTest.author,
+            group=ReactionsTest.group,
+            text='Пост'
+        )
+        self.clients = []
+        for reader in ReactionsTest.readers:
+            client = Client()
+            client.force_login(reader)
+            self.clients.append(client)
+
+    def react(self, client, kind='like', post=None):
+        return client.post(
+            reverse('posts:react', args=((post or self.post).pk, kind))
+        )
+
+    def test_react_toggles_reaction(self):
+        """Повторная реакция того же вида снимает первую."""
+        response = self.react(self.clients[0])
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertTrue(Reaction.objects.filter(
+            user=ReactionsTest.readers[0], post_id=self.post.pk, kind='like'
+        ).exists())
+        self.react(self.clients[0])
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_react_rejects_unknown_kind_and_get(self):
+        """Неизвестный вид реакции — 404, GET не принимается."""
+        self.assertEqual(self.react(self.clients[0], 'angry').status_code, 404)
+        response = self.clients[0].get(
+            reverse('posts:react', args=(self.post.pk, 'like'))
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Reaction.objects.exists())
+
+    @override_settings(REACTION_COUNTER_SHARDS=4)
+    def test_reactions_spread_over_shards_and_merge(self):
+        """Реакции копятся в шардах и сводятся в счётчики поста."""
+        for client in self.clients:
+            self.react(client, 'like')
+        self.react(self.clients[0], 'love')
+        self.assertTrue(set(
+            ReactionCounter.objects.values_list('shard', flat=True)
+        ) <= set(range(4)))
+        self.assertEqual(sum(
+            ReactionCounter.objects.values_list('count', flat=True)
+        ), 4)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, 0)
+
+        self.assertGreater(merge_reactions(batch_size=1), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, 4)
+        self.assertEqual(
+            json.loads(self.post.reaction_counts),
+            {'like': 3, 'love': 1}
+        )
+        self.assertFalse(ReactionCounter.objects.exists())
+
+        self.react(self.clients[1], 'like')
+        merge_reactions()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.score, 3)
+        self.assertEqual(merge_reactions(), 0)
+
+    def test_merge_keeps_increments_of_archived_posts(self):
+        """Реакции на пост, ушедший в архив, сводятся в архивную строку."""
+        self.react(self.clients[0])
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=1000)
+        )
+        for _ in archive_posts():
+            pass
+        self.assertTrue(Reaction.objects.exists())
+        merge_reactions()
+        self.assertEqual(ArchivedPost.objects.get(pk=self.post.pk).score, 1)
+
+    def test_deleted_post_forgets_reactions(self):
+        """Удаление поста удаляет его реакции и шарды."""
+        self.react(self.clients[0])
+        self.post.delete()
+        self.assertFalse(Reaction.objects.exists())
+        self.assertFalse(ReactionCounter.objects.exists())
+
+    def test_counts_on_card_and_detail(self):
+        """Сведённые счётчики видны в карточке и на странице поста."""
+        self.react(self.clients[0], 'laugh')
+        merge_reactions()
+        for url in (
+            reverse('posts:group_list', args=(ReactionsTest.group.slug,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.clients[1].get(url), '😂 1')
+        response = self.clients[0].get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertEqual(response.context['user_reactions'], {'laugh'})
+
+    def test_liked_sort(self):
+        """?sort=liked в группе и профиле ставит популярные посты выше."""
+        popular = Post.objects.create(
+            author=ReactionsTest.author,
+            group=ReactionsTest.group,
+            text='Популярный'
+        )
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=popular.pub_date + timedelta(minutes=1)
+        )
+        for client in self.clients[:2]:
+            self.react(client, post=popular)
+        merge_reactions()
+        urls = (
+            reverse('posts:group_list', args=(ReactionsTest.group.slug,)),
+            reverse('posts:profile', args=(ReactionsTest.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.clients[0].get(url)
+                self.assertEqual(response.context['page_obj'][0], self.post)
+                response = self.clients[0].get(url, {'sort': 'liked'})
+                self.assertEqual(response.context['sort'], 'liked')
+                self.assertEqual(response.context['page_obj'][0], popular)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import Mention, Post, PostTag, Tag, User
+
+
+class TagsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(TagsTest.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(TagsTest.reader)
+
+    def create_post(self, text):
+        self.client.post(reverse('posts:post_create'), {'text': text})
+        return Post.objects.latest('pk')
+
+    def test_admin_edit_reindexes_tags(self):
+        """Правка текста в админке обновляет теги поста."""
+        post = self.create_post('Про #django')
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        client = Client()
+        client.force_login(admin)
+        client.post(
+            reverse('admin:posts_post_change', args=[post.pk]),
+            {'text': 'Теперь про #python', 'author': post.author_id}
+        )
+        self.assertEqual(
+            set(Tag.objects.filter(
+                post_tags__post_id=post.pk
+            ).values_list('name', flat=True)),
+            {'python'}
+        )
+
+    def test_tags_and_mentions_saved_by_form(self):
+        """Форма сохраняет теги и упоминания, текст получает ссылки."""
+        post = self.create_post('Про #Django и #python, @reader и @nobody')
+        self.assertEqual(
+            set(Tag.objects.values_list('name', flat=True)),
+            {'django', 'python'}
+        )
+        self.assertEqual(PostTag.objects.filter(post_id=post.pk).count(), 2)
+        self.assertTrue(
+            Mention.objects.filter(
+                post_id=post.pk, user=TagsTest.reader
+            ).exists()
+        )
+        self.assertIn(
+            '<a href="{}">#Django</a>'.format(
+                reverse('posts:tag_feed', args=['django'])
+            ),
+            post.text_html
+        )
+        self.assertIn(
+            '<a href="{}">@reader</a>'.format(
+                reverse('posts:profile', args=['reader'])
+            ),
+            post.text_html
+        )
+        self.assertIn('@nobody', post.text_html)
+        self.assertNotIn('>@nobody<', post.text_html)
+
+    def test_edit_resyncs_tags(self):
+        """Правка текста обновляет теги поста."""
+        post = self.create_post('#one #two')
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': '#two #three', 'version': post.version}
+        )
+        self.assertEqual(
+            set(PostTag.objects.filter(post_id=post.pk).values_list(
+                'tag__name', flat=True
+            )),
+            {'two', 'three'}
+        )
+
+    def test_tag_feed_keyset_pages(self):
+        """Лента тега листается курсором и включает архивные посты."""
+        posts = [self.create_post(f'Пост {i} #feed') for i in range(13)]
+        old = timezone.now() - timedelta(days=400)
+        Post.objects.filter(pk=posts[0].pk).update(pub_date=old)
+        PostTag.objects.filter(post_id=posts[0].pk).update(pub_date=old)
+        list(archive_posts())
+        url = reverse('posts:tag_feed', args=['Feed'])
+        response = self.client.get(url)
+        first_page = [post.pk for post in response.context['posts']]
+        self.assertEqual(first_page, [post.pk for post in posts[:2:-1]])
+        response = self.client.get(
+            url, {'before': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['posts']],
+            [post.pk for post in posts[2::-1]]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_mentions_feed(self):
+        """Лента упоминаний показывает посты, где упомянут пользователь."""
+        post = self.create_post('Привет, @reader!')
+        self.create_post('Без упоминаний')
+        response = self.reader_client.get(reverse('posts:mentions'))
+        self.assertEqual(list(response.context['posts']), [post])
+
+    def test_deleted_post_forgets_tags(self):
+        """Удалённый пост пропадает из таблиц тегов и упоминаний."""
+        post = self.create_post('#gone @reader')
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+        self.assertFalse(Mention.objects.exists())
+
+    def test_index_tags_backfill(self):
+        """Команда index_tags разбирает уже сохранённые посты."""
+        Post.objects.bulk_create([
+            Post(author=TagsTest.author, text=f'#old{i % 2} @reader')
+            for i in range(5)
+        ])
+        call_command('index_tags', batch_size=2, stdout=StringIO())
+        call_command('index_tags', batch_size=2, stdout=StringIO())
+        self.assertEqual(PostTag.objects.count(), 5)
+        self.assertEqual(Mention.objects.count(), 5)
+        self.assertEqual(Tag.objects.count(), 2)
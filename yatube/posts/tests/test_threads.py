@@ -0,0 +1,213 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import ArchivedComment, Comment, Post, User
+from posts.threads import thread_page
+
+
+@override_settings(COMMENT_MAX_DEPTH=2, COMMENT_COLLAPSE_AFTER=2)
+class CommentThreadsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def comment(self, text, parent=None):
+        comment = Comment(text=text, author=self.author, post=self.post)
+        if parent is not None:
+            comment.reply_to(parent)
+        comment.save()
+        return comment
+
+    def reload(self, *comments):
+        return [Comment.objects.get(pk=comment.pk) for comment in comments]
+
+    def test_paths_and_reply_counts(self):
+        """Путь ответа продолжает путь родителя, счётчики предков растут."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', reply)
+        root, reply = self.reload(root, reply)
+        self.assertTrue(nested.path.startswith(reply.path))
+        self.assertTrue(reply.path.startswith(root.path))
+        self.assertEqual(
+            [root.depth, reply.depth, nested.depth], [0, 1, 2]
+        )
+        self.assertEqual([root.reply_count, reply.reply_count], [2, 1])
+
+    def test_depth_limit(self):
+        """Ответ глубже предела становится соседом родителя."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', reply)
+        too_deep = self.comment('Слишком глубоко', nested)
+        self.assertEqual(too_deep.parent, reply)
+        self.assertEqual(too_deep.depth, 2)
+
+    def test_depth_limit_after_deleted_ancestors(self):
+        """Предел глубины считается по пути и после удаления предков."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', reply)
+        root.delete()
+        reply, nested = self.reload(reply, nested)
+        too_deep = self.comment('Слишком глубоко', nested)
+        self.assertEqual(too_deep.parent, reply)
+        self.assertEqual(len(too_deep.path), len(nested.path))
+        reply.delete()
+        nested = self.reload(nested)[0]
+        orphan_reply = self.comment('Ответ на осиротевший', nested)
+        self.assertIsNone(orphan_reply.parent_id)
+        self.assertTrue(orphan_reply.parent_removed)
+        self.assertEqual(len(orphan_reply.path), len(nested.path))
+        self.assertEqual(orphan_reply.depth, nested.depth)
+
+    def test_delete_keeps_replies(self):
+        """Удаление ответа не удаляет ответы на него, счётчик предков −1."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', reply)
+        self.comment('Второй ответ', root)
+        reply.delete()
+        root, nested = self.reload(root, nested)
+        self.assertEqual(root.reply_count, 2)
+        self.assertIsNone(nested.parent_id)
+        self.assertTrue(nested.parent_removed)
+        _, _, threads = thread_page(self.post.comments.all(), 1)
+        self.assertEqual(
+            [reply.text for reply in threads[0][1]],
+            ['Ответ на ответ', 'Второй ответ']
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Ответ на удалённый комментарий')
+
+    def test_delete_root_promotes_replies(self):
+        """Ответы удалённого корня становятся ветками на его месте."""
+        old_root = self.comment('Старая ветка')
+        root = self.comment('Корень')
+        first = self.comment('Первый ответ', root)
+        self.comment('Ответ на первый', first)
+        self.comment('Второй ответ', root)
+        self.comment('Новая ветка')
+        root.delete()
+        _, _, threads = thread_page(self.post.comments.all(), 1)
+        self.assertEqual(
+            [(root.text, [reply.text for reply in replies])
+             for root, replies in threads],
+            [
+                ('Новая ветка', []),
+                ('Первый ответ', ['Ответ на первый']),
+                ('Второй ответ', []),
+                ('Старая ветка', []),
+            ]
+        )
+        self.assertEqual(threads[3][0], old_root)
+
+    def test_thread_page(self):
+        """Ветки новее идут первыми, ответы — по порядку внутри ветки."""
+        old_root = self.comment('Старая ветка')
+        first = self.comment('Первый ответ', old_root)
+        self.comment('Ответ на первый', first)
+        self.comment('Второй ответ', old_root)
+        self.comment('Новая ветка')
+        with self.settings(
+            COMMENT_THREADS_PER_PAGE=1, COMMENT_COLLAPSE_AFTER=3
+        ):
+            with self.assertNumQueries(3):
+                _, _, threads = thread_page(self.post.comments.all(), 2)
+            self.assertEqual(
+                [(root.text, [reply.text for reply in replies])
+                 for root, replies in threads],
+                [(
+                    'Старая ветка',
+                    ['Первый ответ', 'Ответ на первый', 'Второй ответ']
+                )]
+            )
+            _, comments, _ = thread_page(self.post.comments.all(), 1)
+        self.assertEqual(
+            [comment.text for comment in comments], ['Новая ветка']
+        )
+
+    def test_reply_view(self):
+        """Ответ отправляется той же формой с полем parent."""
+        root = self.comment('Корень')
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ через форму', 'parent': root.pk}
+        )
+        reply = Comment.objects.get(text='Ответ через форму')
+        self.assertEqual(reply.parent, root)
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine):
+                with self.settings(FEED_TEMPLATE_ENGINE=engine):
+                    response = self.client.get(
+                        reverse('posts:post_detail', args=[self.post.pk])
+                    )
+                self.assertContains(response, 'Ответ через форму')
+                self.assertContains(response, '<details open>', html=False)
+
+    def test_collapsed_thread(self):
+        """Ответы большой ветки не загружаются, ветка открывается ссылкой."""
+        root = self.comment('Корень')
+        small = self.comment('Маленькая ветка')
+        reply = self.comment('Единственный ответ', small)
+        for number in range(3):
+            self.comment(f'Ответ {number}', root)
+        with self.assertNumQueries(3):
+            _, comments, _ = thread_page(self.post.comments.all(), 1)
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ['Маленькая ветка', 'Единственный ответ', 'Корень']
+        )
+        thread_url = reverse(
+            'posts:comment_thread', args=[self.post.pk, root.pk]
+        )
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine):
+                with self.settings(FEED_TEMPLATE_ENGINE=engine):
+                    response = self.client.get(
+                        reverse('posts:post_detail', args=[self.post.pk])
+                    )
+                self.assertNotContains(response, 'Ответ 0')
+                self.assertContains(response, 'Ответов: 3')
+                self.assertContains(response, thread_url)
+        with self.settings(COMMENT_REPLIES_PER_PAGE=2):
+            response = self.client.get(thread_url)
+            self.assertContains(response, 'Корень')
+            self.assertContains(response, 'Ответ 1')
+            self.assertNotContains(response, 'Ответ 2')
+            response = self.client.get(thread_url, {'page': 2})
+            self.assertContains(response, 'Ответ 2')
+        self.assertEqual(
+            self.client.get(reverse(
+                'posts:comment_thread', args=[self.post.pk, reply.pk]
+            )).status_code,
+            404
+        )
+
+    def test_archive_keeps_threads(self):
+        """Ветки переносятся в архив вместе с путями."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        list(archive_posts())
+        archived = ArchivedComment.objects.get(pk=reply.pk)
+        self.assertEqual(archived.parent_id, root.pk)
+        self.assertEqual(archived.path, reply.path)
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=root.pk).reply_count, 1
+        )
@@ -1,15 +1,19 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from posts.archive import archive_posts
+from posts.counters import view_counter
 from posts.forms import CommentForm
-from posts.models import Follow, Group, Post, User
+from posts.models import ArchivedPost, Follow, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -125,7 +129,7 @@ class PostViewsTest(TestCase):
         )
         self.assertEqual(
             context['page_obj'][0].image,
-            f'posts/{PostViewsTest.uploaded.name}'
+            PostViewsTest.post.image.name
         )
 
     def test_post_detail_context(self):
@@ -140,10 +144,21 @@ class PostViewsTest(TestCase):
         self.assertEqual(context['post'], PostViewsTest.post)
         self.assertEqual(
             context['post'].image,
-            f'posts/{PostViewsTest.uploaded.name}'
+            PostViewsTest.post.image.name
         )
         self.assertIsInstance(context['form'], CommentForm)
 
+    def test_post_image_responsive_variants(self):
+        """Картинка поста выводится вариантами разной ширины."""
+        content = self.authorized_client.get(self.reversor(
+            ('posts:post_detail', PostViewsTest.post.pk)
+        )).content.decode()
+        self.assertIn('type="image/webp"', content)
+        self.assertIn('loading="lazy"', content)
+        for width in settings.POST_IMAGE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f' {width}w', content)
+
     def test_group_posts_context(self):
         """Тест контекста group_posts."""
         expected_context = ('page_obj', 'group')
@@ -160,7 +175,7 @@ class PostViewsTest(TestCase):
         self.assertEqual(context['group'], PostViewsTest.group)
         self.assertEqual(
             context['page_obj'][0].image,
-            f'posts/{PostViewsTest.uploaded.name}'
+            PostViewsTest.post.image.name
         )
 
     def test_profile_context(self):
@@ -179,7 +194,7 @@ class PostViewsTest(TestCase):
         self.assertEqual(context['author'], PostViewsTest.user)
         self.assertEqual(
             context['page_obj'][0].image,
-            f'posts/{PostViewsTest.uploaded.name}'
+            PostViewsTest.post.image.name
         )
 
     def test_post_create_context(self):
@@ -236,6 +251,53 @@ class PostViewsTest(TestCase):
         self.assertIn('comments', context)
         self.assertEqual(context['comments'][0].text, form_data['text'])
 
+    @override_settings(POST_VIEWS_FLUSH_THRESHOLD=3)
+    def test_post_detail_views_flushed_in_batches(self):
+        """Просмотры поста копятся в буфере и пишутся в БД пачкой."""
+        view_counter.flush()
+        post = PostViewsTest.post
+        views = Post.objects.get(pk=post.pk).views
+        url = self.reversor(('posts:post_detail', post.pk))
+        for _ in range(2):
+            self.authorized_client.get(url)
+        self.assertEqual(Post.objects.get(pk=post.pk).views, views)
+        self.authorized_client.get(url)
+        self.assertEqual(Post.objects.get(pk=post.pk).views, views + 3)
+
+    @override_settings(POST_VIEWS_FLUSH_THRESHOLD=2)
+    def test_failed_flush_keeps_views(self):
+        """Ошибка записи просмотров не ломает страницу, буфер сохраняется."""
+        view_counter.flush()
+        post = PostViewsTest.post
+        views = Post.objects.get(pk=post.pk).views
+        url = self.reversor(('posts:post_detail', post.pk))
+        self.authorized_client.get(url)
+        with mock.patch(
+            'posts.counters.Post.objects.filter',
+            side_effect=OperationalError('database is locked')
+        ):
+            with self.assertLogs('posts.counters', 'ERROR'):
+                response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.get(pk=post.pk).views, views)
+        self.assertEqual(view_counter.flush(), 2)
+        self.assertEqual(Post.objects.get(pk=post.pk).views, views + 2)
+
+    def test_views_of_archived_post_kept(self):
+        """Просмотры поста, ушедшего в архив до сброса, не теряются."""
+        view_counter.flush()
+        post = Post.objects.create(text='Старый', author=PostViewsTest.user)
+        self.authorized_client.get(
+            self.reversor(('posts:post_detail', post.pk))
+        )
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=post.pub_date.replace(year=2000)
+        )
+        for _ in archive_posts():
+            pass
+        view_counter.flush()
+        self.assertEqual(ArchivedPost.objects.get(pk=post.pk).views, 1)
+
     def post_text_content_return(self, post, page=('posts:index',)):
         response = self.authorized_client.get(self.reversor(page))
         return post.text, response.content.decode()
@@ -293,3 +355,102 @@ class PostViewsTest(TestCase):
         """Пост не появляется на странице подписок у не-подписчика."""
         response = self.follower_client.get(reverse('posts:follow_index'))
         self.assertNotIn(PostViewsTest.post.text, response.content.decode())
+
+    def test_new_posts_count(self):
+        """Счётчик новых постов считает только посты новее курсора."""
+        url = reverse('posts:new_posts_count')
+        since = PostViewsTest.post.pk
+        response = self.authorized_client.get(url, {'since': since})
+        self.assertEqual(response.json()['count'], 0)
+        Post.objects.create(text='Новый пост', author=PostViewsTest.user)
+        response = self.authorized_client.get(url, {'since': since})
+        self.assertEqual(response.json()['count'], 1)
+        hidden = User.objects.create_user(username='hidden', is_active=False)
+        Post.objects.create(text='Скрытый пост', author=hidden)
+        response = self.authorized_client.get(url, {'since': since})
+        self.assertEqual(response.json()['count'], 1)
+
+    @override_settings(LATEST_POST_ID_TIMEOUT=0)
+    def test_new_posts_count_without_local_invalidation(self):
+        """Отметка истекает сама: пост, созданный другим процессом без
+        сброса кэша здесь, всё равно виден."""
+        url = reverse('posts:new_posts_count')
+        since = PostViewsTest.post.pk
+        self.authorized_client.get(url, {'since': since})
+        Post.objects.bulk_create(
+            [Post(text='Пост другого процесса', author=PostViewsTest.user)]
+        )
+        response = self.authorized_client.get(url, {'since': since})
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_follow_index_new_posts_marker(self):
+        """Лента подписок показывает новые посты с прошлого визита."""
+        Follow.objects.create(
+            author=PostViewsTest.user,
+            user=PostViewsTest.follower_user
+        )
+        url = reverse('posts:follow_index')
+        response = self.follower_client.get(url)
+        self.assertEqual(response.context['new_posts'], 1)
+        response = self.follower_client.get(url)
+        self.assertEqual(response.context['new_posts'], 0)
+        Post.objects.create(text='Новый пост', author=PostViewsTest.user)
+        response = self.follower_client.get(
+            reverse('posts:follow_new_posts_count')
+        )
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_feeds_render_with_jinja2(self):
+        """Ленты на Jinja2 выводят те же посты, что и шаблоны Django."""
+        Post.objects.bulk_create([
+            Post(
+                author=PostViewsTest.user,
+                group=PostViewsTest.group,
+                text=f'Тест пост #{i}'
+            )
+            for i in range(1, 13)
+        ])
+        pages = (
+            ('posts:index',),
+            ('posts:group_list', PostViewsTest.group.slug),
+            ('posts:profile', PostViewsTest.user.username),
+            ('posts:post_detail', PostViewsTest.post.pk),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                contents = {}
+                for engine in ('django', 'jinja2'):
+                    cache.clear()
+                    with self.settings(FEED_TEMPLATE_ENGINE=engine):
+                        response = self.authorized_client.get(
+                            self.reversor(page) + '?page=2'
+                        )
+                    self.assertEqual(response.status_code, 200)
+                    contents[engine] = response.content.decode()
+                texts = (PostViewsTest.post.text, 'Тест пост #1<', 'page=1')
+                for text in texts:
+                    self.assertEqual(
+                        text in contents['django'],
+                        text in contents['jinja2']
+                    )
+
+    @override_settings(FEED_TEMPLATE_ENGINE='jinja2')
+    def test_index_cache_jinja2(self):
+        """Главная на Jinja2 кэшируется так же, как на шаблонах Django."""
+        self.test_index_cache()
+
+    def test_paginator_window(self):
+        """Пагинатор выводит окно страниц, а не все номера."""
+        Post.objects.bulk_create([
+            Post(author=PostViewsTest.user, text=f'Тест пост #{i}')
+            for i in range(1, 100)
+        ])
+        response = self.authorized_client.get(
+            reverse('posts:index') + '?page=5'
+        )
+        content = response.content.decode()
+        for page in (1, 3, 7, 10):
+            with self.subTest(page=page):
+                self.assertIn(f'?page={page}"', content)
+        self.assertNotIn('?page=8"', content)
+        self.assertIn('…', content)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from posts.models import subtree_end
+
+
+def subtree(comments, root):
+    """Ответы в ветке root в порядке путей."""
+    return comments.filter(
+        path__gt=root.path, path__lt=subtree_end(root.path)
+    )
+
+
+def thread_page(comments, number):
+    """Страница веток комментариев поста.
+
+    Корни страницы выбираются по индексу (post, depth, path), затем
+    ответы развёрнутых веток читаются одним запросом по диапазонам
+    путей. Ветки, где ответов больше COMMENT_COLLAPSE_AFTER, не
+    загружаются: их открывают отдельной страницей comment_thread.
+    Возвращает страницу корней, загруженные комментарии в порядке путей
+    и ветки — пары (корень, ответы).
+    """
+    roots = Paginator(
+        comments.filter(depth=0).select_related('author'),
+        settings.COMMENT_THREADS_PER_PAGE
+    ).get_page(number)
+    expanded = [
+        root for root in roots
+        if 0 < root.reply_count <= settings.COMMENT_COLLAPSE_AFTER
+    ]
+    threads = {root.path: (root, []) for root in roots}
+    if expanded:
+        ranges = Q()
+        for root in expanded:
+            ranges |= Q(path__gt=root.path, path__lt=subtree_end(root.path))
+        replies = comments.filter(ranges).select_related('author')
+        for reply in replies.order_by('path'):
+            root_path = next(
+                root.path for root in expanded
+                if reply.path.startswith(root.path)
+            )
+            threads[root_path][1].append(reply)
+    threads = list(threads.values())
+    loaded = [
+        comment for root, replies in threads for comment in [root, *replies]
+    ]
+    return roots, loaded, threads
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from posts.models import FeedMarker, Post
+
+LATEST_POST_KEY = 'posts:latest_post_id'
+NEW_POSTS_LIMIT = 100
+
+
+def latest_post_id():
+    """Верхняя отметка: id самого нового поста, хранится в кэше.
+
+    Кэш у каждого процесса свой, а forget_latest_post_id сбрасывает
+    отметку только там, где создан пост, поэтому она живёт
+    LATEST_POST_ID_TIMEOUT секунд: остальные процессы увидят новый пост
+    не позже.
+    """
+    latest = cache.get(LATEST_POST_KEY)
+    if latest is None:
+        latest = Post.objects.aggregate(latest=Max('pk'))['latest'] or 0
+        cache.set(LATEST_POST_KEY, latest, settings.LATEST_POST_ID_TIMEOUT)
+    return latest
+
+
+def forget_latest_post_id():
+    cache.delete(LATEST_POST_KEY)
+
+
+def count_new_posts(query_set, since):
+    """Число постов новее since, не больше NEW_POSTS_LIMIT.
+
+    Пока since не меньше верхней отметки, в БД не ходим; иначе считаем
+    по первичному ключу с ограничением сверху.
+    """
+    if since >= latest_post_id():
+        return 0
+    return query_set.filter(pk__gt=since).order_by().values(
+        'pk'
+    )[:NEW_POSTS_LIMIT].count()
+
+
+def last_seen_post_id(user):
+    return FeedMarker.objects.filter(user=user).values_list(
+        'last_seen_post_id', flat=True
+    ).first() or 0
+
+
+def mark_seen(user, last_seen, post_id):
+    if post_id > last_seen:
+        FeedMarker.objects.update_or_create(
+            user=user,
+            defaults={'last_seen_post_id': post_id}
+        )
@@ -7,15 +7,33 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('tags/<str:name>/', views.tag_feed, name='tag_feed'),
+    path('mentions/', views.mentions, name='mentions'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/new/', views.new_posts_count, name='new_posts_count'),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/new/',
+        views.follow_new_posts_count,
+        name='follow_new_posts_count'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/react/<str:kind>/',
+        views.react,
+        name='react'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
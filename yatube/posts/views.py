@@ -1,67 +1,208 @@
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from core.paginator import CachedCountPaginator
+from core.ratelimit import ratelimit
+from posts.archive import HotColdFeed
+from posts.counters import view_counter
 from posts.forms import CommentForm, PostForm
-from posts.models import Follow, Group, Post, User
+from posts.models import (
+    REACTION_CHOICES, ArchivedPost, Follow, Group, Post, Tag, User,
+    VersionConflict
+)
+from posts.reactions import toggle_reaction, user_reactions
+from posts.tags import keyset_page, posts_by_ids
+from posts.threads import subtree, thread_page
+from posts.unread import (
+    NEW_POSTS_LIMIT, count_new_posts, last_seen_post_id, mark_seen
+)
 
 POSTS_PER_PAGE = 10
+EDIT_CONFLICT_MESSAGE = (
+    'Пост изменили, пока вы его редактировали. '
+    'Проверьте текст и сохраните ещё раз.'
+)
 
 
 def paginator_page(request, query_set, posts_per_page=POSTS_PER_PAGE):
-    return Paginator(
+    return CachedCountPaginator(
         query_set, posts_per_page
     ).get_page(request.GET.get('page'))
 
 
+def parse_cursor(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def render_feed(request, template_name, context):
+    """Рендер лент и страницы поста движком FEED_TEMPLATE_ENGINE."""
+    return render(
+        request,
+        template_name,
+        context,
+        using=settings.FEED_TEMPLATE_ENGINE
+    )
+
+
+def feed_sort(request):
+    """Порядок ленты группы или автора: 'liked' или '' — новые сверху."""
+    return 'liked' if request.GET.get('sort') == 'liked' else ''
+
+
+def sorted_feed(sort, hot, cold):
+    """Лента по дате с архивом или, для 'liked', по числу реакций.
+
+    Популярные берутся только из горячей таблицы: порядок по score не
+    склеивается с архивом так, как порядок по дате.
+    """
+    if sort == 'liked':
+        return hot.order_by('-score', '-pub_date')
+    return HotColdFeed(hot, cold)
+
+
+def new_posts_response(query_set, since):
+    count = count_new_posts(query_set, since)
+    return JsonResponse({
+        'count': count,
+        'has_more': count >= NEW_POSTS_LIMIT,
+    })
+
+
 def index(request):
-    return render(request, 'posts/index.html', {
-        'page_obj': paginator_page(
-            request,
-            Post.objects.select_related('author', 'group'),
-        ),
+    return render_feed(request, 'posts/index.html', {
+        'page_obj': paginator_page(request, HotColdFeed(
+            Post.objects.visible().for_feed().select_related(
+                'author', 'group'
+            ),
+            ArchivedPost.objects.visible().for_feed().select_related(
+                'author', 'group'
+            ),
+        )),
     })
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    return render(request, 'posts/group_list.html', {
+    sort = feed_sort(request)
+    return render_feed(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': paginator_page(
-            request,
-            group.posts.select_related('author')
-        ),
+        'sort': sort,
+        'page_obj': paginator_page(request, sorted_feed(
+            sort,
+            group.posts.visible().for_feed().select_related('author'),
+            group.archived_posts.visible().for_feed().select_related(
+                'author'
+            ),
+        )),
     })
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User, username=username, is_active=True)
     user = request.user
-    return render(request, 'posts/profile.html', {
+    sort = feed_sort(request)
+    return render_feed(request, 'posts/profile.html', {
         'author': author,
-        'page_obj': paginator_page(
-            request,
-            author.posts.select_related('group')
-        ),
+        'sort': sort,
+        'page_obj': paginator_page(request, sorted_feed(
+            sort,
+            author.posts.for_feed().select_related('group'),
+            author.archived_posts.for_feed().select_related('group'),
+        )),
         'following': user.is_authenticated and user.follower.filter(
             author=author
         ).exists()
     })
 
 
+def visible_post(post_id):
+    """Видимый пост из горячей таблицы или из архива."""
+    post = Post.objects.visible().select_related(
+        'author', 'group'
+    ).filter(pk=post_id).first()
+    if post is None:
+        post = get_object_or_404(
+            ArchivedPost.objects.visible().select_related('author', 'group'),
+            pk=post_id
+        )
+    return post
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.select_related('author', 'group'),
-        pk=post_id
+    post = visible_post(post_id)
+    if not post.is_archived:
+        view_counter.incr(post.pk)
+    thread_page_obj, comments, threads = thread_page(
+        post.comments.filter(author__is_active=True),
+        request.GET.get('threads')
+    )
+    return render_feed(request, 'posts/post_detail.html', {
+        'post': post,
+        'comments': comments,
+        'threads': threads,
+        'thread_page_obj': thread_page_obj,
+        'collapse_after': settings.COMMENT_COLLAPSE_AFTER,
+        'form': CommentForm(),
+        'user_reactions': user_reactions(request.user, post),
+    })
+
+
+def comment_thread(request, post_id, comment_id):
+    """Свёрнутая ветка комментариев целиком, по страницам ответов."""
+    post = visible_post(post_id)
+    comments = post.comments.filter(author__is_active=True)
+    root = get_object_or_404(
+        comments.select_related('author'), pk=comment_id, depth=0
     )
-    return render(request, 'posts/post_detail.html', {
+    page_obj = Paginator(
+        subtree(comments, root).select_related('author'),
+        settings.COMMENT_REPLIES_PER_PAGE
+    ).get_page(request.GET.get('page'))
+    return render(request, 'posts/comment_thread.html', {
         'post': post,
-        'comments': post.comments.all(),
-        'form': CommentForm()
+        'root': root,
+        'page_obj': page_obj,
+    })
+
+
+def keyset_feed(request, rows, title):
+    post_ids, has_next = keyset_page(
+        rows,
+        parse_cursor(request.GET.get('before')),
+        POSTS_PER_PAGE
+    )
+    return render_feed(request, 'posts/keyset_feed.html', {
+        'title': title,
+        'posts': posts_by_ids(post_ids),
+        'next_cursor': post_ids[-1] if has_next else None,
     })
 
 
+def tag_feed(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    return keyset_feed(request, tag.post_tags.all(), str(tag))
+
+
 @login_required
+def mentions(request):
+    return keyset_feed(
+        request,
+        request.user.mentions.all(),
+        'Упоминания @' + request.user.username
+    )
+
+
+@login_required
+@ratelimit('post_create', '20/m')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -72,6 +213,7 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    form.save_m2m()
     return redirect('posts:profile', request.user)
 
 
@@ -80,21 +222,37 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
+    try:
+        expected_version = int(request.POST['version'])
+    except (KeyError, ValueError):
+        expected_version = post.version
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
+    status = HTTPStatus.OK
     if form.is_valid():
-        form.save()
-        return redirect('posts:post_detail', post_id)
+        try:
+            if form.changed_data:
+                post.save_versioned(expected_version, form.changed_data)
+        except VersionConflict:
+            form.add_error(None, EDIT_CONFLICT_MESSAGE)
+            status = HTTPStatus.CONFLICT
+            post.version = Post.objects.values_list(
+                'version', flat=True
+            ).get(pk=post_id)
+        else:
+            return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', {
         'form': form,
         'is_edit': True,
-    })
+        'version': post.version,
+    }, status=status)
 
 
 @login_required
+@ratelimit('add_comment', '30/m')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -103,21 +261,68 @@ def add_comment(request, post_id):
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
+    parent_id = parse_cursor(request.POST.get('parent'))
+    parent = parent_id and post.comments.filter(pk=parent_id).first()
+    if parent:
+        comment.reply_to(parent)
     comment.save()
     return redirect('posts:post_detail', post_id)
 
 
+@login_required
+@require_POST
+@ratelimit('react', '60/m')
+def react(request, post_id, kind):
+    if kind not in dict(REACTION_CHOICES) or not (
+        Post.objects.visible().filter(pk=post_id).exists()
+        or ArchivedPost.objects.visible().filter(pk=post_id).exists()
+    ):
+        raise Http404
+    toggle_reaction(request.user, post_id, kind)
+    return redirect('posts:post_detail', post_id)
+
+
+def new_posts_count(request):
+    return new_posts_response(
+        Post.objects.visible(),
+        parse_cursor(request.GET.get('since'))
+    )
+
+
 @login_required
 def follow_index(request):
-    return render(request, 'posts/follow.html', {
-        'page_obj': paginator_page(
-            request,
-            Post.objects.filter(author__following__user=request.user)
-        )
+    posts = Post.objects.visible().filter(
+        author__following__user=request.user
+    )
+    last_seen = last_seen_post_id(request.user)
+    page_obj = paginator_page(request, HotColdFeed(
+        posts.for_feed().select_related('author', 'group'),
+        ArchivedPost.objects.visible().filter(
+            author__following__user=request.user
+        ).for_feed().select_related('author', 'group'),
+    ))
+    new_posts = count_new_posts(posts, last_seen)
+    if page_obj.number == 1 and page_obj.object_list:
+        mark_seen(request.user, last_seen, page_obj[0].pk)
+    return render_feed(request, 'posts/follow.html', {
+        'page_obj': page_obj,
+        'new_posts': new_posts,
     })
 
 
 @login_required
+def follow_new_posts_count(request):
+    return new_posts_response(
+        Post.objects.visible().filter(author__following__user=request.user),
+        parse_cursor(
+            request.GET.get('since'),
+            last_seen_post_id(request.user)
+        )
+    )
+
+
+@login_required
+@ratelimit('follow', '60/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
@@ -127,6 +332,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', '60/m', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.admin import chunked_delete_action
+from posts.models import DeletionTask
+
+User = get_user_model()
+
+
+class YatubeUserAdmin(UserAdmin):
+    actions = (chunked_delete_action(DeletionTask.USER),)
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
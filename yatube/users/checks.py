@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register(Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    """Сессии в кэше требуют кэша, общего для всех процессов.
+
+    В LocMemCache выход и сброс сессии видны только процессу, который
+    их выполнил: остальные продолжают пускать по старой сессии.
+    """
+    if settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES:
+        return []
+    backend = import_string(
+        settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    )
+    if issubclass(backend, (LocMemCache, DummyCache)):
+        return [Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} хранит сессии в '
+            f'кэше {settings.SESSION_CACHE_ALIAS}, который не общий для '
+            f'процессов.',
+            hint=(
+                'Настройте общий кэш (memcached, redis) или используйте '
+                'django.contrib.sessions.backends.db.'
+            ),
+            id='users.E001',
+        )]
+    return []
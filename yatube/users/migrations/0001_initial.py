@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationSettings',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest_enabled', models.BooleanField(default=True, verbose_name='Присылать письма о новых постах')),
+                ('digest_frequency', models.CharField(choices=[('hourly', 'Раз в час'), ('daily', 'Раз в день')], default='daily', max_length=10, verbose_name='Как часто')),
+                ('unsubscribe_token', models.CharField(default=users.models.new_unsubscribe_token, editable=False, max_length=64, unique=True, verbose_name='Ключ отписки')),
+                ('last_digest_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последнее письмо')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_settings', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Настройки уведомлений',
+                'verbose_name_plural': 'Настройки уведомлений',
+            },
+        ),
+    ]
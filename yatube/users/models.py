@@ -0,0 +1,63 @@
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+def new_unsubscribe_token():
+    return secrets.token_urlsafe(24)
+
+
+class NotificationSettings(models.Model):
+    HOURLY = 'hourly'
+    DAILY = 'daily'
+    FREQUENCY_CHOICES = (
+        (HOURLY, 'Раз в час'),
+        (DAILY, 'Раз в день'),
+    )
+    INTERVALS = {
+        HOURLY: 60 * 60,
+        DAILY: 24 * 60 * 60,
+    }
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_settings',
+        verbose_name='Пользователь'
+    )
+    digest_enabled = models.BooleanField(
+        default=True,
+        verbose_name='Присылать письма о новых постах'
+    )
+    digest_frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCY_CHOICES,
+        default=DAILY,
+        verbose_name='Как часто'
+    )
+    unsubscribe_token = models.CharField(
+        max_length=64,
+        unique=True,
+        default=new_unsubscribe_token,
+        editable=False,
+        verbose_name='Ключ отписки'
+    )
+    last_digest_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Последнее письмо'
+    )
+
+    class Meta:
+        verbose_name = 'Настройки уведомлений'
+        verbose_name_plural = 'Настройки уведомлений'
+
+    def __str__(self):
+        return str(self.user)
+
+    @property
+    def interval(self):
+        return self.INTERVALS[self.digest_frequency]
@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.crypto import constant_time_compare
+
+User = auth.get_user_model()
+
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'first_name', 'last_name',
+    'is_staff', 'is_active', 'is_superuser',
+)
+SNAPSHOT_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+
+
+def snapshot_key(user_id, session_hash):
+    return f'users:snapshot:{user_id}:{session_hash}'
+
+
+def hashes_key(user_id):
+    return f'users:snapshot_hashes:{user_id}'
+
+
+def load_snapshot(user_id, session_hash):
+    """Поля пользователя для шаблонов, если сессия с session_hash ещё
+    действительна.
+
+    Снимок ищется по паре (пользователь, хеш сессии) и кладётся в кэш,
+    только если хеш совпал с хешем из БД. Кэш у каждого процесса свой,
+    поэтому снимок живёт USER_SNAPSHOT_TIMEOUT секунд: смена пароля или
+    деактивация в другом процессе видна здесь не позже. Сессия, которой
+    после смены пароля выдали новый хеш, сразу получает новый ключ.
+    Возвращает None, если пользователя нет или хеш не совпал.
+    """
+    key = snapshot_key(user_id, session_hash)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = User.objects.only(*SNAPSHOT_FIELDS, 'password').filter(
+            pk=user_id
+        ).first()
+        if user is None or not constant_time_compare(
+            session_hash, user.get_session_auth_hash()
+        ):
+            return None
+        snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+        timeout = settings.USER_SNAPSHOT_TIMEOUT
+        cache.set(key, snapshot, timeout)
+        hashes = cache.get(hashes_key(user_id)) or []
+        if session_hash not in hashes:
+            cache.set(hashes_key(user_id), [*hashes, session_hash], timeout)
+    return snapshot
+
+
+def forget_snapshot(user_id):
+    """Сбрасывает снимки пользователя в этом процессе."""
+    hashes = cache.get(hashes_key(user_id)) or []
+    cache.delete_many([
+        hashes_key(user_id),
+        *(snapshot_key(user_id, session_hash) for session_hash in hashes),
+    ])
+
+
+def get_user(request):
+    """То же, что django.contrib.auth.get_user, но без запроса к auth_user.
+
+    Возвращает настоящий экземпляр User, в котором загружены только поля
+    снимка; остальные поля отложены и догружаются из БД при обращении.
+    """
+    session = request.session
+    try:
+        user_id = User._meta.pk.to_python(session[auth.SESSION_KEY])
+        backend_path = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if (
+        backend_path not in settings.AUTHENTICATION_BACKENDS
+        or backend_path not in SNAPSHOT_BACKENDS
+    ):
+        return auth.get_user(request)
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    snapshot = session_hash and load_snapshot(user_id, session_hash)
+    if not snapshot:
+        session.flush()
+        return AnonymousUser()
+    if not snapshot['is_active']:
+        return AnonymousUser()
+    # from_db ждёт значения в порядке полей модели.
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in SNAPSHOT_FIELDS
+    ]
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        field_names,
+        [snapshot[field] for field in field_names]
+    )
+    user.backend = backend_path
+    return user
@@ -0,0 +1,98 @@
+from django.contrib.auth import HASH_SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.checks import check_session_cache
+
+User = get_user_model()
+
+
+class UserSnapshotTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='one',
+            first_name='Иван',
+            password='very-secret-1',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(UserSnapshotTest.user)
+        self.url = reverse('about:author')
+
+    def test_user_read_from_cache(self):
+        """Повторный запрос не читает пользователя из БД."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'auth_user' in query['sql']
+        ])
+        self.assertEqual(response.context['user'], UserSnapshotTest.user)
+        self.assertIsInstance(response.context['user'], User)
+
+    def test_snapshot_invalidated_on_save(self):
+        """Изменение пользователя сбрасывает снимок."""
+        self.client.get(self.url)
+        user = User.objects.get(pk=UserSnapshotTest.user.pk)
+        user.first_name = 'Пётр'
+        user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Пётр')
+
+    def test_password_change_logs_out(self):
+        """Смена пароля завершает старые сессии."""
+        self.client.get(self.url)
+        user = User.objects.get(pk=UserSnapshotTest.user.pk)
+        user.set_password('another-secret-2')
+        user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_deferred_fields_loaded_on_access(self):
+        """Поля вне снимка догружаются при обращении."""
+        UserSnapshotTest.user.email = 'one@example.com'
+        UserSnapshotTest.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].email, 'one@example.com')
+
+    @override_settings(USER_SNAPSHOT_TIMEOUT=0)
+    def test_password_change_in_other_process_logs_out(self):
+        """Смена пароля без сброса снимка здесь, как в другом процессе,
+        тоже завершает сессию: снимок живёт секунды."""
+        self.client.get(self.url)
+        User.objects.filter(pk=UserSnapshotTest.user.pk).update(
+            password=make_password('another-secret-2')
+        )
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_updated_session_hash_survives_stale_snapshot(self):
+        """Сессия, получившая новый хеш после смены пароля, не сбрасывается
+        старым снимком процесса."""
+        self.client.get(self.url)
+        user = User.objects.get(pk=UserSnapshotTest.user.pk)
+        user.set_password('another-secret-2')
+        User.objects.filter(pk=user.pk).update(password=user.password)
+        session = self.client.session
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_cached_sessions_need_shared_cache(self):
+        """Сессии в кэше процесса не проходят проверку системы."""
+        self.assertEqual(check_session_cache(None), [])
+        with self.settings(
+            SESSION_ENGINE='django.contrib.sessions.backends.cached_db'
+        ):
+            errors = check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ['users.E001'])
@@ -5,15 +5,29 @@ from django.contrib.auth.views import (
     PasswordResetView
 )
 from django.urls import path
+
+from core.ratelimit import ratelimit
 from users import views
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path(
+        'signup/',
+        ratelimit('signup', '10/h', key='ip')(views.SignUp.as_view()),
+        name='signup'
+    ),
+    path('notifications/', views.notifications, name='notifications'),
+    path(
+        'unsubscribe/<str:token>/',
+        views.unsubscribe,
+        name='unsubscribe'
+    ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        ratelimit('login', '10/m', key='ip')(
+            LoginView.as_view(template_name='users/login.html')
+        ),
         name='login'
     ),
     path(
@@ -1,9 +1,49 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import CreateView
-from users.forms import CreationForm
+
+from users.forms import CreationForm, NotificationSettingsForm
+from users.models import NotificationSettings
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+@login_required
+def notifications(request):
+    notification_settings, _ = NotificationSettings.objects.get_or_create(
+        user=request.user
+    )
+    form = NotificationSettingsForm(
+        request.POST or None,
+        instance=notification_settings
+    )
+    if form.is_valid():
+        form.save()
+        return redirect('users:notifications')
+    return render(request, 'users/notifications.html', {'form': form})
+
+
+@csrf_exempt
+def unsubscribe(request, token):
+    """Отписка по ссылке из письма.
+
+    POST принимается без CSRF-токена: почтовые клиенты отправляют его
+    сами по заголовку List-Unsubscribe-Post (RFC 8058), а разрешение даёт
+    секретный token в адресе.
+    """
+    notification_settings = get_object_or_404(
+        NotificationSettings,
+        unsubscribe_token=token
+    )
+    if request.method == 'POST':
+        notification_settings.digest_enabled = False
+        notification_settings.save(update_fields=['digest_enabled'])
+    return render(request, 'users/unsubscribe.html', {
+        'unsubscribed': not notification_settings.digest_enabled,
+    })
@@ -28,16 +28,22 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.slowqueries.SlowQueryMiddleware',
+    'core.accesslog.AccessLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.SnapshotAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -46,6 +52,8 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -63,6 +71,17 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(TEMPLATES_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
 ]
 
 MEDIA_URL = '/media/'
@@ -92,17 +111,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Кэш по умолчанию у каждого процесса свой: сессии в нём пережили бы
+# выход на других воркерах. Кэшировать сессии можно только в общем кэше,
+# это проверяет users.E001.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+USER_SNAPSHOT_TIMEOUT = 5
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'jobs.mail.QueuedEmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.metrics.MeteredLocMemCache',
     }
 }
 
@@ -117,3 +143,126 @@ USE_L10N = True
 USE_TZ = False
 
 STATIC_URL = '/static/'
+
+POST_VIEWS_FLUSH_INTERVAL = 30
+POST_VIEWS_FLUSH_THRESHOLD = 200
+LATEST_POST_ID_TIMEOUT = 5
+
+POST_IMAGE_WIDTHS = (480, 720, 960)
+POST_IMAGE_FORMATS = ('WEBP', 'JPEG')
+IMAGE_SWEEP_GRACE = 60 * 60
+
+COMPRESSION_MIN_SIZE = 500
+COMPRESSION_CONTENT_TYPES = (
+    'text/html',
+    'text/plain',
+    'application/json',
+)
+COMPRESSION_LEVELS = {
+    'br': 4,
+    'gzip': 6,
+}
+
+DELETION_BATCH_SIZE = 500
+DELETION_LEASE_TIMEOUT = 5 * 60
+
+POSTS_ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+FEED_TEMPLATE_ENGINE = 'django'
+
+PAGINATOR_NEIGHBORS = 2
+PAGINATOR_COUNT_TIMEOUT = 60
+ARCHIVE_COUNT_TIMEOUT = 60 * 60
+
+POST_EXCERPT_LENGTH = 300
+
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10
+JOBS_RETRY_BACKOFF_MAX = 60 * 60
+JOBS_LOCK_TIMEOUT = 15 * 60
+JOBS_HEARTBEAT_INTERVAL = 60
+JOBS_KEEP_FINISHED_DAYS = 7
+JOBS_PERIODIC = (
+    ('posts.run_deletions', 60),
+    ('posts.archive_posts', 24 * 60 * 60),
+    ('jobs.purge_finished', 60 * 60),
+    ('posts.send_digests', 10 * 60),
+    ('posts.merge_reactions', 60),
+    ('posts.sweep_images', 60 * 60),
+)
+
+SITE_URL = 'http://localhost:8000'
+DIGEST_BATCH_SIZE = 100
+DIGEST_MAX_POSTS = 20
+
+RATELIMIT_ENABLED = True
+# Счётчики ограничителя частоты. В кэше процесса лимит считается
+# отдельно каждым воркером; на сервере укажите общий кэш с атомарным
+# incr (memcached, redis), это проверяет core.W001.
+RATELIMIT_CACHE_ALIAS = 'default'
+
+WARMUP_ON_STARTUP = not DEBUG
+WARMUP_FEED_PAGES = 3
+WARMUP_REPORT_MODULES = 15
+
+# Метрики и журналы по умолчанию лежат в каталоге проекта, на сервере
+# каталог задают переменной окружения.
+RUNTIME_DIR = os.environ.get(
+    'YATUBE_RUNTIME_DIR', os.path.join(BASE_DIR, 'var')
+)
+# Тесты подменяют каталог на временный, см. core.runner.
+TEST_RUNNER = 'core.runner.TestRunner'
+
+METRICS_DIR = os.path.join(RUNTIME_DIR, 'metrics')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_MODELS = ('posts.Post', 'posts.Comment', 'posts.Follow')
+
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_SAMPLE_RATE = 1.0
+SLOW_QUERY_MAX_PER_MINUTE = 60
+
+QUERY_STATS_ENABLED = True
+QUERY_STATS_DIR = os.path.join(METRICS_DIR, 'queries')
+QUERY_STATS_CHECK_INTERVAL = 5
+
+ACCESS_LOG_FILE = os.path.join(RUNTIME_DIR, 'access.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.accesslog.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'access_log': {
+            'class': 'core.accesslog.AccessLogHandler',
+            'formatter': 'json',
+            'filename': ACCESS_LOG_FILE,
+            'max_bytes': 50 * 1024 * 1024,
+            'backup_count': 5,
+            'queue_size': 10000,
+            'batch_size': 500,
+            'flush_interval': 1.0,
+        },
+    },
+    'loggers': {
+        'core.accesslog': {
+            'handlers': ['access_log'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+COMMENT_MAX_DEPTH = 5
+COMMENT_THREADS_PER_PAGE = 20
+COMMENT_COLLAPSE_AFTER = 5
+COMMENT_REPLIES_PER_PAGE = 50
+
+REACTION_COUNTER_SHARDS = 8
+REACTION_MERGE_BATCH_SIZE = 500
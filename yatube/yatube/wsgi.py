@@ -1,7 +1,19 @@
 import os
 
-from django.core.wsgi import get_wsgi_application
+from core.importtime import ImportTimer
+
+import_timer = ImportTimer().install()
+
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ON_STARTUP:
+    from core.warmup import warm_up
+
+    warm_up(import_timer)
+
+import_timer.uninstall()